@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import threading
+
+import finnhub
+from finnhub.exceptions import FinnhubAPIException, FinnhubRequestException
+
+# ---------------------------------------------------------------------------
+# Pooled async transport for the Finnhub client (FINNHUB_TRANSPORT=httpx).
+#
+# finnhub.Client opens a requests session whose pool keeps 10 connections
+# per host; with the prefetch pool and several sessions in flight the rest
+# are opened and thrown away per call. This transport keeps every endpoint
+# method of finnhub.Client (paths and parameters are inherited) but sends
+# the requests through one httpx.AsyncClient running on a process-wide event
+# loop: a shared keep-alive pool, HTTP/2 when the server offers it (one
+# multiplexed connection), and at most FINNHUB_MAX_INFLIGHT requests on the
+# wire. Calling threads only wait on a future, so the blocking calls stay a
+# drop-in for fc; coroutine callers can await request() directly.
+#
+# Needs the optional `httpx` package (`httpx[http2]` for HTTP/2).
+# ---------------------------------------------------------------------------
+FINNHUB_MAX_INFLIGHT = int(os.environ.get("FINNHUB_MAX_INFLIGHT", "16"))
+FINNHUB_POOL_SIZE = int(os.environ.get("FINNHUB_POOL_SIZE", "32"))
+FINNHUB_HTTP2 = os.environ.get("FINNHUB_HTTP2", "1") not in ("0", "false", "")
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide transport loop, started on first use in a daemon thread."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="finnhub-transport", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+class AsyncTransportClient(finnhub.Client):
+
+    def __init__(self, api_key: str, base_url: str = None, max_inflight: int = FINNHUB_MAX_INFLIGHT,
+                 pool_size: int = FINNHUB_POOL_SIZE, http2: bool = FINNHUB_HTTP2, timeout: float = None):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError("FINNHUB_TRANSPORT=httpx requires the `httpx` package") from e
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                http2 = False
+        self._api_key = api_key
+        self.API_URL = base_url or finnhub.Client.API_URL
+        self.http2 = http2
+        self.loop = event_loop()
+        self._timeout = timeout or self.DEFAULT_TIMEOUT
+
+        async def setup():
+            client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                headers={"Accept": "application/json", "User-Agent": "finnhub/python"},
+                timeout=self._timeout,
+            )
+            return client, asyncio.Semaphore(max_inflight)
+
+        self._client, self._inflight = asyncio.run_coroutine_threadsafe(setup(), self.loop).result()
+
+    @property
+    def api_key(self):
+        return self._api_key
+
+    @api_key.setter
+    def api_key(self, token):
+        self._api_key = token
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self.loop).result()
+
+    # -- transport -----------------------------------------------------------
+    async def request(self, path: str, params: dict = None, timeout: float = None):
+        """Coroutine form of every endpoint call; runs on self.loop."""
+        query = {k: v for k, v in self._format_params(params or {}).items() if v is not None}
+        query["token"] = self._api_key
+        async with self._inflight:
+            response = await self._client.get(f"{self.API_URL}/{path.lstrip('/')}", params=query,
+                                              timeout=timeout or self._timeout)
+        return self._handle_httpx_response(response)
+
+    def _request(self, method, path, **kwargs):
+        # every finnhub.Client endpoint method lands here via _get()
+        return asyncio.run_coroutine_threadsafe(
+            self.request(path, kwargs.get("params"), kwargs.get("timeout")), self.loop
+        ).result()
+
+    @staticmethod
+    def _handle_httpx_response(response):
+        if not response.is_success:
+            raise FinnhubAPIException(response)
+        content_type = response.headers.get("Content-Type", "")
+        try:
+            if "application/json" in content_type:
+                return json.loads(response.content)
+            if "text/csv" in content_type or "text/plain" in content_type:
+                return response.text
+        except ValueError:
+            pass
+        raise FinnhubRequestException(f"Invalid Response: {response.text}")
+
+    def pool_info(self) -> dict:
+        try:
+            connections = len(self._client._transport._pool.connections)
+        except AttributeError:   # httpcore internals moved
+            connections = None
+        return {"http2": self.http2, "connections": connections}
@@ -0,0 +1,168 @@
+"""Headless page benchmark against the fake Finnhub client.
+
+Drives app.py through Streamlit's AppTest for a stock, an ETF and an index
+and reports, per scenario: cold and warm render time, time to first content,
+upstream call count and peak Python memory.
+
+    python bench/bench_app.py                        # report only
+    python bench/bench_app.py --update-baseline      # store as bench/baseline.json
+    python bench/bench_app.py --check                # exit 1 on regression
+
+The fake backend is configured with --latency/--error-rate/--fixtures (see
+fake_finnhub.py for the formats). Timings depend on the machine, so keep one
+baseline per CI runner; call counts are deterministic.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.join(ROOT, "app.py")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# metric -> (relative tolerance applies, absolute slack); lower is better for all
+METRICS = {
+    "cold_s": (True, 0.05),
+    "first_content_s": (True, 0.05),
+    "warm_s": (True, 0.05),
+    "upstream_calls": (False, 0),
+    "warm_upstream_calls": (False, 0),
+    "peak_mb": (True, 1.0),
+}
+
+
+def configure(args):
+    # must run before anything imports market_data
+    os.environ["FINNHUB_FAKE_LATENCY"] = args.latency
+    os.environ["FINNHUB_FAKE_ERROR_RATE"] = str(args.error_rate)
+    if args.fixtures:
+        os.environ["FINNHUB_FAKE_FIXTURES"] = args.fixtures
+    os.environ["RESPONSE_CACHE"] = "memory"
+    os.environ["FINNHUB_CALLS_PER_MINUTE"] = "100000"
+    os.environ["FINNHUB_BURST"] = "1000"
+    os.environ["SYMBOL_INDEX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-"), "symbols.tsv")
+    sys.path.insert(0, ROOT)
+
+
+def search(symbol: str, timeout: float) -> tuple:
+    """Open a fresh session, search symbol; returns (seconds, page_timings)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.run()
+    at.chat_input[0].set_value(symbol)
+    t0 = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(f"{symbol}: {at.exception[0].value}")
+    return elapsed, dict(at.session_state.page_timings)
+
+
+def clear_caches():
+    from figure_cache import figure_cache
+    from response_cache import get_cache
+    get_cache().clear()
+    figure_cache.clear()
+
+
+def run_scenario(symbol: str, repeat: int, timeout: float) -> dict:
+    import market_data
+    client = market_data.fc.client
+
+    cold, first, calls, warm, warm_calls = [], [], [], [], []
+    for _ in range(repeat):
+        clear_caches()
+        client.reset_counts()
+        elapsed, timings = search(symbol, timeout)
+        cold.append(elapsed)
+        first.append(timings["first_content"])
+        calls.append(client.total_calls)
+
+        client.reset_counts()
+        elapsed, _ = search(symbol, timeout)
+        warm.append(elapsed)
+        warm_calls.append(client.total_calls)
+
+    # separate cold pass for memory so tracing overhead stays out of timings
+    clear_caches()
+    tracemalloc.start()
+    search(symbol, timeout)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cold_s": round(statistics.median(cold), 4),
+        "first_content_s": round(statistics.median(first), 4),
+        "warm_s": round(statistics.median(warm), 4),
+        "upstream_calls": max(calls),
+        "warm_upstream_calls": max(warm_calls),
+        "peak_mb": round(peak / 1e6, 2),
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    found = []
+    for scenario, metrics in results.items():
+        base = baseline.get(scenario, {})
+        for name, value in metrics.items():
+            if name not in base or name not in METRICS:
+                continue
+            relative, slack = METRICS[name]
+            limit = base[name] * (1 + tolerance) + slack if relative else base[name] + slack
+            if value > limit:
+                found.append(f"{scenario}.{name}: {value} > {limit:.4g} (baseline {base[name]})")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", nargs="+", default=["AAPL", "SPY", "^GSPC"])
+    parser.add_argument("--latency", default="0.1", help="seconds, or default=..,endpoint=..")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fixtures", default="", help="directory of recorded payloads, or a snapshot bundle")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail on regression vs baseline")
+    args = parser.parse_args()
+    configure(args)
+
+    # build the symbol index the way a deploy would, from the (fake) symbol list
+    import market_data
+    from symbol_index import build_rows, get_symbol_index
+    get_symbol_index().write(build_rows(market_data.fc, ["US"]))
+
+    results = {}
+    print(f"{'scenario':<10}" + "".join(f"{name:>20}" for name in METRICS))
+    for symbol in args.symbols:
+        results[symbol] = run_scenario(symbol, args.repeat, args.timeout)
+        print(f"{symbol:<10}" + "".join(f"{results[symbol][name]:>20}" for name in METRICS))
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --update-baseline first")
+            return 1
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print("REGRESSION", line)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
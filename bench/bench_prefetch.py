@@ -0,0 +1,55 @@
+"""Cold-load latency of the prefetch stage against the fake Finnhub client.
+
+    python bench/bench_prefetch.py --latency 0.3
+
+Exits non-zero if the concurrent fan-out is not within --slack of the slowest
+single call.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="injected seconds per call")
+    parser.add_argument("--slack", type=float, default=1.5, help="allowed multiple of one call")
+    parser.add_argument("--symbols", nargs="+", default=["AAPL:stock", "SPY:etf", "^GSPC:index"])
+    args = parser.parse_args()
+
+    os.environ["FINNHUB_FAKE_LATENCY"] = str(args.latency)
+    os.environ["RESPONSE_CACHE"] = "memory"
+    os.environ["FINNHUB_CALLS_PER_MINUTE"] = "100000"
+    os.environ["FINNHUB_BURST"] = "1000"
+    import market_data as md
+    from response_cache import get_cache
+
+    failed = False
+    for item in args.symbols:
+        symbol, sym_type = item.split(":")
+        plan = md.page_fetch_plan(symbol, sym_type)
+
+        get_cache().clear()
+        t0 = time.perf_counter()
+        for fn, a, kw, _ in plan:
+            fn(*a, **kw)
+        sequential = time.perf_counter() - t0
+
+        get_cache().clear()
+        t0 = time.perf_counter()
+        results = md.prefetch(plan)
+        concurrent = time.perf_counter() - t0
+
+        errors = [k[0] for k, v in results.items() if isinstance(v, Exception)]
+        ok = concurrent <= args.latency * args.slack and not errors
+        failed |= not ok
+        print(f"{symbol:<8} {sym_type:<6} calls={len(plan):<3} sequential={sequential:6.3f}s "
+              f"prefetch={concurrent:6.3f}s  {'ok' if ok else 'FAIL'} {' '.join(errors)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Startup budget: cold process start and the first welcome-screen paint.
+
+    python bench/bench_startup.py --runs 5 --cold-budget 1.5 --paint-budget 0.6
+
+Every run is a fresh interpreter that imports Streamlit (what the server pays
+before it can serve anything) and then runs app.py once with no symbol (the
+first paint). Exits non-zero if the median of either is over budget, or if
+the welcome screen pulled in the data/chart stack.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# modules the welcome screen must not import
+HEAVY = ("pandas", "plotly.express", "market_data")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "paint": t2 - t1, "errors": [e.value for e in at.exception],
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe() -> dict:
+    code = PROBE.format(app=os.path.join(ROOT, "app.py"), heavy=HEAVY)
+    env = dict(os.environ, RESPONSE_CACHE="memory", FINNHUB_FAKE_LATENCY="0", METRICS_PORT="0",
+               PYTHONPATH=ROOT)
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                         check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - t0
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--cold-budget", type=float, default=1.5,
+                        help="seconds for interpreter start + Streamlit import")
+    parser.add_argument("--paint-budget", type=float, default=0.6,
+                        help="seconds for the first welcome-screen script run")
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.runs)]
+    cold = statistics.median(r["process"] - r["paint"] for r in runs)
+    paint = statistics.median(r["paint"] for r in runs)
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+    errors = [e for r in runs for e in r["errors"]]
+
+    ok = cold <= args.cold_budget and paint <= args.paint_budget and not heavy and not errors
+    print(f"cold start   {cold:6.3f}s  (budget {args.cold_budget:.2f}s)")
+    print(f"first paint  {paint:6.3f}s  (budget {args.paint_budget:.2f}s)")
+    print(f"heavy imports on welcome: {', '.join(heavy) or 'none'}")
+    if errors:
+        print("errors:", *errors, sep="\n  ")
+    print("ok" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Symbol search latency over a US-sized universe.
+
+    python bench/bench_symbol_search.py --symbols 30000 --queries 5000 --budget-ms 1.0
+
+Writes a synthetic symbol index (random tickers and company names), builds
+the in-memory search from it and times suggest() over a mix of prefixes,
+name words and one-typo tickers. Exits non-zero if p99 is over budget.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+WORDS = ["Apple", "Micro", "Global", "Energy", "Capital", "Health", "Bio", "Therapeutics", "Systems",
+         "Holdings", "Bank", "Trust", "Semiconductor", "Software", "Resources", "Partners", "Group",
+         "Pharma", "Networks", "Industries", "Realty", "Foods", "Motors", "Airlines", "Mining"]
+
+
+def universe(n: int, rng: random.Random) -> list:
+    rows = {}
+    while len(rows) < n:
+        ticker = "".join(rng.choices(string.ascii_uppercase, k=rng.choice((1, 2, 3, 3, 4, 4, 4, 5))))
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3))) + rng.choice((" Inc", " Corp", " Ltd", " ETF"))
+        rows[ticker] = (ticker, "etf" if name.endswith("ETF") else "stock", name)
+    return sorted(rows.values())
+
+
+def queries(rows: list, n: int, rng: random.Random) -> list:
+    out = []
+    for _ in range(n):
+        ticker, _, name = rng.choice(rows)
+        kind = rng.randrange(4)
+        if kind == 0:
+            out.append(ticker[:rng.randint(1, len(ticker))])
+        elif kind == 1:
+            word = rng.choice(name.split())
+            out.append(word[:rng.randint(2, max(2, len(word)))])
+        elif kind == 2:
+            i = rng.randrange(len(ticker))
+            out.append(ticker[:i] + rng.choice(string.ascii_uppercase) + ticker[i + 1:])
+        else:
+            out.append(ticker)
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="p99 suggest() budget")
+    args = parser.parse_args()
+
+    from symbol_index import SymbolIndex
+    from symbol_search import SymbolSearch
+
+    rng = random.Random(0)
+    rows = universe(args.symbols, rng)
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "symbols.tsv")
+    index = SymbolIndex(path=path, snapshot="")
+    index.write(rows)
+    print(f"index file {os.path.getsize(path) / 1e6:.2f} MB, {len(index)} symbols")
+
+    t0 = time.perf_counter()
+    search = SymbolSearch(index)
+    print(f"build {time.perf_counter() - t0:.3f}s")
+
+    times = []
+    for q in queries(rows, args.queries, rng):
+        t0 = time.perf_counter()
+        search.suggest(q)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    p99 = times[int(len(times) * 0.99)]
+    print(f"suggest  p50={statistics.median(times):.3f}ms  p99={p99:.3f}ms  max={times[-1]:.3f}ms")
+    if p99 > args.budget_ms:
+        print(f"FAIL: p99 {p99:.3f}ms over the {args.budget_ms}ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
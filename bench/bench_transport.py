@@ -0,0 +1,67 @@
+"""Finnhub transport throughput against the local stub server.
+
+    python bench/bench_transport.py --latency 0.05 --calls 400 --threads 32
+
+Runs the same concurrent mix of endpoint calls through finnhub's requests
+session and through the pooled httpx transport, and reports wall time,
+calls/second and how many TCP connections the stub had to accept.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+CALLS = [
+    ("company_basic_financials", ("AAPL", "all"), {}),
+    ("recommendation_trends", ("MSFT",), {}),
+    ("price_target", ("NVDA",), {}),
+    ("company_earnings", ("AAPL",), {"limit": 8}),
+    ("etfs_profile", (), {"symbol": "SPY"}),
+    ("etfs_sector_exp", (), {"symbol": "QQQ"}),
+]
+
+
+def make_client(transport: str, url: str):
+    if transport == "httpx":
+        from async_transport import AsyncTransportClient
+        return AsyncTransportClient("bench", base_url=url)
+    import finnhub
+    client = finnhub.Client(api_key="bench")
+    client.API_URL = url
+    return client
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per call")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--transports", nargs="+", default=["requests", "httpx"])
+    args = parser.parse_args()
+
+    from stub_finnhub import start
+    server = start(latency=args.latency)
+    work = [CALLS[i % len(CALLS)] for i in range(args.calls)]
+
+    failed = False
+    for transport in args.transports:
+        client = make_client(transport, server.url)
+        getattr(client, CALLS[0][0])(*CALLS[0][1], **CALLS[0][2])   # warm up
+        server.reset_counts()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            futures = [pool.submit(getattr(client, name), *a, **kw) for name, a, kw in work]
+            errors = sum(1 for f in futures if f.exception() is not None)
+        elapsed = time.perf_counter() - t0
+        failed |= errors > 0
+        print(f"{transport:<9} calls={args.calls:<5} threads={args.threads:<3} "
+              f"time={elapsed:6.3f}s  rate={args.calls / elapsed:7.1f}/s  "
+              f"connections={server.connections:<4} errors={errors}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Local HTTP stand-in for the Finnhub REST API.
+
+Serves fake_finnhub.FakeClient payloads under the real /api/v1 paths with
+HTTP/1.1 keep-alive and a configurable per-request latency, and counts the
+TCP connections it accepts so transports can be compared on reuse.
+
+    python bench/stub_finnhub.py --port 8765 --latency 0.05
+    FINNHUB_BASE_URL=http://127.0.0.1:8765/api/v1 streamlit run app.py
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_finnhub import FakeAPIError, FakeClient  # noqa: E402
+
+# REST path -> finnhub.Client method name
+PATHS = {
+    "/stock/metric": "company_basic_financials",
+    "/stock/recommendation": "recommendation_trends",
+    "/stock/price-target": "price_target",
+    "/stock/earnings": "company_earnings",
+    "/calendar/earnings": "earnings_calendar",
+    "/stock/split": "stock_splits",
+    "/stock/dividend2": "stock_basic_dividends",
+    "/stock/upgrade-downgrade": "upgrade_downgrade",
+    "/stock/revenue-estimate": "company_revenue_estimates",
+    "/stock/eps-estimate": "company_eps_estimates",
+    "/etf/profile": "etfs_profile",
+    "/etf/holdings": "etfs_holdings",
+    "/etf/sector": "etfs_sector_exp",
+    "/etf/country": "etfs_country_exp",
+    "/index/constituents": "indices_const",
+    "/stock/symbol": "stock_symbols",
+}
+PREFIX = "/api/v1"
+
+# query parameter -> keyword the client method takes
+RENAMED = {"from": "_from", "securityType": "security_type"}
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.05):
+        super().__init__(address, StubHandler)
+        self.fake = FakeClient(latency=latency)
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{PREFIX}"
+
+    def reset_counts(self):
+        with self._lock:
+            self.connections = self.requests = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = "/" + url.path[len(PREFIX):].lstrip("/") if url.path.startswith(PREFIX) else url.path
+        method = PATHS.get(path)
+        if method is None:
+            return self._send(404, {"error": f"unknown endpoint {path}"})
+        kwargs = {}
+        for key, value in parse_qsl(url.query):
+            if key == "token":
+                continue
+            kwargs[RENAMED.get(key, key)] = int(value) if value.isdigit() else value
+        with self.server._lock:
+            self.server.requests += 1
+        try:
+            payload = getattr(self.server.fake, method)(**kwargs)
+        except TypeError as e:
+            return self._send(422, {"error": str(e)})
+        except FakeAPIError as e:
+            return self._send(e.status_code, {"error": str(e)})
+        self._send(200, payload)
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port: int = 0, latency: float = 0.05) -> StubServer:
+    """Start a stub in a daemon thread; port 0 picks a free one (see .url)."""
+    server = StubServer(("127.0.0.1", port), latency=latency)
+    threading.Thread(target=server.serve_forever, name="stub-finnhub", daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    server = StubServer(("127.0.0.1", args.port), latency=args.latency)
+    print(f"serving fake Finnhub on {server.url}")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
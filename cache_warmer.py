@@ -0,0 +1,261 @@
+"""Keep the response cache warm for a watchlist.
+
+    python cache_warmer.py AAPL MSFT SPY ^GSPC --expand 25      # one pass
+    python cache_warmer.py --loop --interval 900                 # forever, CACHE_WARM_WATCHLIST
+    python cache_warmer.py AAPL SPY --report                     # coverage only
+
+Run next to the app (it shares the SQLite/Redis response cache) or in-process
+by setting CACHE_WARM_WATCHLIST on the app itself.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from market_data import FINNHUB_CALLS_PER_MINUTE, detect_symbol_type, page_fetch_plan
+from metrics import register_collector
+from rate_limit import PRIORITY_BACKGROUND, request_priority
+from symbol_data import SymbolData
+from symbol_index import get_symbol_index
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration
+#
+# CACHE_WARM_WATCHLIST        comma/space separated symbols; empty disables
+#                             the in-process warmer
+# CACHE_WARM_EXPAND           top N index constituents / ETF holdings added
+#                             per watchlist entry (0 = watchlist only)
+# CACHE_WARM_MAX_SYMBOLS      cap on the expanded symbol set
+# CACHE_WARM_INTERVAL         seconds between passes
+# CACHE_WARM_CALLS_PER_MINUTE upstream calls the warmer may spend; defaults to
+#                             a quarter of the plan quota so users keep the rest
+# CACHE_WARM_AHEAD            refresh entries older than this fraction of
+#                             their endpoint's fresh TTL
+# ---------------------------------------------------------------------------
+CACHE_WARM_WATCHLIST = os.environ.get("CACHE_WARM_WATCHLIST", "")
+CACHE_WARM_EXPAND = int(os.environ.get("CACHE_WARM_EXPAND", "0"))
+CACHE_WARM_MAX_SYMBOLS = int(os.environ.get("CACHE_WARM_MAX_SYMBOLS", "100"))
+CACHE_WARM_INTERVAL = float(os.environ.get("CACHE_WARM_INTERVAL", "900"))
+CACHE_WARM_CALLS_PER_MINUTE = float(
+    os.environ.get("CACHE_WARM_CALLS_PER_MINUTE", str(FINNHUB_CALLS_PER_MINUTE / 4))
+)
+CACHE_WARM_AHEAD = float(os.environ.get("CACHE_WARM_AHEAD", "0.8"))
+
+
+def parse_watchlist(spec: str) -> list:
+    return [s.strip().upper() for s in spec.replace(",", " ").split() if s.strip()]
+
+
+# ---------------------------------------------------------------------------
+# Symbol set
+# ---------------------------------------------------------------------------
+def members(symbol: str, sym_type: str, top_n: int) -> list:
+    """Largest index constituents / ETF holdings of symbol, by weight."""
+    data = SymbolData(symbol)
+    if sym_type == "index":
+        df = data.index_breakdown
+        if "symbol" in df.columns:
+            return df["symbol"].head(top_n).tolist()
+        return list(data.index_constituents[:top_n])
+    if sym_type == "etf":
+        df = data.etf_holdings
+        if "symbol" in df.columns:
+            return [s for s in df["symbol"].head(top_n).tolist() if s]
+    return []
+
+
+def expand(watchlist: list, top_n: int = CACHE_WARM_EXPAND,
+           max_symbols: int = CACHE_WARM_MAX_SYMBOLS) -> list:
+    """[(symbol, type)] for the watchlist plus the top_n members of each
+    index/ETF on it, watchlist first, capped at max_symbols."""
+    index = get_symbol_index()
+    out, seen = [], set()
+
+    def add(symbol, sym_type):
+        if symbol not in seen and len(out) < max_symbols:
+            seen.add(symbol)
+            out.append((symbol, sym_type))
+
+    typed = []
+    for symbol in watchlist:
+        sym_type = detect_symbol_type(symbol, priority=PRIORITY_BACKGROUND)
+        if sym_type == "unknown":
+            continue    # upstream unreachable; the next pass probes it again
+        typed.append((symbol, sym_type))
+        add(symbol, sym_type)
+    if top_n:
+        for symbol, sym_type in typed:
+            try:
+                found = members(symbol, sym_type, top_n)
+            except Exception:
+                continue
+            for member in found:
+                # members are not probed: unknown ones are almost always stocks
+                add(member, index.lookup(member) or "stock")
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Warming
+# ---------------------------------------------------------------------------
+def plan_calls(symbols: list) -> list:
+    """Unique (fetcher, args, kwargs) across every symbol's page plan."""
+    calls, seen = [], set()
+    for symbol, sym_type in symbols:
+        for fn, args, kwargs, _ in page_fetch_plan(symbol, sym_type, show_graphs=True):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            if key not in seen:
+                seen.add(key)
+                calls.append((fn, args, kwargs))
+    return calls
+
+
+def report(calls: list, now: float = None) -> dict:
+    """Coverage (share of calls cached at all) and freshness (share within
+    their fresh TTL) of the response cache for calls."""
+    now = now or time.time()
+    cached = fresh = 0
+    oldest = 0.0
+    for fn, args, kwargs in calls:
+        entry = fn.peek(*args, **kwargs)
+        if entry is None:
+            continue
+        cached += 1
+        age = now - entry.stored_at
+        oldest = max(oldest, age)
+        if age < fn.policy.fresh:
+            fresh += 1
+    total = len(calls) or 1
+    return {"calls": len(calls), "cached": cached, "fresh": fresh,
+            "coverage": cached / total, "freshness": fresh / total, "oldest_age_s": round(oldest, 1)}
+
+
+def due_calls(calls: list, ahead: float = CACHE_WARM_AHEAD, now: float = None) -> list:
+    """Calls that are missing or close to going stale, most urgent first."""
+    now = now or time.time()
+    due = []
+    for fn, args, kwargs in calls:
+        entry = fn.peek(*args, **kwargs)
+        if entry is None:
+            due.append((float("inf"), fn, args, kwargs))
+            continue
+        urgency = (now - entry.stored_at) / fn.policy.fresh
+        if urgency >= ahead:
+            due.append((urgency, fn, args, kwargs))
+    due.sort(key=lambda d: d[0], reverse=True)
+    return [(fn, args, kwargs) for _, fn, args, kwargs in due]
+
+
+last_report = {}
+
+
+def warm_once(watchlist: list, top_n: int = CACHE_WARM_EXPAND,
+              max_symbols: int = CACHE_WARM_MAX_SYMBOLS,
+              calls_per_minute: float = CACHE_WARM_CALLS_PER_MINUTE,
+              ahead: float = CACHE_WARM_AHEAD, stop: threading.Event = None) -> dict:
+    """One pass: refresh every due call, paced at calls_per_minute."""
+    global last_report
+    started = time.time()
+    spacing = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+    refreshed = failed = 0
+    with request_priority(PRIORITY_BACKGROUND):
+        calls = plan_calls(expand(watchlist, top_n, max_symbols))
+        for fn, args, kwargs in due_calls(calls, ahead):
+            if stop is not None and stop.is_set():
+                break
+            t0 = time.monotonic()
+            try:
+                fn.refresh(*args, **kwargs)
+                refreshed += 1
+            except Exception:
+                failed += 1
+            # spread the pass out instead of bursting through the quota
+            pause = spacing - (time.monotonic() - t0)
+            if pause > 0:
+                if stop is not None:
+                    stop.wait(pause)
+                else:
+                    time.sleep(pause)
+    last_report = {**report(calls), "refreshed": refreshed, "failed": failed,
+                   "duration_s": round(time.time() - started, 1), "finished_at": time.time()}
+    return last_report
+
+
+@register_collector
+def _warmer_metrics():
+    if last_report:
+        for name in ("coverage", "freshness", "oldest_age_s", "calls", "finished_at"):
+            yield f"mx_warmer_{name}", {}, last_report[name], "gauge"
+
+
+# ---------------------------------------------------------------------------
+# In-process schedule
+# ---------------------------------------------------------------------------
+_thread = None
+_thread_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def _loop(watchlist, interval):
+    while not _stop.is_set():
+        try:
+            result = warm_once(watchlist, stop=_stop)
+            log.info("cache warm pass: %s", result)
+        except Exception:
+            log.warning("cache warm pass failed", exc_info=True)
+        _stop.wait(interval)
+
+
+def start_warmer(watchlist_spec: str = CACHE_WARM_WATCHLIST, interval: float = CACHE_WARM_INTERVAL):
+    """Start the background warmer once per process (no-op without a watchlist)."""
+    global _thread
+    watchlist = parse_watchlist(watchlist_spec)
+    if not watchlist or _thread is not None:
+        return _thread
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_loop, args=(watchlist, interval),
+                                       name="cache-warmer", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Warm the response cache for a watchlist.")
+    parser.add_argument("symbols", nargs="*", help="defaults to CACHE_WARM_WATCHLIST")
+    parser.add_argument("--expand", type=int, default=CACHE_WARM_EXPAND,
+                        help="top N index constituents / ETF holdings to add per symbol")
+    parser.add_argument("--max-symbols", type=int, default=CACHE_WARM_MAX_SYMBOLS)
+    parser.add_argument("--calls-per-minute", type=float, default=CACHE_WARM_CALLS_PER_MINUTE)
+    parser.add_argument("--ahead", type=float, default=CACHE_WARM_AHEAD)
+    parser.add_argument("--loop", action="store_true", help="keep warming every --interval seconds")
+    parser.add_argument("--interval", type=float, default=CACHE_WARM_INTERVAL)
+    parser.add_argument("--report", action="store_true",
+                        help="print coverage without refreshing anything")
+    args = parser.parse_args()
+
+    watchlist = [s.upper() for s in args.symbols] or parse_watchlist(CACHE_WARM_WATCHLIST)
+    if not watchlist:
+        parser.error("no symbols given and CACHE_WARM_WATCHLIST is empty")
+
+    if args.report:
+        with request_priority(PRIORITY_BACKGROUND):
+            calls = plan_calls(expand(watchlist, args.expand, args.max_symbols))
+        print(json.dumps(report(calls), indent=2))
+        return 0
+
+    while True:
+        result = warm_once(watchlist, args.expand, args.max_symbols, args.calls_per_minute, args.ahead)
+        print(json.dumps(result), flush=True)
+        if not args.loop:
+            return 0 if not result["failed"] else 1
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from metrics import register_collector
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Per-endpoint circuit breaker for upstream calls.
+#
+# CIRCUIT_FAILURES consecutive failed calls to one endpoint open its circuit:
+# for the next CIRCUIT_COOLDOWN seconds calls fail fast with CircuitOpenError
+# and spend no quota. After that a single call is let through as a probe
+# (half-open); success closes the circuit, failure opens it again with the
+# cooldown doubled, up to CIRCUIT_MAX_COOLDOWN.
+#
+# Only errors that say the endpoint itself is unhealthy count as failures:
+# 429, 5xx, and transport errors and timeouts (connection failures, and the
+# HTTP clients' own transport exceptions). Other 4xx (403 "not entitled",
+# 404) concern one symbol and are left to the response cache's negative
+# caching; they neither trip nor close the circuit. Nor does any other
+# exception without a status, such as a bug in the wrapped fetcher's parsing,
+# which must not fail the endpoint for every user.
+# ---------------------------------------------------------------------------
+CIRCUIT_FAILURES = int(os.environ.get("CIRCUIT_FAILURES", "5"))
+CIRCUIT_COOLDOWN = float(os.environ.get("CIRCUIT_COOLDOWN", "30"))
+CIRCUIT_MAX_COOLDOWN = float(os.environ.get("CIRCUIT_MAX_COOLDOWN", "600"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _transport_errors() -> tuple:
+    errors = (ConnectionError, TimeoutError)
+    # a client library that was never imported cannot have raised
+    requests = sys.modules.get("requests.exceptions")
+    if requests is not None:
+        errors += (requests.ConnectionError, requests.Timeout, requests.ChunkedEncodingError)
+    httpx = sys.modules.get("httpx")
+    if httpx is not None:
+        errors += (httpx.TransportError,)
+    finnhub = sys.modules.get("finnhub.exceptions")
+    if finnhub is not None:
+        # a response that is not JSON at all, e.g. a proxy's error page
+        errors += (finnhub.FinnhubRequestException,)
+    return errors
+
+
+def is_upstream_fault(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, _transport_errors())
+
+
+class CircuitOpenError(Exception):
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint} circuit open; next probe in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+
+    def __init__(self, endpoint: str, failures: int = CIRCUIT_FAILURES,
+                 cooldown: float = CIRCUIT_COOLDOWN, max_cooldown: float = CIRCUIT_MAX_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.counts = Counter()
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _allow(self) -> bool:
+        """True if this call is the half-open probe; raises while open."""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            retry_in = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                self.counts["probes"] += 1
+                return True
+            self.counts["rejected"] += 1
+            raise CircuitOpenError(self.endpoint, max(retry_in, 0.0))
+
+    def _record(self, ok, probe: bool):
+        with self._lock:
+            if probe:
+                self._probing = False
+            if ok is None:                      # call never reached upstream
+                return
+            if ok:
+                if self.state != CLOSED:
+                    log.info("%s circuit closed", self.endpoint)
+                self.state, self.failures, self.cooldown = CLOSED, 0, self.base_cooldown
+                return
+            self.failures += 1
+            self.counts["failures"] += 1
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.failures < self.threshold:
+                return
+            self.state, self.opened_at = OPEN, time.monotonic()
+            self.counts["trips"] += 1
+            log.warning("%s circuit open for %.0fs after %d failures",
+                        self.endpoint, self.cooldown, self.failures)
+
+    def call(self, fn, *args, ignore: tuple = (), **kwargs):
+        """fn(*args, **kwargs) through the breaker. Exceptions in ignore (e.g.
+        a local quota-wait timeout), per-request 4xx errors and anything that
+        is not an upstream fault count as neither success nor failure."""
+        probe = self._allow()
+        try:
+            value = fn(*args, **kwargs)
+        except ignore:
+            self._record(None, probe)
+            raise
+        except Exception as e:
+            self._record(False if is_upstream_fault(e) else None, probe)
+            raise
+        except BaseException:
+            self._record(None, probe)
+            raise
+        self._record(True, probe)
+        return value
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures,
+                    "cooldown": self.cooldown, **self.counts}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
+
+
+def breaker_states() -> dict:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.endpoint: b.info() for b in breakers}
+
+
+@register_collector
+def _circuit_metrics():
+    for endpoint, info in breaker_states().items():
+        labels = {"endpoint": endpoint}
+        yield "mx_circuit_state", labels, STATE_VALUES[info["state"]], "gauge"
+        yield "mx_circuit_consecutive_failures", labels, info["consecutive_failures"], "gauge"
+        for event in ("failures", "trips", "probes", "rejected"):
+            yield "mx_circuit_events_total", {**labels, "event": event}, info.get(event, 0), "counter"
@@ -0,0 +1,55 @@
+import pandas as pd
+
+# ---------------------------------------------------------------------------
+# Columnar normalization of tabular Finnhub payloads.
+#
+# Finnhub returns tables as lists of per-row dicts, which cost roughly a dict
+# (keys included) per row in every cache tier and had to be turned into a
+# DataFrame again on every use. Fetchers declare their table fields with
+# columnar(...) and the response cache stores them as compact DataFrames
+# instead: string columns Arrow-backed, repetitive ones categorical, epoch
+# columns as datetimes, rows pre-sorted the way every view shows them.
+# SymbolData, the chart builders and st.dataframe all take these frames
+# as-is. They are shared across sessions; treat them as read-only.
+# ---------------------------------------------------------------------------
+
+# string columns with at most this share of distinct values become categorical
+CATEGORY_RATIO = 0.5
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+
+def compact_frame(records, sort: str = None, ascending: bool = False, epoch_cols=()) -> pd.DataFrame:
+    df = records.copy() if isinstance(records, pd.DataFrame) else pd.DataFrame(records or [])
+    for col in epoch_cols:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], unit="s")
+    if sort and sort in df.columns:
+        df = df.sort_values(sort, ascending=ascending, kind="stable").reset_index(drop=True)
+    for col in df.columns:
+        values = df[col]
+        # pandas 3 infers str columns already; pandas 2 (or infer_string off)
+        # leaves them object, so convert those explicitly
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == "string":
+            values = values.astype(STRING_DTYPE)
+            df[col] = values
+        if isinstance(values.dtype, pd.StringDtype) and len(values) > 1 \
+                and values.nunique() <= len(values) * CATEGORY_RATIO:
+            df[col] = values.astype("category")
+    return df
+
+
+def columnar(field: str = None, sort: str = None, ascending: bool = False, epoch_cols=()):
+    """Normalizer for @cached(..., normalize=): turns payload[field] (or the
+    payload itself when field is None) from a list of records into a frame."""
+    def normalize(payload):
+        if field is None:
+            return compact_frame(payload, sort, ascending, epoch_cols)
+        if not isinstance(payload, dict) or field not in payload:
+            return payload
+        return {**payload, field: compact_frame(payload[field], sort, ascending, epoch_cols)}
+    return normalize
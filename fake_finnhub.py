@@ -0,0 +1,414 @@
+"""Local stand-in for finnhub.Client.
+
+FakeClient has the same method names and payload shapes as the endpoints the
+app uses. Payloads are synthetic and deterministic per symbol, or replayed
+from recorded JSON fixtures, with configurable latency and error rates.
+market_data.get_client() switches to it when FINNHUB_FAKE_LATENCY is set:
+
+    FINNHUB_FAKE_LATENCY=0.2                           seconds per call
+    FINNHUB_FAKE_LATENCY=default=0.1,stock_splits=0.8  per-endpoint overrides
+    FINNHUB_FAKE_ERROR_RATE=0.05                       share of calls failing 429/5xx
+    FINNHUB_FAKE_FIXTURES=bench/fixtures               replay recorded payloads
+    FINNHUB_FAKE_FIXTURES=demo.mxb                     ... or a snapshot bundle
+    FINNHUB_FAKE_SEED=0
+
+Record fixtures from the real API (needs FINNHUB_API_KEY):
+
+    python fake_finnhub.py --out bench/fixtures AAPL:stock SPY:etf ^GSPC:index
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+
+FAKE_ETFS = {"SPY", "QQQ", "IWM", "VTI", "VOO", "DIA", "XLK", "XLF", "ARKK", "EEM"}
+FAKE_STOCKS = [
+    "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "AVGO", "JPM", "V",
+    "XOM", "UNH", "LLY", "JNJ", "WMT", "PG", "MA", "HD", "COST", "ORCL",
+]
+FAKE_SECTORS = ["Technology", "Financials", "Health Care", "Consumer Discretionary",
+                "Industrials", "Communication Services", "Energy", "Utilities"]
+FAKE_COUNTRIES = ["United States", "Japan", "United Kingdom", "Canada", "Germany", "France"]
+
+
+class FakeAPIError(Exception):
+    """Mirrors finnhub.FinnhubAPIException closely enough for retry logic."""
+
+    def __init__(self, status_code: int, endpoint: str):
+        super().__init__(f"FakeAPIError(status_code: {status_code}) on {endpoint}")
+        self.status_code = status_code
+
+
+def parse_latency(spec: str):
+    """"0.2" -> 0.2; "default=0.1,stock_splits=0.8" -> {"default": 0.1, ...}."""
+    if "=" not in spec:
+        return float(spec or 0)
+    out = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        out[name.strip()] = float(value)
+    return out
+
+
+def call_subject(args, kwargs) -> str:
+    # symbol for every endpoint the app uses, exchange for stock_symbols
+    subject = kwargs.get("symbol") or kwargs.get("exchange") or (args[0] if args else "")
+    return str(subject)
+
+
+def fixture_path(root: str, endpoint: str, subject: str) -> str:
+    return os.path.join(root, endpoint, subject.replace("/", "_") + ".json")
+
+
+def _in_window(records: list, date_field: str, _from: str = None, to: str = None) -> list:
+    # honor the _from/to window like the real endpoints; epoch fields compare as dates
+    def day(value):
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value).strftime("%Y-%m-%d")
+        return value
+    return [rec for rec in records
+            if (not _from or day(rec[date_field]) >= _from) and (not to or day(rec[date_field]) <= to)]
+
+
+def _endpoint(method):
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        subject = call_subject(args, kwargs)
+        self._before(name)
+        fixture = self._fixture(name, subject)
+        if fixture is not None:
+            return fixture
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+class FakeClient:
+
+    def __init__(self, latency=0.2, error_rate: float = 0.0, fixtures: str = None, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fixtures = fixtures
+        self.calls = Counter()
+        self.errors = Counter()
+        self._errors_rng = random.Random(seed)
+        self._fixture_cache = {}
+        self._bundle = None
+        if fixtures and os.path.isfile(fixtures):
+            from snapshot_bundle import SnapshotBundle
+            self._bundle = SnapshotBundle(fixtures)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=parse_latency(os.environ.get("FINNHUB_FAKE_LATENCY", "0")),
+            error_rate=float(os.environ.get("FINNHUB_FAKE_ERROR_RATE", "0")),
+            fixtures=os.environ.get("FINNHUB_FAKE_FIXTURES") or None,
+            seed=int(os.environ.get("FINNHUB_FAKE_SEED", "0")),
+        )
+
+    # -- plumbing ------------------------------------------------------------
+    def _before(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] += 1
+            fail = self.error_rate and self._errors_rng.random() < self.error_rate
+            status = self._errors_rng.choice([429, 500, 502, 503]) if fail else None
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(endpoint, latency.get("default", 0))
+        if latency:
+            time.sleep(latency)
+        if status:
+            with self._lock:
+                self.errors[status] += 1
+            raise FakeAPIError(status, endpoint)
+
+    def _fixture(self, endpoint: str, subject: str):
+        if not self.fixtures:
+            return None
+        if self._bundle is not None:
+            return self._bundle.payload(endpoint, subject)
+        path = fixture_path(self.fixtures, endpoint, subject)
+        if path not in self._fixture_cache:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._fixture_cache[path] = json.load(f)
+            except FileNotFoundError:
+                self._fixture_cache[path] = None
+        return self._fixture_cache[path]
+
+    @staticmethod
+    def _rng(endpoint: str, symbol: str) -> random.Random:
+        return random.Random(zlib.crc32(f"{endpoint}:{symbol}".encode()))
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+
+    @staticmethod
+    def _quarters(n: int):
+        today = datetime.now()
+        year, q = today.year, (today.month - 1) // 3 + 1
+        out = []
+        for _ in range(n):
+            q -= 1
+            if q == 0:
+                year, q = year - 1, 4
+            out.append((year, q, f"{year}-{q * 3:02d}-{28 if q == 1 else 30}"))
+        return out
+
+    # -- stock endpoints -----------------------------------------------------
+    @_endpoint
+    def company_basic_financials(self, symbol, metric):
+        r = self._rng("company_basic_financials", symbol)
+        return {
+            "symbol": symbol,
+            "metricType": metric,
+            "metric": {
+                "52WeekHigh": round(r.uniform(100, 500), 2),
+                "52WeekLow": round(r.uniform(20, 100), 2),
+                "beta": round(r.uniform(0.5, 2.0), 3),
+                "peTTM": round(r.uniform(8, 60), 2),
+                "pbAnnual": round(r.uniform(1, 30), 2),
+                "currentDividendYieldTTM": round(r.uniform(0, 4), 2),
+                "roeTTM": round(r.uniform(-5, 60), 2),
+                "epsTTM": round(r.uniform(-1, 15), 2),
+                "marketCapitalization": round(r.uniform(1e3, 3e6), 1),
+                "revenuePerShareTTM": round(r.uniform(5, 150), 2),
+                "netIncomePerShareTTM": round(r.uniform(-1, 20), 2),
+                "operatingMarginTTM": round(r.uniform(-10, 45), 2),
+                "grossMarginTTM": round(r.uniform(10, 80), 2),
+                "debtEquityTTM": round(r.uniform(0, 3), 2),
+                "currentRatioQuarterly": round(r.uniform(0.5, 4), 2),
+                "quickRatioQuarterly": round(r.uniform(0.3, 3), 2),
+                "10DayAverageTradingVolume": round(r.uniform(1, 100), 3),
+                "3MonthAverageTradingVolume": round(r.uniform(1, 100), 3),
+            },
+            "series": {},
+        }
+
+    @_endpoint
+    def recommendation_trends(self, symbol):
+        r = self._rng("recommendation_trends", symbol)
+        today = datetime.now().replace(day=1)
+        out = []
+        for i in range(4):
+            month = (today.month - i - 1) % 12 + 1
+            year = today.year - (1 if today.month - i <= 0 else 0)
+            out.append({
+                "symbol": symbol, "period": f"{year}-{month:02d}-01",
+                "strongBuy": r.randint(0, 25), "buy": r.randint(0, 25), "hold": r.randint(0, 15),
+                "sell": r.randint(0, 5), "strongSell": r.randint(0, 3),
+            })
+        return out
+
+    @_endpoint
+    def price_target(self, symbol):
+        r = self._rng("price_target", symbol)
+        mean = r.uniform(50, 400)
+        return {
+            "symbol": symbol, "lastUpdated": datetime.now().strftime("%Y-%m-%d 00:00:00"),
+            "targetHigh": round(mean * 1.3, 2), "targetLow": round(mean * 0.7, 2),
+            "targetMean": round(mean, 2), "targetMedian": round(mean * 1.01, 2),
+            "numberAnalysts": r.randint(5, 50),
+        }
+
+    @_endpoint
+    def company_earnings(self, symbol, limit=None):
+        r = self._rng("company_earnings", symbol)
+        out = []
+        for year, q, period in self._quarters(limit or 4):
+            est = round(r.uniform(0.2, 3), 4)
+            act = round(est * r.uniform(0.85, 1.2), 4)
+            out.append({
+                "symbol": symbol, "period": period, "year": year, "quarter": q,
+                "estimate": est, "actual": act, "surprise": round(act - est, 4),
+                "surprisePercent": round((act - est) / est * 100, 4),
+            })
+        return out
+
+    @_endpoint
+    def earnings_calendar(self, _from, to, symbol, international=False):
+        r = self._rng("earnings_calendar", symbol)
+        return {"earningsCalendar": [{
+            "symbol": symbol, "date": to, "hour": "amc", "year": datetime.now().year,
+            "quarter": 1, "epsEstimate": round(r.uniform(0.2, 3), 4), "epsActual": None,
+            "revenueEstimate": round(r.uniform(1e9, 1e11)), "revenueActual": None,
+        }]}
+
+    @_endpoint
+    def stock_splits(self, symbol, _from=None, to=None):
+        r = self._rng("stock_splits", symbol)
+        return _in_window([{"symbol": symbol, "date": f"{y}-06-{r.randint(1, 28):02d}",
+                            "fromFactor": 1, "toFactor": r.choice([2, 3, 4])}
+                           for y in sorted(r.sample(range(2000, datetime.now().year), 2))],
+                          "date", _from, to)
+
+    @_endpoint
+    def stock_basic_dividends(self, symbol):
+        r = self._rng("stock_basic_dividends", symbol)
+        amount = round(r.uniform(0.05, 1.5), 4)
+        return {"symbol": symbol, "data": [
+            {"symbol": symbol, "exDate": period, "amount": amount, "adjustedAmount": amount,
+             "payDate": period, "recordDate": period, "declarationDate": period, "currency": "USD"}
+            for _, _, period in self._quarters(8)
+        ]}
+
+    @_endpoint
+    def upgrade_downgrade(self, symbol=None, _from=None, to=None):
+        r = self._rng("upgrade_downgrade", symbol)
+        now = int(time.time()) // 86400 * 86400   # stable within a day, like real grade times
+        grades = ["Buy", "Overweight", "Neutral", "Underweight", "Sell"]
+        return _in_window([{
+            "symbol": symbol, "gradeTime": now - r.randint(0, 730) * 86400,
+            "company": r.choice(["Goldman Sachs", "Morgan Stanley", "JPMorgan", "Barclays"]),
+            "fromGrade": r.choice(grades), "toGrade": r.choice(grades),
+            "action": r.choice(["up", "down", "main", "init"]),
+        } for _ in range(12)], "gradeTime", _from, to)
+
+    @_endpoint
+    def company_revenue_estimates(self, symbol, freq=None):
+        r = self._rng("company_revenue_estimates", symbol)
+        base = r.uniform(1e9, 1e11)
+        return {"symbol": symbol, "freq": freq, "data": [{
+            "period": period, "year": year, "quarter": q,
+            "revenueAvg": round(base * r.uniform(0.9, 1.1)),
+            "revenueHigh": round(base * 1.15), "revenueLow": round(base * 0.85),
+            "numberAnalysts": r.randint(3, 40),
+        } for year, q, period in self._quarters(8)]}
+
+    @_endpoint
+    def company_eps_estimates(self, symbol, freq=None):
+        r = self._rng("company_eps_estimates", symbol)
+        base = r.uniform(0.2, 3)
+        return {"symbol": symbol, "freq": freq, "data": [{
+            "period": period, "year": year, "quarter": q,
+            "epsAvg": round(base * r.uniform(0.9, 1.1), 4),
+            "epsHigh": round(base * 1.15, 4), "epsLow": round(base * 0.85, 4),
+            "numberAnalysts": r.randint(3, 40),
+        } for year, q, period in self._quarters(8)]}
+
+    # -- etf endpoints -------------------------------------------------------
+    @_endpoint
+    def etfs_profile(self, symbol=None, isin=None):
+        r = self._rng("etfs_profile", symbol)
+        if symbol not in FAKE_ETFS:
+            return {"profile": {}, "symbol": symbol}
+        return {"symbol": symbol, "profile": {
+            "name": f"{symbol} Fake Index Trust", "assetClass": "Equity",
+            "expenseRatio": round(r.uniform(0.03, 0.9), 4),
+            "aum": round(r.uniform(1e8, 5e11)), "nav": round(r.uniform(20, 600), 2),
+            "inceptionDate": "1993-01-22", "description": f"Synthetic profile for {symbol}.",
+        }}
+
+    @_endpoint
+    def etfs_holdings(self, symbol=None, isin=None, skip=None, date=None):
+        r = self._rng("etfs_holdings", symbol)
+        weights = [r.uniform(0.1, 8) for _ in FAKE_STOCKS]
+        total = sum(weights)
+        return {"symbol": symbol, "atDate": datetime.now().strftime("%Y-%m-%d"),
+                "numberOfHoldings": len(FAKE_STOCKS), "holdings": [{
+                    "symbol": s, "name": f"{s} Inc", "isin": f"US{zlib.crc32(s.encode()):010d}",
+                    "cusip": "", "share": round(w * 1e6), "percent": round(w / total * 100, 4),
+                    "value": round(w * 1e8),
+                } for s, w in zip(FAKE_STOCKS, weights)]}
+
+    @_endpoint
+    def etfs_sector_exp(self, symbol=None, isin=None):
+        r = self._rng("etfs_sector_exp", symbol)
+        weights = [r.uniform(1, 30) for _ in FAKE_SECTORS]
+        total = sum(weights)
+        return {"symbol": symbol, "sectorExposure": [
+            {"industry": s, "exposure": round(w / total * 100, 3)} for s, w in zip(FAKE_SECTORS, weights)
+        ]}
+
+    @_endpoint
+    def etfs_country_exp(self, symbol=None, isin=None):
+        r = self._rng("etfs_country_exp", symbol)
+        weights = [r.uniform(1, 30) for _ in FAKE_COUNTRIES]
+        total = sum(weights)
+        return {"symbol": symbol, "countryExposure": [
+            {"country": c, "exposure": round(w / total * 100, 3)} for c, w in zip(FAKE_COUNTRIES, weights)
+        ]}
+
+    # -- reference data ------------------------------------------------------
+    @_endpoint
+    def stock_symbols(self, exchange, mic=None, security_type=None, currency=None):
+        return [{"symbol": s, "displaySymbol": s, "description": f"{s} INC", "type": "Common Stock",
+                 "currency": "USD", "mic": "XNAS"} for s in FAKE_STOCKS] + \
+               [{"symbol": s, "displaySymbol": s, "description": f"{s} FAKE INDEX TRUST", "type": "ETP",
+                 "currency": "USD", "mic": "ARCX"} for s in sorted(FAKE_ETFS)]
+
+    # -- index endpoints -----------------------------------------------------
+    @_endpoint
+    def indices_const(self, **params):
+        symbol = params.get("symbol", "")
+        r = self._rng("indices_const", symbol)
+        weights = [r.uniform(0.1, 8) for _ in FAKE_STOCKS]
+        total = sum(weights)
+        return {"symbol": symbol, "constituents": list(FAKE_STOCKS), "constituentsBreakdown": [{
+            "symbol": s, "name": f"{s} Inc", "isin": f"US{zlib.crc32(s.encode()):010d}", "cusip": "",
+            "shareClassFIGI": "", "weight": round(w / total * 100, 4),
+        } for s, w in zip(FAKE_STOCKS, weights)]}
+
+
+# ---------------------------------------------------------------------------
+# Fixture recording
+# ---------------------------------------------------------------------------
+class RecordingClient:
+    """Wraps a real client and writes every response to <root>/<endpoint>/<symbol>.json."""
+
+    def __init__(self, client, root: str):
+        self.client = client
+        self.root = root
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def recorded(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            path = fixture_path(self.root, name, call_subject(args, kwargs))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=1, sort_keys=True)
+            return result
+        return recorded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Record Finnhub fixtures for FakeClient.")
+    parser.add_argument("symbols", nargs="+", help="SYMBOL:type, type in stock/etf/index")
+    parser.add_argument("--out", default=os.path.join("bench", "fixtures"))
+    args = parser.parse_args()
+
+    os.environ["FINNHUB_RECORD_FIXTURES"] = args.out
+    os.environ.pop("FINNHUB_FAKE_LATENCY", None)
+    os.environ.setdefault("RESPONSE_CACHE", "memory")
+    import market_data as md
+
+    for item in args.symbols:
+        symbol, _, sym_type = item.partition(":")
+        results = md.prefetch(md.page_fetch_plan(symbol, sym_type or "stock"))
+        failed = [key[0] for key, value in results.items() if isinstance(value, Exception)]
+        print(f"{symbol}: {len(results) - len(failed)} recorded" + (f", failed: {' '.join(failed)}" if failed else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
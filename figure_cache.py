@@ -0,0 +1,98 @@
+import functools
+import os
+import threading
+from collections import OrderedDict, Counter
+
+from metrics import span
+
+# ---------------------------------------------------------------------------
+# Rendered-figure cache for the top-panel chart builders.
+#
+# Figures are keyed by (builder, symbol, data fingerprint, extra args), where
+# the fingerprint is the stored_at stamp of every payload the builder reads
+# (SymbolData.fingerprint). A rerun with unchanged data — the "Hide Charts"
+# toggle, any widget interaction, another session on the same symbol — gets
+# the finished figure back without touching pandas or Plotly. Cached figures
+# are shared across sessions and must not be mutated by callers.
+# ---------------------------------------------------------------------------
+FIGURE_CACHE_ENTRIES = int(os.environ.get("FIGURE_CACHE_ENTRIES", "256"))
+
+# Every figure's JSON carries its whole template; plotly_dark alone is ~7 KB
+# against a few hundred bytes of chart data. CHART_TEMPLATE=lean (default)
+# builds the charts on a copy holding only the layout keys and trace types
+# the top panel draws with; CHART_TEMPLATE=full ships the stock template.
+CHART_TEMPLATE = os.environ.get("CHART_TEMPLATE", "lean")
+LEAN_LAYOUT_KEYS = ("autotypenumbers", "coloraxis", "colorscale", "colorway", "font", "hoverlabel",
+                    "hovermode", "paper_bgcolor", "plot_bgcolor", "title", "xaxis", "yaxis")
+LEAN_TRACE_TYPES = ("bar", "heatmap", "pie", "scatter")
+
+_MISSING = object()
+
+
+class FigureCache:
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key):
+        with self._lock:
+            fig = self._data.get(key, _MISSING)
+            if fig is _MISSING:
+                self.stats["misses"] += 1
+            else:
+                self._data.move_to_end(key)
+                self.stats["hits"] += 1
+            return fig
+
+    def put(self, key, fig):
+        with self._lock:
+            self._data[key] = fig
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(*attrs):
+    """Cache a builder(data, *args) whose output depends only on data.<attrs>."""
+    def decorator(builder):
+        @functools.wraps(builder)
+        def wrapper(data, *args, **kwargs):
+            key = (builder.__name__, data.symbol, data.fingerprint(*attrs),
+                   args, tuple(sorted(kwargs.items())))
+            with span("chart", builder.__name__, "hit") as s:
+                fig = figure_cache.get(key)
+                if fig is _MISSING:
+                    s.outcome = "miss"
+                    fig = builder(data, *args, **kwargs)
+                    figure_cache.put(key, fig)
+            return fig
+        wrapper.attrs = attrs
+        return wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def chart_template(name: str):
+    """The template chart builders pass to Plotly: `name` itself, or its lean
+    copy (see CHART_TEMPLATE), built once per process."""
+    if CHART_TEMPLATE == "full":
+        return name
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    source = pio.templates[name]
+    return go.layout.Template(
+        layout={k: source.layout[k] for k in LEAN_LAYOUT_KEYS},
+        data={k: source.data[k] for k in LEAN_TRACE_TYPES},
+    )
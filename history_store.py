@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from metrics import register_collector
+from response_cache import get_cache
+
+# ---------------------------------------------------------------------------
+# Incremental history for the date-windowed endpoints (stock_splits,
+# upgrade_downgrade, earnings_calendar).
+#
+# Per (endpoint, symbol) we keep the records seen so far and the day they
+# were last synced, in the shared tier of the response cache. A refresh only
+# asks upstream for [last sync - HISTORY_OVERLAP_DAYS, window end]; records
+# in that range are replaced by the fresh response (so moved or withdrawn
+# entries disappear), older ones are kept, duplicates are dropped on the
+# endpoint's key columns and anything before the rolling window start is
+# trimmed. Every HISTORY_FULL_RESYNC_DAYS the whole window is fetched again
+# to pick up corrections to old records.
+# ---------------------------------------------------------------------------
+HISTORY_OVERLAP_DAYS = int(os.environ.get("HISTORY_OVERLAP_DAYS", "7"))
+HISTORY_FULL_RESYNC_DAYS = int(os.environ.get("HISTORY_FULL_RESYNC_DAYS", "30"))
+HISTORY_TTL = 90 * 86400
+
+stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(kind: str, endpoint: str, n: int = 1):
+    with _stats_lock:
+        stats[(kind, endpoint)] += n
+
+
+@register_collector
+def _history_metrics():
+    with _stats_lock:
+        items = list(stats.items())
+    for (kind, endpoint), value in items:
+        yield f"mx_history_{kind}_total", {"endpoint": endpoint}, value, "counter"
+
+
+def _day(value) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def _dates(df: pd.DataFrame, col: str) -> pd.Series:
+    values = df[col]
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.to_datetime(values, unit="s")
+    return pd.to_datetime(values, errors="coerce")
+
+
+def _store_backend():
+    cache = get_cache()
+    return getattr(cache, "shared", None) or cache
+
+
+def sync(endpoint: str, symbol: str, fetch, start: date, end: date, date_col: str,
+         key_cols: tuple) -> pd.DataFrame:
+    """Records of endpoint for symbol within [start, end], fetching only what
+    is new since the last sync. fetch(_from, to) returns upstream's records."""
+    backend = _store_backend()
+    key = f"hist:{endpoint}:{symbol}"
+    today = datetime.now().date()
+    entry = backend.get(key)
+    state = entry.value if entry is not None else None
+
+    full = (state is None
+            or state.get("full_sync") is None
+            or (today - state["full_sync"]).days >= HISTORY_FULL_RESYNC_DAYS
+            or state.get("start", start) > start)
+    window_from = start if full else max(start, state["synced"] - timedelta(days=HISTORY_OVERLAP_DAYS))
+
+    fresh = pd.DataFrame(fetch(_day(window_from), _day(end)) or [])
+    _count("full_syncs" if full else "delta_syncs", endpoint)
+    _count("rows_fetched", endpoint, len(fresh))
+
+    if full or state["records"].empty:
+        merged = fresh
+    else:
+        old = state["records"]
+        kept = old[_dates(old, date_col) < pd.Timestamp(window_from)] if date_col in old.columns else old
+        merged = pd.concat([kept, fresh], ignore_index=True)
+    if not merged.empty:
+        cols = [c for c in key_cols if c in merged.columns]
+        if cols:
+            merged = merged.drop_duplicates(subset=cols, keep="last")
+        if date_col in merged.columns:
+            merged = merged[_dates(merged, date_col) >= pd.Timestamp(start)]
+        merged = merged.reset_index(drop=True)
+
+    backend.set(key, {
+        "records": merged, "synced": today, "start": start,
+        "full_sync": today if full else state["full_sync"], "updated_at": time.time(),
+    }, HISTORY_TTL, endpoint)
+    return merged
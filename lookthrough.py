@@ -0,0 +1,187 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from symbol_data import CompareData, SymbolData
+
+# ---------------------------------------------------------------------------
+# ETF look-through.
+#
+# A portfolio of ETFs ("SPY:60 QQQ:40") is broken down into net exposure per
+# underlying stock, sector and country. Every ETF becomes one exposure vector
+# per kind (fractions indexed by stock / sector / country); the vectors of a
+# set of ETFs are outer-joined once into an items × ETFs matrix, and net
+# exposure is that matrix times the weight vector.
+#
+# Vectors and matrices are cached by the stored_at stamps of the payloads
+# they came from, so changing a weight only redoes the matrix product, and
+# adding an ETF only builds that ETF's vectors before the join.
+# ---------------------------------------------------------------------------
+LOOKTHROUGH_CACHE_ENTRIES = int(os.environ.get("LOOKTHROUGH_CACHE_ENTRIES", "256"))
+
+# kind -> (SymbolData attr, key column, weight column in percent)
+KINDS = {
+    "holdings": ("etf_holdings", "symbol", "percent"),
+    "sectors": ("etf_sectors", "industry", "exposure"),
+    "countries": ("etf_countries", "country", "exposure"),
+}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _memo(key, build):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    value = build()
+    with _cache_lock:
+        _cache[key] = value
+        while len(_cache) > LOOKTHROUGH_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return value
+
+
+def parse_portfolio(text: str):
+    """{"SPY": 60.0, "QQQ": 40.0} for "SPY:60 QQQ:40", or None when the text
+    has no weights. A bare symbol in a weighted list counts as weight 1."""
+    tokens = text.replace(",", " ").split()
+    if not any(":" in t for t in tokens):
+        return None
+    weights = {}
+    for token in tokens:
+        symbol, _, raw = token.partition(":")
+        try:
+            weight = float(raw) if raw else 1.0
+        except ValueError:
+            weight = 1.0
+        if symbol:
+            weights[symbol.upper()] = weights.get(symbol.upper(), 0.0) + max(weight, 0.0)
+    return weights
+
+
+def format_portfolio(weights: dict) -> str:
+    return " ".join(f"{s}:{w:g}" for s, w in weights.items())
+
+
+# ---------------------------------------------------------------------------
+# Vectors and matrices
+# ---------------------------------------------------------------------------
+def _stamp(etf: str, attr: str):
+    # an ETF whose payload cannot be fetched contributes nothing
+    try:
+        return SymbolData(etf).fingerprint(attr)
+    except Exception:
+        return None
+
+
+def etf_vector(etf: str, kind: str) -> pd.Series:
+    """Exposure of one ETF as fractions, indexed by stock / sector / country."""
+    attr, key_col, weight_col = KINDS[kind]
+    data = SymbolData(etf)
+
+    def build():
+        try:
+            df = getattr(data, attr)
+        except Exception:
+            df = pd.DataFrame()
+        if df.empty or key_col not in df.columns or weight_col not in df.columns:
+            return pd.Series(dtype="float64", name=etf)
+        keys = df[key_col].astype("str").fillna("").str.strip()
+        if kind == "holdings" and "name" in df.columns:
+            # holdings without a ticker (cash, futures…) are kept under their name
+            keys = keys.where(keys != "", df["name"].astype("str"))
+        weights = pd.Series(df[weight_col].to_numpy(dtype="float64") / 100.0, index=keys.to_numpy())
+        return weights.groupby(level=0).sum().rename(etf)
+
+    return _memo(("vector", kind, etf, _stamp(etf, attr)), build)
+
+
+def exposure_matrix(etfs: list, kind: str) -> pd.DataFrame:
+    """items × ETFs matrix of fractional exposure (outer join, missing = 0)."""
+    attr = KINDS[kind][0]
+    stamps = tuple(_stamp(etf, attr) for etf in etfs)
+
+    def build():
+        vectors = [etf_vector(etf, kind) for etf in etfs]
+        matrix = pd.concat(vectors, axis=1, join="outer").fillna(0.0)
+        matrix.columns = list(etfs)
+        return matrix
+
+    return _memo(("matrix", kind, tuple(etfs), stamps), build)
+
+
+def holding_names(etfs: list) -> pd.Series:
+    """Stock name by symbol across the holdings of etfs."""
+    stamps = tuple(_stamp(etf, "etf_holdings") for etf in etfs)
+
+    def build():
+        names = []
+        for etf in etfs:
+            try:
+                df = SymbolData(etf).etf_holdings
+            except Exception:
+                continue
+            if "symbol" in df.columns and "name" in df.columns:
+                names.append(pd.Series(df["name"].astype("str").to_numpy(),
+                                       index=df["symbol"].astype("str").to_numpy()))
+        if not names:
+            return pd.Series(dtype="str")
+        merged = pd.concat(names)
+        return merged[~merged.index.duplicated()]
+
+    return _memo(("names", tuple(etfs), stamps), build)
+
+
+# ---------------------------------------------------------------------------
+# Portfolio views
+# ---------------------------------------------------------------------------
+def normalized_weights(weights: dict) -> pd.Series:
+    w = pd.Series(weights, dtype="float64")
+    total = w.sum()
+    return w / total if total > 0 else w
+
+
+def net_exposure(weights: dict, kind: str) -> pd.DataFrame:
+    """Net exposure (%) per item plus each ETF's contribution, largest first."""
+    w = normalized_weights(weights)
+    matrix = exposure_matrix(list(w.index), kind)
+    contrib = matrix * w.to_numpy()
+    out = pd.DataFrame({"exposure": contrib.sum(axis=1) * 100.0})
+    for etf in w.index:
+        out[etf] = contrib[etf] * 100.0
+    out.index.name = KINDS[kind][1]
+    return out.sort_values("exposure", ascending=False).reset_index()
+
+
+def stock_exposure(weights: dict) -> pd.DataFrame:
+    out = net_exposure(weights, "holdings")
+    names = holding_names(list(weights))
+    out.insert(1, "name", out["symbol"].map(names).fillna(""))
+    return out
+
+
+def overlap(etfs: list) -> pd.DataFrame:
+    """Pairwise holdings overlap (%): sum over stocks of the smaller weight."""
+    matrix = exposure_matrix(list(etfs), "holdings").to_numpy()
+    pairwise = np.minimum(matrix[:, :, None], matrix[:, None, :]).sum(axis=0) * 100.0
+    return pd.DataFrame(pairwise, index=list(etfs), columns=list(etfs))
+
+
+def coverage(etfs: list) -> pd.Series:
+    """Share (%) of each ETF that its reported holdings account for."""
+    return exposure_matrix(list(etfs), "holdings").sum(axis=0) * 100.0
+
+
+class PortfolioData(CompareData):
+    """CompareData over the portfolio's ETFs, carrying the weights; symbol is
+    the canonical "SPY:60 QQQ:40" text so cached figures follow the weights."""
+
+    def __init__(self, weights: dict):
+        super().__init__(list(weights))
+        self.weights = dict(weights)
+        self.symbol = format_portfolio(self.weights)
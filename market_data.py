@@ -0,0 +1,386 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+import finnhub
+import streamlit as st
+
+from circuit_breaker import is_upstream_fault
+from columnar import columnar
+from history_store import sync as sync_history
+from metrics import register_collector, timed
+from rate_limit import (
+    PRIORITY_DETECT, PRIORITY_MIDDLE_PANEL, PRIORITY_TOP_PANEL, RequestScheduler,
+    ScheduledClient, request_priority,
+)
+from response_cache import cached
+from symbol_index import get_symbol_index
+
+# ---------------------------------------------------------------------------
+# Finnhub client
+# ---------------------------------------------------------------------------
+FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY", "")
+
+# FINNHUB_FAKE_LATENCY swaps in the local fake client (see fake_finnhub.py)
+# so the page can be driven without network access; FINNHUB_RECORD_FIXTURES
+# writes every real response out as a fixture for it.
+FINNHUB_FAKE_LATENCY = os.environ.get("FINNHUB_FAKE_LATENCY", "")
+FINNHUB_RECORD_FIXTURES = os.environ.get("FINNHUB_RECORD_FIXTURES", "")
+
+# FINNHUB_BUNDLE serves every call from an offline snapshot bundle (see
+# snapshot_bundle.py) instead of the API, for demo and disaster-recovery
+# instances. Those reads are local, so they are not paced to the plan quota.
+FINNHUB_BUNDLE = os.environ.get("FINNHUB_BUNDLE", "")
+
+# FINNHUB_TRANSPORT=httpx sends requests through the pooled async transport
+# (async_transport.py) instead of finnhub's requests session;
+# FINNHUB_BASE_URL points either one at another server, e.g. the local stub
+# in bench/stub_finnhub.py.
+FINNHUB_TRANSPORT = os.environ.get("FINNHUB_TRANSPORT", "requests")
+FINNHUB_BASE_URL = os.environ.get("FINNHUB_BASE_URL", "")
+
+# Plan quota. One scheduler per process is shared by every session: at most
+# FINNHUB_CALLS_PER_MINUTE calls in any 60 seconds, and at most FINNHUB_BURST
+# in any one second (Finnhub's 30 calls/second ceiling).
+FINNHUB_CALLS_PER_MINUTE = float(os.environ.get("FINNHUB_CALLS_PER_MINUTE", "60"))
+FINNHUB_BURST = float(os.environ.get("FINNHUB_BURST", "30"))
+
+
+@st.cache_resource
+def get_client():
+    if FINNHUB_BUNDLE:
+        from snapshot_bundle import BundleClient
+        # local reads: limits far above anything a page can issue
+        return ScheduledClient(BundleClient(FINNHUB_BUNDLE),
+                               RequestScheduler(calls_per_minute=60e6, burst=1e6))
+    if FINNHUB_FAKE_LATENCY:
+        from fake_finnhub import FakeClient
+        client = FakeClient.from_env()
+    else:
+        if FINNHUB_TRANSPORT == "httpx":
+            from async_transport import AsyncTransportClient
+            client = AsyncTransportClient(FINNHUB_API_KEY, base_url=FINNHUB_BASE_URL or None)
+        elif FINNHUB_TRANSPORT == "requests":
+            client = finnhub.Client(api_key=FINNHUB_API_KEY)
+            if FINNHUB_BASE_URL:
+                client.API_URL = FINNHUB_BASE_URL
+        else:
+            raise ValueError(f"Unknown FINNHUB_TRANSPORT: {FINNHUB_TRANSPORT!r}")
+        if FINNHUB_RECORD_FIXTURES:
+            from fake_finnhub import RecordingClient
+            client = RecordingClient(client, FINNHUB_RECORD_FIXTURES)
+    scheduler = RequestScheduler(calls_per_minute=FINNHUB_CALLS_PER_MINUTE, burst=FINNHUB_BURST)
+    return ScheduledClient(client, scheduler)
+
+fc = get_client()
+
+# ---------------------------------------------------------------------------
+# Data-fetching helpers (from FH_Check_0_Uthsara.ipynb)
+#
+# @cached keys each call by (endpoint, bound arguments) in the response cache
+# (see response_cache.py): an in-process LRU over a store shared by every
+# replica on the host, so warm replicas and restarts skip the upstream call.
+# Freshness and max staleness per endpoint come from TTL_POLICIES there;
+# stale entries are served at once while a background refresh runs.
+# Tabular payloads are normalized into sorted, compact DataFrames before they
+# are cached (see columnar.py), newest/largest rows first.
+# ---------------------------------------------------------------------------
+
+@cached("company_basic_financials")
+def fetch_basic_financials(symbol: str):
+    return fc.company_basic_financials(symbol, "all")
+
+@cached("recommendation_trends", columnar(sort="period"))
+def fetch_recommendation_trends(symbol: str):
+    return fc.recommendation_trends(symbol)
+
+@cached("price_target")
+def fetch_price_target(symbol: str):
+    return fc.price_target(symbol)
+
+# Deepest earnings history any view shows; every caller shares this one entry.
+EARNINGS_LIMIT = 40
+
+@cached("company_earnings", columnar(sort="period"))
+def fetch_company_earnings(symbol: str, limit: int = EARNINGS_LIMIT):
+    return fc.company_earnings(symbol, limit=limit)
+
+# The three date-windowed endpoints below go through history_store: a refresh
+# only asks upstream for the days since the last sync and merges them in.
+
+@cached("earnings_calendar", columnar("earningsCalendar", sort="date"))
+def fetch_earnings_calendar(symbol: str):
+    today = datetime.now().date()
+    records = sync_history(
+        "earnings_calendar", symbol,
+        lambda _from, to: (fc.earnings_calendar(_from=_from, to=to, symbol=symbol) or {}).get("earningsCalendar"),
+        start=today - timedelta(days=365), end=today + timedelta(days=180),
+        date_col="date", key_cols=("symbol", "year", "quarter"),
+    )
+    return {"earningsCalendar": records}
+
+@cached("stock_splits", columnar(sort="date"))
+def fetch_stock_splits(symbol: str):
+    return sync_history(
+        "stock_splits", symbol,
+        lambda _from, to: fc.stock_splits(symbol, _from=_from, to=to),
+        start=date(2000, 1, 1), end=datetime.now().date(),
+        date_col="date", key_cols=("symbol", "date"),
+    )
+
+@cached("stock_basic_dividends", columnar("data", sort="exDate"))
+def fetch_basic_dividends(symbol: str):
+    return fc.stock_basic_dividends(symbol)
+
+@cached("upgrade_downgrade", columnar(sort="gradeTime", epoch_cols=("gradeTime",)))
+def fetch_upgrade_downgrade(symbol: str):
+    today = datetime.now().date()
+    return sync_history(
+        "upgrade_downgrade", symbol,
+        lambda _from, to: fc.upgrade_downgrade(symbol=symbol, _from=_from, to=to),
+        start=today - timedelta(days=730), end=today,
+        date_col="gradeTime", key_cols=("symbol", "gradeTime", "company", "action", "toGrade"),
+    )
+
+@cached("company_revenue_estimates", columnar("data", sort="period"))
+def fetch_revenue_estimates(symbol: str, freq: str = "quarterly"):
+    return fc.company_revenue_estimates(symbol, freq=freq)
+
+@cached("company_eps_estimates", columnar("data", sort="period"))
+def fetch_eps_estimates(symbol: str, freq: str = "quarterly"):
+    return fc.company_eps_estimates(symbol, freq=freq)
+
+@cached("etfs_profile")
+def fetch_etf_profile(symbol: str):
+    return fc.etfs_profile(symbol=symbol)
+
+@cached("etfs_holdings", columnar("holdings", sort="percent"))
+def _fetch_etf_holdings(symbol: str):
+    return fc.etfs_holdings(symbol=symbol)
+
+def fetch_etf_holdings(symbol: str, top_n: int = None):
+    """Holdings, largest first; top_n keeps only the largest. Every top_n is a
+    slice of the same cached call, so .entry/.peek/.refresh take just symbol."""
+    res = _fetch_etf_holdings(symbol)
+    if top_n is None or not isinstance(res, dict) or res.get("holdings") is None:
+        return res
+    return {**res, "holdings": res["holdings"].head(top_n)}
+
+for _attr in ("entry", "peek", "refresh", "endpoint", "policy"):
+    setattr(fetch_etf_holdings, _attr, getattr(_fetch_etf_holdings, _attr))
+
+@cached("etfs_sector_exp", columnar("sectorExposure", sort="exposure"))
+def fetch_etf_sector_exposure(symbol: str):
+    return fc.etfs_sector_exp(symbol=symbol)
+
+@cached("etfs_country_exp", columnar("countryExposure", sort="exposure"))
+def fetch_etf_country_exposure(symbol: str):
+    return fc.etfs_country_exp(symbol=symbol)
+
+@cached("indices_const", columnar("constituentsBreakdown", sort="weight"))
+def fetch_index_constituents(symbol: str):
+    return fc.indices_const(symbol=symbol)
+
+
+# ---------------------------------------------------------------------------
+# Detect symbol type
+# ---------------------------------------------------------------------------
+
+@timed("detect")
+def detect_symbol_type(symbol: str, priority: int = PRIORITY_DETECT, retry: bool = False) -> str:
+    """"stock" / "etf" / "index", or "unknown" when the probe could not reach
+    upstream; retry skips a negative-cached probe failure."""
+    s = symbol.upper().strip()
+    if s.startswith("^"):
+        return "index"
+    index = get_symbol_index()
+    known = index.lookup(s)
+    if known:
+        return known
+    # Not in the local index — probe the ETF profile endpoint and remember the
+    # answer. Only a 4xx is an answer for this symbol (e.g. ETF data not on
+    # the plan) and means stock. Any other failure (transport error, 429, 5xx,
+    # open circuit, quota wait) says nothing about the symbol: that is
+    # "unknown", so an ETF is never shown as a stock page. Failed probes are
+    # not written back.
+    try:
+        with request_priority(priority):
+            etf_res = fetch_etf_profile.refresh(s).value if retry else fetch_etf_profile(s)
+    except Exception as e:
+        client_error = getattr(e, "status_code", None) is not None and not is_upstream_fault(e)
+        return "stock" if client_error else "unknown"
+    profile = etf_res.get("profile", {}) if etf_res else {}
+    if isinstance(profile, list) and len(profile) > 0:
+        profile = profile[0]
+    if profile and profile.get("name"):
+        index.add(s, "etf", profile.get("name", ""))
+        return "etf"
+    index.add(s, "stock")
+    return "stock"
+
+
+# ---------------------------------------------------------------------------
+# Prefetch — fan every call the page needs out over a shared thread pool so
+# cold-load latency is the slowest single round trip instead of the sum.
+# Results land in the response cache, so the chart builders and middle-panel
+# sections read them back as cache hits. The page can either block on the
+# whole plan (prefetch) or take the futures (submit_plan) and render each
+# section as soon as its own calls finish.
+# ---------------------------------------------------------------------------
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "32"))
+PREFETCH_TIMEOUT = float(os.environ.get("PREFETCH_TIMEOUT", "15"))
+
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+
+def call_key(fn, args: tuple, kwargs: dict = None) -> tuple:
+    return (fn.__name__, tuple(args), tuple(sorted((kwargs or {}).items())))
+
+
+def page_fetch_plan(symbol: str, sym_type: str, show_graphs: bool = True, charts: int = None) -> list:
+    """(fetcher, args, kwargs, priority) for every call the page will make for symbol.
+
+    charts limits the top-panel fetches to the first that many charts (in
+    panel order); the rest are left to the middle panel, if it needs them.
+    """
+    plan = []
+    if sym_type == "index":
+        plan.append((fetch_index_constituents, (symbol,), {}, PRIORITY_MIDDLE_PANEL))
+        return plan
+
+    # above-the-fold middle-panel sections go out with the charts
+    if sym_type == "etf":
+        plan.append((fetch_etf_profile, (symbol,), {}, PRIORITY_TOP_PANEL))
+    else:
+        plan.append((fetch_basic_financials, (symbol,), {}, PRIORITY_TOP_PANEL))
+
+    if show_graphs:
+        # top panel (stock + etf): the calls behind each chart's attrs, read
+        # off the panel's own builder list so the order cannot drift from it
+        from panels import TOP_PANEL_BUILDERS
+        from symbol_data import SymbolData
+        for builder in TOP_PANEL_BUILDERS[sym_type][:charts]:
+            for attr in builder.attrs:
+                fetcher, extra = SymbolData.SOURCES[attr]
+                plan.append((fetcher, (symbol, *extra), {}, PRIORITY_TOP_PANEL))
+
+    if sym_type == "etf":
+        plan += [
+            (fetch_etf_holdings, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_etf_sector_exposure, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_etf_country_exposure, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_company_earnings, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_recommendation_trends, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+        ]
+    else:
+        plan += [
+            (fetch_price_target, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_company_earnings, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_revenue_estimates, (symbol, "quarterly"), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_eps_estimates, (symbol, "quarterly"), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_recommendation_trends, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_upgrade_downgrade, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_basic_dividends, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+            (fetch_stock_splits, (symbol,), {}, PRIORITY_MIDDLE_PANEL),
+        ]
+
+    # drop duplicates (same fetcher + same arguments) keeping the first, i.e.
+    # highest-priority, occurrence
+    seen, unique = set(), []
+    for fn, args, kwargs, priority in plan:
+        key = call_key(fn, args, kwargs)
+        if key not in seen:
+            seen.add(key)
+            unique.append((fn, args, kwargs, priority))
+    return unique
+
+
+COMPARE_MAX_SYMBOLS = int(os.environ.get("COMPARE_MAX_SYMBOLS", "10"))
+
+
+def parse_symbols(text: str) -> list:
+    """Split a search like "aapl, msft nvda" into unique upper-case symbols."""
+    out = []
+    for token in text.replace(",", " ").split():
+        token = token.upper()
+        if token not in out:
+            out.append(token)
+    return out
+
+
+def compare_fetch_plan(symbols: list, show_graphs: bool = True) -> list:
+    """Plan for the compare page: the same few endpoints for every symbol, all
+    submitted together so N symbols cost about one round trip."""
+    plan = [(fetch_basic_financials, (s,), {}, PRIORITY_TOP_PANEL) for s in symbols]
+    if show_graphs:
+        for s in symbols:
+            plan += [
+                (fetch_recommendation_trends, (s,), {}, PRIORITY_TOP_PANEL),
+                (fetch_company_earnings, (s,), {}, PRIORITY_TOP_PANEL),
+            ]
+    else:
+        plan += [(fetch_recommendation_trends, (s,), {}, PRIORITY_MIDDLE_PANEL) for s in symbols]
+    return plan
+
+
+def lookthrough_fetch_plan(etfs: list) -> list:
+    """Plan for the ETF look-through page: holdings and exposures of every ETF."""
+    plan = []
+    for etf in etfs:
+        plan += [
+            (fetch_etf_holdings, (etf,), {}, PRIORITY_TOP_PANEL),
+            (fetch_etf_sector_exposure, (etf,), {}, PRIORITY_TOP_PANEL),
+            (fetch_etf_country_exposure, (etf,), {}, PRIORITY_TOP_PANEL),
+        ]
+    return plan
+
+
+def _call_at_priority(priority: int, fn, args: tuple, kwargs: dict):
+    with request_priority(priority):
+        return fn(*args, **kwargs)
+
+
+def submit_plan(plan: list) -> dict:
+    """Start every call in plan on the pool; returns {call_key: Future} without waiting."""
+    # each call runs in a copy of the caller's context so its timing spans
+    # land in the caller's request trace
+    return {
+        call_key(fn, args, kwargs): _executor.submit(
+            contextvars.copy_context().run, _call_at_priority, priority, fn, args, kwargs)
+        for fn, args, kwargs, priority in plan
+    }
+
+
+def prefetch(plan: list, timeout: float = PREFETCH_TIMEOUT) -> dict:
+    """Run every call in plan concurrently; returns {call_key: result or exception}."""
+    futures = submit_plan(plan)
+
+    # stragglers keep running in the pool and fill the cache when they finish
+    wait(futures.values(), timeout=timeout)
+    results = {}
+    for key, fut in futures.items():
+        if not fut.done():
+            results[key] = TimeoutError(f"{key[0]} still running after {timeout}s")
+        elif fut.exception() is not None:
+            results[key] = fut.exception()
+        else:
+            results[key] = fut.result()
+    return results
+
+
+def scheduler_stats() -> dict:
+    return fc.scheduler.stats()
+
+
+_SCHEDULER_GAUGES = {"calls_per_minute", "queue_depth", "max_queue_depth",
+                     "wait_p50", "wait_p95", "wait_max"}
+
+
+@register_collector
+def _scheduler_metrics():
+    for name, value in scheduler_stats().items():
+        if name in _SCHEDULER_GAUGES:
+            yield f"mx_scheduler_{name}", {}, value, "gauge"
+        else:
+            yield f"mx_scheduler_{name}_total", {}, value, "counter"
@@ -0,0 +1,242 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------------------------------------------------------------------------
+# Hot-path timing spans.
+#
+# span(kind, name) times a block and folds the duration into a per-process
+# histogram keyed by (kind, name, outcome): kind is fetch / chart / detect /
+# section / page / first_content, name the endpoint, builder, section title
+# or page type, and outcome what happened (hit, miss, stale, error…).
+# Histograms keep a bounded window of recent samples for p50/p95/p99 plus
+# lifetime count and sum.
+#
+# Exposed as Prometheus text on METRICS_PORT (if set) and on the app's hidden
+# ?admin=metrics page. With METRICS_JSONL set, every page render also appends
+# one JSON line with all the spans it produced, prefetch threads included.
+# ---------------------------------------------------------------------------
+METRICS_SAMPLES = int(os.environ.get("METRICS_SAMPLES", "2048"))
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_JSONL = os.environ.get("METRICS_JSONL", "")
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+
+    def __init__(self, max_samples: int = METRICS_SAMPLES):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+# extra gauges/counters from other modules: fn() -> iterable of
+# (metric name, labels dict, value, "counter" | "gauge")
+_collectors = []
+
+
+def register_collector(fn):
+    _collectors.append(fn)
+    return fn
+
+
+def observe(kind: str, name: str, seconds: float, outcome: str = "ok"):
+    key = (kind, name, outcome)
+    with _histograms_lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(seconds)
+
+
+def reset():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def summary() -> list:
+    """One dict per (kind, name, outcome): count, sum and p50/p95/p99 seconds."""
+    with _histograms_lock:
+        items = [(key, hist.count, hist.sum, hist.quantiles()) for key, hist in _histograms.items()]
+    rows = []
+    for (kind, name, outcome), count, total, qs in sorted(items):
+        rows.append({"kind": kind, "name": name, "outcome": outcome, "count": count,
+                     "sum_s": total, "p50_s": qs[0.5], "p95_s": qs[0.95], "p99_s": qs[0.99]})
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+class Span:
+    __slots__ = ("outcome",)
+
+    def __init__(self, outcome: str):
+        self.outcome = outcome
+
+
+@contextmanager
+def span(kind: str, name: str, outcome: str = "ok"):
+    """Time the block; set .outcome on the yielded span to label the sample."""
+    s = Span(outcome)
+    start = time.perf_counter()
+    try:
+        yield s
+    except BaseException:
+        if s.outcome == outcome:
+            s.outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(kind, name, elapsed, s.outcome)
+        trace = _trace.get()
+        if trace is not None:
+            trace["spans"].append({
+                "kind": kind, "name": name, "outcome": s.outcome,
+                "start_ms": round((start - trace["t0"]) * 1000, 3),
+                "dur_ms": round(elapsed * 1000, 3),
+                "thread": threading.current_thread().name,
+            })
+
+
+def timed(kind: str, name: str = None):
+    """Decorator form of span(kind, name or fn.__name__)."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Per-request traces (JSON lines)
+# ---------------------------------------------------------------------------
+_jsonl_lock = threading.Lock()
+
+
+def begin_request(**fields):
+    """Start collecting spans for this script run; threads started with a copy
+    of the current context (see market_data.submit_plan) report into it too."""
+    _trace.set({"t0": time.perf_counter(), "ts": time.time(), "fields": fields, "spans": []})
+
+
+def end_request(**fields):
+    trace = _trace.get()
+    if trace is None:
+        return None
+    _trace.set(None)
+    total = time.perf_counter() - trace["t0"]
+    sym_type = fields.get("sym_type") or trace["fields"].get("sym_type", "")
+    observe("page", sym_type, total)
+    if fields.get("first_content_s") is not None:
+        # time to the first section on screen, next to the full-page sample
+        observe("first_content", sym_type, fields["first_content_s"])
+    record = {"ts": trace["ts"], **trace["fields"], **fields,
+              "total_ms": round(total * 1000, 3), "spans": list(trace["spans"])}
+    if METRICS_JSONL:
+        line = json.dumps(record, default=str, separators=(",", ":"))
+        with _jsonl_lock:
+            with open(METRICS_JSONL, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Prometheus text exposition
+# ---------------------------------------------------------------------------
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in labels.items()
+    )
+    return "{" + body + "}"
+
+
+def prometheus_text() -> str:
+    lines = [
+        "# HELP mx_span_seconds Duration of instrumented hot-path spans.",
+        "# TYPE mx_span_seconds summary",
+    ]
+    for row in summary():
+        labels = {"kind": row["kind"], "name": row["name"], "outcome": row["outcome"]}
+        for q, col in zip(QUANTILES, ("p50_s", "p95_s", "p99_s")):
+            lines.append(f"mx_span_seconds{_labels({**labels, 'quantile': q})} {row[col]:.6f}")
+        lines.append(f"mx_span_seconds_sum{_labels(labels)} {row['sum_s']:.6f}")
+        lines.append(f"mx_span_seconds_count{_labels(labels)} {row['count']}")
+
+    typed = set()
+    for collector in _collectors:
+        try:
+            samples = list(collector())
+        except Exception as e:
+            lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+            continue
+        for metric, labels, value, kind in samples:
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} {kind}")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve(port: int = METRICS_PORT):
+    """Start the /metrics endpoint once per process (no-op when port is 0)."""
+    global _server
+    if not port or _server is not None:
+        return _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
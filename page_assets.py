@@ -0,0 +1,206 @@
+import functools
+
+# ---------------------------------------------------------------------------
+# Static page assets: the layout CSS and the top-panel scroll-button scripts.
+#
+# They are formatted here once per process (the CSS once per panel state)
+# instead of on every script run; app.py only injects the finished strings.
+# ---------------------------------------------------------------------------
+HEADER_HEIGHT = 100          # px – symbol title + toggle button
+TOP_HEIGHT_EXPANDED = 300   # px – charts visible
+TOP_HEIGHT_COLLAPSED = 0    # px – no charts
+BOTTOM_BAR_HEIGHT = 70      # px – chat input
+
+
+# ---------------------------------------------------------------------------
+# CSS: lock page, flex layout — top fixed, middle scrolls, bottom fixed
+# ---------------------------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def page_css(show_graphs: bool) -> str:
+    top_h = TOP_HEIGHT_EXPANDED if show_graphs else TOP_HEIGHT_COLLAPSED
+    mid_top = HEADER_HEIGHT + top_h + 8
+    return f"""
+<style>
+/* ---- hide default Streamlit header/footer for a clean app look ---- */
+
+header[data-testid="stHeader"] {{ display: none !important; }}
+div[data-testid="stDecoration"] {{ display: none !important; }}
+
+
+/* ---- page base ---- */
+section.main > div.block-container {{
+    padding-top: 0 !important;
+    padding-bottom: 0 !important;
+}}
+
+/* ===== TOP PANEL — fixed to top of viewport ===== */
+
+.st-key-top_panel_header {{
+    position: fixed !important;
+    top: 0;
+    left: 0;
+    right: 0;
+    z-index: 1000;
+    background: var(--background-color);
+    height: {HEADER_HEIGHT}px;
+    max-height: {HEADER_HEIGHT}px;
+    overflow: hidden;
+    padding: 0.4rem 1rem 0.25rem 1rem;
+    border-bottom: 1px solid var(--secondary-background-color);
+}}
+
+.st-key-top_panel {{
+    position: fixed !important;
+    top: {HEADER_HEIGHT}px;
+    left: 0;
+    right: 0;
+    z-index: 999;
+    background: var(--background-color);
+    height: {top_h}px;
+    max-height: {top_h}px;
+    overflow-x: auto;
+    overflow-y: hidden;
+    padding-left: 20px;
+    padding-right: 20px;
+    border-bottom: 1px solid var(--secondary-background-color);
+}}
+
+/* force chart columns into a single non-wrapping row */
+.st-key-top_panel div[data-testid="stHorizontalBlock"] {{
+    flex-wrap: nowrap !important;
+    overflow-x: visible;
+}}
+/* each chart column gets a minimum width so they don't squish */
+.st-key-top_panel div[data-testid="stHorizontalBlock"] > div[data-testid="stColumn"] {{
+    min-width: 380px;
+    flex: 0 0 auto !important;
+}}
+
+/* ---- scroll arrow buttons (injected via component) ---- */
+
+/* ===== MIDDLE PANEL — between fixed top and fixed bottom, scrolls ===== */
+.st-key-mid_panel {{
+    position: fixed !important;
+    top: {mid_top}px;
+    bottom: {BOTTOM_BAR_HEIGHT}px;
+    left: 0;
+    right: 0;
+    overflow-y: auto !important;
+    overflow-x: hidden;
+    padding: 0.5rem 1rem {BOTTOM_BAR_HEIGHT}px 1rem;
+    z-index: 1;
+}}
+
+/* ---- chat input styling (bottom bar) ---- */
+div[data-testid="stChatInput"] {{
+    background-color: transparent;
+}}
+div[data-testid="stChatInput"] textarea {{
+    border-radius: 24px !important;
+    text-overflow: ellipsis !important;
+    white-space: nowrap !important;
+    overflow: hidden !important;
+}}
+</style>
+"""
+
+
+# ---------------------------------------------------------------------------
+# Top-panel scroll buttons (injected into the parent document)
+# ---------------------------------------------------------------------------
+_arrow_mid = HEADER_HEIGHT + TOP_HEIGHT_EXPANDED // 2
+
+REMOVE_SCROLL_BTNS_JS = """
+<script>
+(function() {
+  var doc = window.parent.document;
+  var old1 = doc.getElementById('scroll-left-btn');
+  var old2 = doc.getElementById('scroll-right-btn');
+  if (old1) old1.remove();
+  if (old2) old2.remove();
+})();
+</script>
+"""
+
+CREATE_SCROLL_BTNS_JS = f"""
+<script>
+(function() {{
+  var doc = window.parent.document;
+
+  var old1 = doc.getElementById('scroll-left-btn');
+  var old2 = doc.getElementById('scroll-right-btn');
+  if (old1) old1.remove();
+  if (old2) old2.remove();
+
+  if (!doc.getElementById('tp-scroll-style')) {{
+    var style = doc.createElement('style');
+    style.id = 'tp-scroll-style';
+    style.textContent = `
+      .tp-scroll-btn {{
+        position: fixed;
+        top: {_arrow_mid}px;
+        transform: translateY(-50%);
+        width: 36px; height: 36px;
+        border-radius: 50%;
+        border: 1px solid rgba(255,255,255,0.2);
+        background: rgba(40,40,40,0.8);
+        color: #fff;
+        font-size: 1rem;
+        cursor: pointer;
+        z-index: 10000;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        opacity: 0.1;
+      }}
+      .tp-scroll-btn:hover {{ opacity: 0.5; background: rgba(70,70,70,0.95); }}
+    `;
+    doc.head.appendChild(style);
+  }}
+
+  function getScrollTarget() {{
+    var panel = doc.querySelector('.st-key-top_panel');
+    if (!panel) return null;
+    if (panel.scrollWidth > panel.clientWidth) return panel;
+    var children = panel.querySelectorAll('div');
+    for (var i = 0; i < children.length; i++) {{
+      if (children[i].scrollWidth > children[i].clientWidth) return children[i];
+    }}
+    return panel;
+  }}
+
+  var btnL = doc.createElement('button');
+  btnL.id = 'scroll-left-btn';
+  btnL.className = 'tp-scroll-btn';
+  btnL.style.left = '8px';
+  btnL.addEventListener('click', function() {{
+    var t = getScrollTarget();
+    if (t) t.scrollBy({{ left: -400, behavior: 'smooth' }});
+  }});
+  btnL.innerHTML = '&#9664;';
+
+  var btnR = doc.createElement('button');
+  btnR.id = 'scroll-right-btn';
+  btnR.className = 'tp-scroll-btn';
+  btnR.style.right = '8px';
+  // charts past the first screen are deferred behind the "more" button;
+  // scrolling up to it loads them
+  function loadMore(t) {{
+    var more = doc.querySelector('.st-key-tp_more button');
+    if (more && t.scrollLeft + t.clientWidth >= t.scrollWidth - 450) more.click();
+  }}
+
+  btnR.addEventListener('click', function() {{
+    var t = getScrollTarget();
+    if (t) {{
+      t.scrollBy({{ left: 400, behavior: 'smooth' }});
+      setTimeout(function() {{ loadMore(t); }}, 450);
+    }}
+  }});
+  btnR.innerHTML = '&#9654;';
+
+  doc.body.appendChild(btnL);
+  doc.body.appendChild(btnR);
+}})();
+</script>
+"""
@@ -0,0 +1,736 @@
+"""Chart builders and page sections for app.py.
+
+Kept out of app.py so the welcome and unknown-symbol screens, which stop the
+script before any of this is imported, never load pandas or Plotly.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+import streamlit.components.v1 as components
+
+from figure_cache import cached_figure, chart_template
+from lookthrough import PortfolioData, coverage, net_exposure, overlap, stock_exposure
+from market_data import PREFETCH_TIMEOUT
+from metrics import span
+from page_assets import CREATE_SCROLL_BTNS_JS, REMOVE_SCROLL_BTNS_JS
+from screener import SCREENER_METRICS, load_metrics, metrics_frame
+from symbol_data import CompareData, SymbolData
+from table_view import render_paged_table
+
+template_theme = chart_template("plotly_dark")
+
+# ---------------------------------------------------------------------------
+# Chart builders
+# ---------------------------------------------------------------------------
+@cached_figure("recommendations")
+def build_recommendation_chart(data: SymbolData):
+    df = data.recommendations
+    if df.empty or "period" not in df.columns:
+        return None
+    df = df.iloc[::-1]
+    symbol = data.symbol
+    fig = go.Figure()
+    for col, color in [("strongBuy", "#22c55e"), ("buy", "#86efac"),
+                        ("hold", "#fbbf24"), ("sell", "#f87171"), ("strongSell", "#dc2626")]:
+        if col in df.columns:
+            fig.add_trace(go.Bar(x=df["period"], y=df[col], name=col, marker_color=color))
+    fig.update_layout(
+        barmode="stack", title=f"{symbol} Recommendations",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+        legend=dict(orientation="h", y=-0.2, font=dict(size=9)),
+    )
+    return fig
+
+
+@cached_figure("earnings")
+def build_eps_surprise_chart(data: SymbolData, quarters: int = 12):
+    df = data.earnings
+    if df.empty or "actual" not in df.columns:
+        return None
+    df = df.head(quarters).iloc[::-1]
+    symbol = data.symbol
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=df["period"], y=df["estimate"], name="Estimate", marker_color="#64748b"))
+    fig.add_trace(go.Bar(x=df["period"], y=df["actual"], name="Actual", marker_color="#3b82f6"))
+    fig.update_layout(
+        barmode="group", title=f"{symbol} EPS: Actual vs Est",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+        legend=dict(orientation="h", y=-0.2, font=dict(size=9)),
+    )
+    return fig
+
+
+@cached_figure("revenue_estimates")
+def build_revenue_estimates_chart(data: SymbolData):
+    df = data.revenue_estimates
+    if df.empty or "revenueAvg" not in df.columns:
+        return None
+    df = df.iloc[::-1].assign(revenueAvg_B=lambda d: d["revenueAvg"] / 1e9)
+    fig = px.bar(
+        df, x="period", y="revenueAvg_B",
+        title=f"{data.symbol} Revenue Est ($B)",
+        template=template_theme, color_discrete_sequence=["#8b5cf6"],
+    )
+    fig.update_layout(height=260, margin=dict(l=30, r=10, t=35, b=25), yaxis_title="$B")
+    return fig
+
+
+@cached_figure("price_target")
+def build_price_target_chart(data: SymbolData):
+    pt = data.price_target
+    if not pt or "targetMean" not in pt:
+        return None
+    vals = {k: pt[k] for k in ["targetLow", "targetMean", "targetMedian", "targetHigh"] if k in pt}
+    if not vals:
+        return None
+    fig = go.Figure(go.Bar(
+        x=list(vals.keys()), y=list(vals.values()),
+        marker_color=["#f87171", "#3b82f6", "#a78bfa", "#22c55e"],
+        text=[f"${v:,.1f}" for v in vals.values()], textposition="outside",
+    ))
+    analysts = pt.get("numberAnalysts", "?")
+    fig.update_layout(
+        title=f"{data.symbol} Price Targets ({analysts} analysts)",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+    )
+    return fig
+
+
+@cached_figure("etf_sectors")
+def build_etf_sector_chart(data: SymbolData):
+    df = data.etf_sectors
+    if df.empty:
+        return None
+    fig = px.pie(
+        df, values="exposure", names="industry",
+        title=f"{data.symbol} Sector Exposure", template=template_theme, hole=0.35,
+    )
+    fig.update_layout(height=260, margin=dict(l=10, r=10, t=35, b=10))
+    fig.update_traces(textposition="inside", textinfo="percent+label")
+    return fig
+
+
+@cached_figure("etf_holdings")
+def build_etf_holdings_chart(data: SymbolData, top_n: int = 15):
+    df = data.etf_holdings
+    if df.empty or "percent" not in df.columns:
+        return None
+    df = df.head(top_n)
+    fig = px.bar(
+        df, x="symbol", y="percent",
+        title=f"{data.symbol} Top Holdings (%)", template=template_theme,
+        color="percent", color_continuous_scale="Blues",
+    )
+    fig.update_layout(height=260, margin=dict(l=30, r=10, t=35, b=25))
+    return fig
+
+
+# -- compare mode: one trace per symbol ---------------------------------------
+@cached_figure("recommendations")
+def build_compare_recommendation_chart(data: CompareData):
+    fig = go.Figure()
+    for item in data.items:
+        try:
+            df = item.recommendations
+        except Exception:
+            continue
+        cols = [c for c in ("strongBuy", "buy", "hold", "sell", "strongSell") if c in df.columns]
+        if df.empty or "period" not in df.columns or not cols:
+            continue
+        df = df.iloc[::-1]
+        total = df[cols].sum(axis=1).replace(0, float("nan"))
+        buys = df[[c for c in ("strongBuy", "buy") if c in df.columns]].sum(axis=1)
+        fig.add_trace(go.Scatter(x=df["period"], y=buys / total * 100, name=item.symbol,
+                                 mode="lines+markers"))
+    if not fig.data:
+        return None
+    fig.update_layout(
+        title="Buy + Strong Buy share (%)",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+        legend=dict(orientation="h", y=-0.2, font=dict(size=9)),
+    )
+    return fig
+
+
+@cached_figure("earnings")
+def build_compare_eps_chart(data: CompareData, quarters: int = 12):
+    fig = go.Figure()
+    for item in data.items:
+        try:
+            df = item.earnings
+        except Exception:
+            continue
+        if df.empty or "actual" not in df.columns:
+            continue
+        df = df.head(quarters).iloc[::-1]
+        fig.add_trace(go.Scatter(x=df["period"], y=df["actual"], name=item.symbol,
+                                 mode="lines+markers"))
+    if not fig.data:
+        return None
+    fig.update_layout(
+        title="EPS (actual)",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+        legend=dict(orientation="h", y=-0.2, font=dict(size=9)),
+    )
+    return fig
+
+
+@cached_figure("earnings")
+def build_compare_eps_surprise_chart(data: CompareData, quarters: int = 8):
+    fig = go.Figure()
+    for item in data.items:
+        try:
+            df = item.earnings
+        except Exception:
+            continue
+        if df.empty or "surprisePercent" not in df.columns:
+            continue
+        df = df.head(quarters).iloc[::-1]
+        fig.add_trace(go.Bar(x=df["period"], y=df["surprisePercent"], name=item.symbol))
+    if not fig.data:
+        return None
+    fig.update_layout(
+        barmode="group", title="EPS surprise (%)",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+        legend=dict(orientation="h", y=-0.2, font=dict(size=9)),
+    )
+    return fig
+
+
+# -- ETF look-through ----------------------------------------------------------
+@cached_figure("etf_holdings")
+def build_lookthrough_stock_chart(data: PortfolioData, top_n: int = 15):
+    df = stock_exposure(data.weights).head(top_n)
+    if df.empty:
+        return None
+    fig = go.Figure()
+    for etf in data.symbols:
+        fig.add_trace(go.Bar(x=df["symbol"], y=df[etf], name=etf))
+    fig.update_layout(
+        barmode="stack", title="Net Stock Exposure (%)",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+        legend=dict(orientation="h", y=-0.2, font=dict(size=9)),
+    )
+    return fig
+
+
+@cached_figure("etf_sectors")
+def build_lookthrough_sector_chart(data: PortfolioData):
+    df = net_exposure(data.weights, "sectors")
+    if df.empty:
+        return None
+    fig = px.pie(
+        df, values="exposure", names="industry",
+        title="Net Sector Exposure", template=template_theme, hole=0.35,
+    )
+    fig.update_layout(height=260, margin=dict(l=10, r=10, t=35, b=10))
+    fig.update_traces(textposition="inside", textinfo="percent+label")
+    return fig
+
+
+@cached_figure("etf_countries")
+def build_lookthrough_country_chart(data: PortfolioData, top_n: int = 10):
+    df = net_exposure(data.weights, "countries").head(top_n)
+    if df.empty:
+        return None
+    fig = px.bar(
+        df, x="country", y="exposure", title="Net Country Exposure (%)",
+        template=template_theme, color_discrete_sequence=["#0ea5e9"],
+    )
+    fig.update_layout(height=260, margin=dict(l=30, r=10, t=35, b=25), yaxis_title="%")
+    return fig
+
+
+@cached_figure("etf_holdings")
+def build_overlap_chart(data: PortfolioData):
+    if len(data.symbols) < 2:
+        return None
+    df = overlap(data.symbols)
+    fig = go.Figure(go.Heatmap(
+        z=df.to_numpy(), x=df.columns, y=df.index, colorscale="Blues",
+        text=df.round(1).to_numpy(), texttemplate="%{text}",
+    ))
+    fig.update_layout(
+        title="Holdings Overlap (%)",
+        template=template_theme, height=260, margin=dict(l=30, r=10, t=35, b=25),
+    )
+    return fig
+
+
+# ---------------------------------------------------------------------------
+# Middle-panel sections — each draws itself from the SymbolData and renders
+# nothing when its endpoint has no data.
+# ---------------------------------------------------------------------------
+
+def section_index_constituents(data: SymbolData):
+    try:
+        constit = data.index_constituents
+        st.markdown(f"**Total Constituents:** {len(constit)}")
+        df = data.index_breakdown
+        if df.empty and constit:
+            df = pd.DataFrame({"symbol": constit})
+        if not df.empty:
+            display_cols = [c for c in ["symbol", "name", "weight", "isin", "cusip"] if c in df.columns]
+            if display_cols:
+                df = df[display_cols]
+            render_paged_table(
+                df, key=f"constituents_{data.symbol}",
+                search_cols=("symbol", "name"), sort_cols=("weight", "symbol", "name"),
+                min_value_col="weight",
+                column_config={"weight": st.column_config.NumberColumn("weight", format="%.4f%%")},
+            )
+    except Exception as e:
+        st.markdown(f"*Could not load constituents: {e}*")
+
+
+def section_index_screener(data: SymbolData):
+    try:
+        symbols = data.index_constituents
+        if not symbols:
+            st.markdown("*No constituents to screen.*")
+            return
+        if not st.toggle(f"Screen all {len(symbols)} constituents", key=f"screener_{data.symbol}"):
+            st.caption("Loads basic financials for every constituent in the background "
+                       "(shares the API quota), then filters and ranks them in place.")
+            return
+        loading = load_metrics(symbols)
+        names = None
+        breakdown = data.index_breakdown
+        if "symbol" in breakdown.columns and "name" in breakdown.columns:
+            names = pd.Series(breakdown["name"].to_numpy(), index=breakdown["symbol"].to_numpy())
+        df, loaded = metrics_frame(symbols, names)
+        if loading:
+            c_info, c_refresh = st.columns([4, 1])
+            c_info.caption(f"Metrics loaded for {loaded} of {len(symbols)} constituents…")
+            c_refresh.button("Refresh", key=f"screener_{data.symbol}_refresh")
+
+        metrics = list(SCREENER_METRICS)
+        chosen = st.multiselect("Screen on", metrics, key=f"screener_{data.symbol}_on",
+                                format_func=SCREENER_METRICS.get)
+        min_values, max_values = {}, {}
+        for metric in chosen:
+            c_label, c_low, c_high = st.columns([2, 2, 2])
+            c_label.markdown(f"**{SCREENER_METRICS[metric]}**")
+            min_values[metric] = c_low.number_input("Min", key=f"screener_{data.symbol}_{metric}_min",
+                                                    value=None, label_visibility="collapsed",
+                                                    placeholder="min")
+            max_values[metric] = c_high.number_input("Max", key=f"screener_{data.symbol}_{metric}_max",
+                                                     value=None, label_visibility="collapsed",
+                                                     placeholder="max")
+        render_paged_table(
+            df, key=f"screener_{data.symbol}_table",
+            search_cols=("symbol", "name"), sort_cols=chosen + [m for m in metrics if m not in chosen],
+            min_values=min_values, max_values=max_values,
+            column_config={m: st.column_config.NumberColumn(label, format="%.2f")
+                           for m, label in SCREENER_METRICS.items()},
+        )
+    except Exception as e:
+        st.markdown(f"*Could not load the screener: {e}*")
+
+
+def section_etf_profile(data: SymbolData):
+    try:
+        profile = data.etf_profile
+        if profile:
+            st.markdown("#### Profile")
+            st.markdown(
+                f"**Name:** {profile.get('name', 'N/A')}  \n"
+                f"**Asset Class:** {profile.get('assetClass', 'N/A')}  \n"
+                f"**Expense Ratio:** {profile.get('expenseRatio', 'N/A')}%  \n"
+                f"**AUM:** ${profile.get('aum', 0):,.0f}  \n"
+                f"**NAV:** ${profile.get('nav', 0):,.2f}  \n"
+                f"**Inception:** {profile.get('inceptionDate', 'N/A')}"
+            )
+            desc = profile.get("description", "")
+            if desc:
+                st.markdown(desc)
+    except Exception:
+        pass
+
+
+def section_etf_holdings(data: SymbolData):
+    try:
+        df = data.etf_holdings
+        if not df.empty:
+            st.markdown("#### Holdings")
+            st.dataframe(df, use_container_width=True, height=350)
+    except Exception:
+        pass
+
+
+def section_etf_sectors(data: SymbolData):
+    try:
+        df = data.etf_sectors
+        if not df.empty:
+            st.markdown("#### Sector Exposure")
+            st.dataframe(df, use_container_width=True)
+    except Exception:
+        pass
+
+
+def section_etf_countries(data: SymbolData):
+    try:
+        df = data.etf_countries
+        if not df.empty:
+            st.markdown("#### Country Exposure")
+            st.dataframe(df, use_container_width=True)
+    except Exception:
+        pass
+
+
+def section_etf_earnings(data: SymbolData):
+    try:
+        df = data.earnings
+        if not df.empty:
+            st.markdown("#### Earnings")
+            st.dataframe(df.head(20), use_container_width=True, height=350)
+    except Exception:
+        pass
+
+
+def section_recommendations(data: SymbolData):
+    try:
+        df = data.recommendations
+        if not df.empty:
+            st.markdown("#### Analyst Recommendations")
+            st.dataframe(df, use_container_width=True)
+    except Exception:
+        pass
+
+
+def section_key_financials(data: SymbolData):
+    try:
+        metric = data.metrics
+        if metric:
+            st.markdown("#### Key Financials")
+            st.markdown(
+                f"**52-Wk High:** ${metric.get('52WeekHigh', 'N/A')} · "
+                f"**52-Wk Low:** ${metric.get('52WeekLow', 'N/A')} · "
+                f"**Beta:** {metric.get('beta', 'N/A')} · "
+                f"**P/E (TTM):** {metric.get('peTTM', 'N/A')}"
+            )
+            st.markdown(
+                f"**P/B (Annual):** {metric.get('pbAnnual', 'N/A')} · "
+                f"**Div Yield TTM:** {metric.get('currentDividendYieldTTM', 'N/A')}% · "
+                f"**ROE TTM:** {metric.get('roeTTM', 'N/A')}% · "
+                f"**EPS TTM:** ${metric.get('epsTTM', 'N/A')}"
+            )
+            display_keys = [
+                "marketCapitalization", "revenuePerShareTTM", "netIncomePerShareTTM",
+                "operatingMarginTTM", "grossMarginTTM", "debtEquityTTM",
+                "currentRatioQuarterly", "quickRatioQuarterly",
+                "10DayAverageTradingVolume", "3MonthAverageTradingVolume",
+            ]
+            rows = [{k: metric.get(k, "N/A") for k in display_keys}]
+            st.dataframe(pd.DataFrame(rows).T.rename(columns={0: "Value"}), use_container_width=True)
+    except Exception:
+        pass
+
+
+def section_price_target(data: SymbolData):
+    try:
+        pt = data.price_target
+        if pt and "targetMean" in pt:
+            st.markdown("#### Price Target Consensus")
+            st.markdown(
+                f"**Low:** ${pt.get('targetLow', 'N/A')} · "
+                f"**Mean:** ${pt.get('targetMean', 'N/A'):,.2f} · "
+                f"**Median:** ${pt.get('targetMedian', 'N/A')} · "
+                f"**High:** ${pt.get('targetHigh', 'N/A')}"
+            )
+    except Exception:
+        pass
+
+
+def section_earnings_history(data: SymbolData):
+    try:
+        df = data.earnings
+        if not df.empty:
+            st.markdown("#### Earnings History")
+            st.dataframe(df, use_container_width=True, height=350)
+    except Exception:
+        pass
+
+
+def section_revenue_estimates(data: SymbolData):
+    try:
+        df = data.revenue_estimates
+        if not df.empty:
+            st.markdown("#### Revenue Estimates (Quarterly)")
+            st.dataframe(df, use_container_width=True, height=350)
+    except Exception:
+        pass
+
+
+def section_eps_estimates(data: SymbolData):
+    try:
+        df = data.eps_estimates
+        if not df.empty:
+            st.markdown("#### EPS Estimates (Quarterly)")
+            st.dataframe(df, use_container_width=True, height=350)
+    except Exception:
+        pass
+
+
+def section_upgrades(data: SymbolData):
+    try:
+        df = data.upgrades
+        if not df.empty:
+            st.markdown("#### Upgrades & Downgrades")
+            st.dataframe(df, use_container_width=True, height=350)
+    except Exception:
+        pass
+
+
+def section_dividends(data: SymbolData):
+    try:
+        df = data.dividends
+        if not df.empty:
+            st.markdown("#### Dividends")
+            st.dataframe(df, use_container_width=True, height=350)
+    except Exception:
+        pass
+
+
+def section_splits(data: SymbolData):
+    try:
+        df = data.splits
+        if not df.empty:
+            st.markdown("#### Stock Splits")
+            st.dataframe(df, use_container_width=True)
+    except Exception:
+        pass
+
+
+COMPARE_METRICS = [
+    ("Market Cap ($M)", "marketCapitalization"), ("P/E (TTM)", "peTTM"),
+    ("P/B (Annual)", "pbAnnual"), ("EPS TTM", "epsTTM"), ("ROE TTM (%)", "roeTTM"),
+    ("Beta", "beta"), ("Div Yield TTM (%)", "currentDividendYieldTTM"),
+    ("Gross Margin TTM", "grossMarginTTM"), ("Operating Margin TTM", "operatingMarginTTM"),
+    ("Debt/Equity TTM", "debtEquityTTM"), ("52-Wk High", "52WeekHigh"), ("52-Wk Low", "52WeekLow"),
+]
+
+
+def section_compare_financials(data: CompareData):
+    columns = {}
+    for item in data.items:
+        try:
+            metric = item.metrics
+        except Exception:
+            metric = {}
+        columns[item.symbol] = [metric.get(key) for _, key in COMPARE_METRICS]
+    st.markdown("#### Key Financials")
+    st.dataframe(pd.DataFrame(columns, index=[label for label, _ in COMPARE_METRICS]),
+                 use_container_width=True)
+
+
+def section_compare_recommendations(data: CompareData):
+    rows = []
+    for item in data.items:
+        try:
+            df = item.recommendations
+        except Exception:
+            continue
+        if not df.empty:
+            rows.append(df.iloc[0])
+    if rows:
+        st.markdown("#### Latest Analyst Recommendations")
+        latest = pd.DataFrame(rows)
+        st.dataframe(latest.set_index("symbol") if "symbol" in latest.columns else latest,
+                     use_container_width=True)
+
+
+def weight_key(portfolio: str, etf: str) -> str:
+    return f"lt_w_{portfolio}_{etf}"
+
+
+def section_portfolio_weights(data: PortfolioData):
+    st.markdown("#### Weights")
+    cols = st.columns(min(len(data.symbols), 5))
+    for i, etf in enumerate(data.symbols):
+        cols[i % len(cols)].number_input(
+            etf, min_value=0.0, step=5.0, key=weight_key(st.session_state.symbol, etf),
+        )
+    cov = coverage(data.symbols)
+    st.caption("Holdings reported: " + " · ".join(f"{etf} {cov[etf]:.0f}%" for etf in data.symbols))
+
+
+def section_portfolio_stocks(data: PortfolioData):
+    df = stock_exposure(data.weights)
+    if not df.empty:
+        st.markdown("#### Net Stock Exposure")
+        pct = st.column_config.NumberColumn(format="%.3f%%")
+        render_paged_table(
+            df, key=f"lt_stocks_{st.session_state.symbol}",
+            search_cols=("symbol", "name"), sort_cols=("exposure", *data.symbols, "symbol"),
+            min_value_col="exposure",
+            column_config={col: pct for col in ("exposure", *data.symbols)},
+        )
+
+
+def section_portfolio_sectors(data: PortfolioData):
+    df = net_exposure(data.weights, "sectors")
+    if not df.empty:
+        st.markdown("#### Net Sector Exposure")
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+def section_portfolio_countries(data: PortfolioData):
+    df = net_exposure(data.weights, "countries")
+    if not df.empty:
+        st.markdown("#### Net Country Exposure")
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+def section_portfolio_overlap(data: PortfolioData):
+    if len(data.symbols) > 1:
+        st.markdown("#### Holdings Overlap (%)")
+        st.dataframe(overlap(data.symbols).round(2), use_container_width=True)
+
+
+# (title, section, SymbolData attrs it reads); "---" is a divider
+INDEX_SECTIONS = [
+    ("Constituents", section_index_constituents, ("index_breakdown",)),
+    "---",
+    ("Screener", section_index_screener, ("index_constituents",)),
+]
+
+ETF_SECTIONS = [
+    ("Profile", section_etf_profile, ("etf_profile",)),
+    "---",
+    ("Holdings", section_etf_holdings, ("etf_holdings",)),
+    "---",
+    ("Sector Exposure", section_etf_sectors, ("etf_sectors",)),
+    "---",
+    ("Country Exposure", section_etf_countries, ("etf_countries",)),
+    "---",
+    ("Earnings", section_etf_earnings, ("earnings",)),
+    "---",
+    ("Analyst Recommendations", section_recommendations, ("recommendations",)),
+]
+
+STOCK_SECTIONS = [
+    ("Key Financials", section_key_financials, ("metrics",)),
+    "---",
+    ("Price Target Consensus", section_price_target, ("price_target",)),
+    "---",
+    ("Earnings History", section_earnings_history, ("earnings",)),
+    "---",
+    ("Revenue Estimates", section_revenue_estimates, ("revenue_estimates",)),
+    ("EPS Estimates", section_eps_estimates, ("eps_estimates",)),
+    "---",
+    ("Analyst Recommendations", section_recommendations, ("recommendations",)),
+    "---",
+    ("Upgrades & Downgrades", section_upgrades, ("upgrades",)),
+    "---",
+    ("Dividends", section_dividends, ("dividends",)),
+    "---",
+    ("Stock Splits", section_splits, ("splits",)),
+]
+
+COMPARE_SECTIONS = [
+    ("Key Financials", section_compare_financials, ("metrics",)),
+    "---",
+    ("Analyst Recommendations", section_compare_recommendations, ("recommendations",)),
+]
+
+PORTFOLIO_SECTIONS = [
+    ("Weights", section_portfolio_weights, ("etf_holdings",)),
+    "---",
+    ("Net Stock Exposure", section_portfolio_stocks, ("etf_holdings",)),
+    "---",
+    ("Net Sector Exposure", section_portfolio_sectors, ("etf_sectors",)),
+    "---",
+    ("Net Country Exposure", section_portfolio_countries, ("etf_countries",)),
+    "---",
+    ("Holdings Overlap", section_portfolio_overlap, ("etf_holdings",)),
+]
+
+STOCK_CHARTS = [build_recommendation_chart, build_eps_surprise_chart,
+                build_revenue_estimates_chart, build_price_target_chart]
+
+TOP_PANEL_BUILDERS = {
+    "stock": STOCK_CHARTS,
+    "etf": STOCK_CHARTS + [build_etf_sector_chart, build_etf_holdings_chart],
+    "index": [],
+    "compare": [build_compare_recommendation_chart, build_compare_eps_chart,
+                build_compare_eps_surprise_chart],
+    "portfolio": [build_lookthrough_stock_chart, build_lookthrough_sector_chart,
+                  build_lookthrough_country_chart, build_overlap_chart],
+}
+
+
+def top_panel_attrs(builders: list) -> tuple:
+    """SymbolData attributes the given chart builders read."""
+    return tuple(dict.fromkeys(attr for builder in builders for attr in builder.attrs))
+
+
+def expand_top_panel(symbol: str):
+    st.session_state.top_panel_expanded = symbol
+
+
+def render_top_panel(data, builders: list, deferred: list):
+    """Build and show builders' charts; deferred ones get a "more" button in
+    the last column that loads them (the right scroll arrow presses it)."""
+    charts = []
+    for builder in builders:
+        try:
+            fig = builder(data)
+            if fig:
+                charts.append((builder.__name__, fig))
+        except Exception:
+            pass
+
+    if charts or deferred:
+        cols = st.columns(len(charts) + bool(deferred))
+        # keyed by builder so reruns and symbol changes update the same
+        # frontend components instead of mounting new ones
+        for col, (name, fig) in zip(cols, charts):
+            col.plotly_chart(fig, use_container_width=True, key=f"tc_{name}")
+        if deferred:
+            cols[-1].button(f"{len(deferred)} more chart{'s' if len(deferred) > 1 else ''} ▶",
+                            key="tp_more", on_click=expand_top_panel, args=(st.session_state.symbol,))
+        components.html(CREATE_SCROLL_BTNS_JS, height=0)
+    else:
+        st.caption("No chart data available for this symbol.")
+        components.html(REMOVE_SCROLL_BTNS_JS, height=0)
+
+
+def render_section(title: str, render, *args):
+    with span("section", title):
+        render(*args)
+
+
+def render_progressively(slots: list, futures: dict) -> float:
+    """Fill each (placeholder, render, call keys) slot as soon as its calls finish.
+
+    Slots whose data is ready are filled in list order, so earlier slots win
+    ties. Returns the time the first slot was filled (time.perf_counter()).
+    """
+    pending = list(slots)
+    first_content = None
+    deadline = time.monotonic() + PREFETCH_TIMEOUT
+    while pending:
+        ready = [slot for slot in pending
+                 if all(futures[k].done() for k in slot[2] if k in futures)]
+        if not ready:
+            waiting = {futures[k] for slot in pending for k in slot[2]
+                       if k in futures and not futures[k].done()}
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                wait(waiting, timeout=remaining, return_when=FIRST_COMPLETED)
+                continue
+            # prefetch overran its budget: let the rest fetch inline as before
+            ready = pending
+        for slot in ready:
+            placeholder, render, _ = slot
+            with placeholder.container():
+                render()
+            pending.remove(slot)
+            if first_content is None:
+                first_content = time.perf_counter()
+    return first_content
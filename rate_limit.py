@@ -0,0 +1,191 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Client-side quota scheduling for the Finnhub client.
+#
+# Every upstream call needs a slot in two process-wide sliding windows: one
+# holding at most the plan's per-minute quota over any 60 seconds, and one
+# capping any single second at the burst ceiling (Finnhub's 30 calls/s).
+# Callers that have to wait queue by priority, so the symbol-type probe and
+# top-panel charts go out before lower middle-panel sections. 429/5xx
+# responses are retried with jittered exponential backoff.
+# ---------------------------------------------------------------------------
+
+PRIORITY_DETECT = 0         # detect_symbol_type
+PRIORITY_TOP_PANEL = 1      # chart builders
+PRIORITY_MIDDLE_PANEL = 2   # middle-panel sections (default)
+PRIORITY_BACKGROUND = 3     # warmers, batch jobs
+
+_priority = contextvars.ContextVar("request_priority", default=PRIORITY_MIDDLE_PANEL)
+
+
+@contextmanager
+def request_priority(priority: int):
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class QuotaWaitTimeout(Exception):
+    pass
+
+
+class SlidingWindow:
+    """At most `limit` takes in any `period` seconds."""
+
+    def __init__(self, limit: float, period: float = 60.0):
+        self.limit = limit
+        self.period = period
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def try_take(self) -> float:
+        """Take a slot; returns 0 on success, else seconds until one frees up."""
+        with self._lock:
+            now = time.monotonic()
+            while self._times and self._times[0] <= now - self.period:
+                self._times.popleft()
+            if len(self._times) < self.limit:
+                self._times.append(now)
+                return 0.0
+            return self._times[0] + self.period - now
+
+    def give_back(self):
+        # the slot just taken was not used after all
+        with self._lock:
+            if self._times:
+                self._times.pop()
+
+    def drain(self):
+        # upstream said 429 — assume our view of the quota is optimistic
+        with self._lock:
+            now = time.monotonic()
+            while len(self._times) < self.limit:
+                self._times.append(now)
+
+
+class RequestScheduler:
+
+    def __init__(self, calls_per_minute: float = 60, burst: float = 30, max_retries: int = 3,
+                 backoff: float = 0.5, max_wait: float = 30):
+        self.window = SlidingWindow(calls_per_minute, 60.0)
+        self.second = SlidingWindow(burst, 1.0)
+        self.calls_per_minute = calls_per_minute
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=1024)
+        self._max_depth = 0
+        self._counts = Counter()
+
+    # -- queueing ------------------------------------------------------------
+    def _acquire(self, priority: int):
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        with self._cond:
+            heapq.heappush(self._heap, ticket)
+            self._max_depth = max(self._max_depth, len(self._heap))
+            while True:
+                delay = None
+                if self._heap[0] == ticket:
+                    delay = self.window.try_take()
+                    if delay == 0:
+                        delay = self.second.try_take()
+                        if delay:
+                            self.window.give_back()
+                    if delay == 0:
+                        heapq.heappop(self._heap)
+                        self._cond.notify_all()
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._heap.remove(ticket)
+                    heapq.heapify(self._heap)
+                    self._cond.notify_all()
+                    self._counts["timeouts"] += 1
+                    raise QuotaWaitTimeout(f"waited {self.max_wait:.0f}s for a Finnhub quota slot")
+                self._cond.wait(timeout=min(delay, remaining) if delay else remaining)
+        waited = time.monotonic() - start
+        with self._cond:
+            self._waits.append(waited)
+            self._counts["calls"] += 1
+            if waited > 0.001:
+                self._counts["queued"] += 1
+
+    # -- calling -------------------------------------------------------------
+    def call(self, fn, *args, **kwargs):
+        priority = current_priority()
+        for attempt in range(self.max_retries + 1):
+            self._acquire(priority)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                retryable = status == 429 or (status is not None and 500 <= status < 600)
+                if not retryable or attempt == self.max_retries:
+                    raise
+                with self._cond:
+                    self._counts["retries"] += 1
+                    self._counts[f"status_{status}"] += 1
+                if status == 429:
+                    self.second.drain()
+                    log.warning("Finnhub 429 on %s; backing off", getattr(fn, "__name__", fn))
+                time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0))
+
+    def stats(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            depth = len(self._heap)
+            counts = dict(self._counts)
+            max_depth = self._max_depth
+
+        def pct(p):
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            "calls_per_minute": self.calls_per_minute,
+            "queue_depth": depth,
+            "max_queue_depth": max_depth,
+            "wait_p50": pct(0.50),
+            "wait_p95": pct(0.95),
+            "wait_max": waits[-1] if waits else 0.0,
+            **counts,
+        }
+
+
+class ScheduledClient:
+    """Wraps a finnhub.Client so every endpoint method goes through the scheduler."""
+
+    def __init__(self, client, scheduler: RequestScheduler):
+        self.client = client
+        self.scheduler = scheduler
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def scheduled(*args, **kwargs):
+            return self.scheduler.call(attr, *args, **kwargs)
+        scheduled.__name__ = name
+        return scheduled
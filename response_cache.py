@@ -0,0 +1,721 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from circuit_breaker import CircuitOpenError, get_breaker
+from metrics import register_collector, span
+from rate_limit import PRIORITY_BACKGROUND, QuotaWaitTimeout, request_priority
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Response cache for the fetch_* layer.
+#
+# Two tiers: a small in-process LRU in front of a shared backend that outlives
+# the process (SQLite file on the host by default, or anything speaking the
+# Redis get/set/delete API). Values are stored pickled; callers must treat
+# returned payloads as read-only since the memory tier hands out the same
+# object to every session.
+# ---------------------------------------------------------------------------
+
+# v2: tabular fields are stored as columnar DataFrames (see columnar.py)
+CACHE_VERSION = "v2"
+
+Entry = namedtuple("Entry", ["value", "stored_at", "expires_at"])
+
+
+class CacheBackend:
+    """Interface every backend implements. Keys are str, values any picklable."""
+
+    def get(self, key: str, max_age: float = None):
+        """Return the live Entry for key, or None if missing/expired.
+
+        max_age is a hint for layered backends: an entry older than this may be
+        swapped for a younger copy from a lower tier.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float, endpoint: str = ""):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def info(self) -> dict:
+        return {}
+
+
+# ---------------------------------------------------------------------------
+# In-process LRU
+# ---------------------------------------------------------------------------
+class MemoryCache(CacheBackend):
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, max_age: float = None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value, ttl: float, endpoint: str = ""):
+        now = time.time()
+        with self._lock:
+            self._data[key] = Entry(value, now, now + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def put_entry(self, key: str, entry: Entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> dict:
+        return {"backend": "memory", "entries": len(self._data), "max_entries": self.max_entries}
+
+
+# ---------------------------------------------------------------------------
+# SQLite file — shared by every process on the host, survives redeploys
+# ---------------------------------------------------------------------------
+class SQLiteCache(CacheBackend):
+
+    EVICT_EVERY = 64     # writes between size checks
+    TOUCH_EVERY = 256    # reads batched into one accessed_at write…
+    TOUCH_AFTER = 5.0    # …or this many seconds, whichever comes first
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._touched = {}
+        self._touched_since = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, endpoint TEXT, value BLOB, size INTEGER,"
+            " stored_at REAL, expires_at REAL, accessed_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, max_age: float = None):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, stored_at, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[2] <= now:
+            return None
+        try:
+            value = pickle.loads(row[0])
+        except Exception:
+            self.delete(key)
+            return None
+        self._touch(key, now)
+        return Entry(value, row[1], row[2])
+
+    def _touch(self, key: str, now: float):
+        # Reads only record accessed_at for LRU eviction. Writing it on every
+        # read would take the WAL write lock once per cross-process hit, so
+        # reads are collected and written together.
+        with self._lock:
+            self._touched[key] = now
+            due = (len(self._touched) >= self.TOUCH_EVERY
+                   or time.monotonic() - self._touched_since >= self.TOUCH_AFTER)
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self):
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._touched_since = time.monotonic()
+        if not touched:
+            return
+        conn = self._conn()
+        try:
+            conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?",
+                             [(at, key) for key, at in touched.items()])
+            conn.commit()
+        except sqlite3.OperationalError:
+            # busy writer; access times are a hint, try again with the next batch
+            conn.rollback()
+            with self._lock:
+                for key, at in touched.items():
+                    self._touched.setdefault(key, at)
+
+    def set(self, key: str, value, ttl: float, endpoint: str = ""):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, endpoint, blob, len(blob), now, now + ttl, now),
+        )
+        conn.commit()
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        self.flush_touches()
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            # drop least-recently-read rows until we are back under 90% of the cap
+            excess = total - int(self.max_bytes * 0.9)
+            freed = 0
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+                victims.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        conn.commit()
+
+    def delete(self, key: str):
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM entries")
+        conn.commit()
+
+    def info(self) -> dict:
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "entries": entries,
+                "bytes": size, "max_bytes": self.max_bytes}
+
+
+# ---------------------------------------------------------------------------
+# Redis-compatible — anything with get(k) / set(k, v, ex=) / delete(k) works
+# (redis-py, fakeredis, a KeyDB/Valkey client…). Size bounds are left to the
+# server's maxmemory + allkeys-lru policy.
+# ---------------------------------------------------------------------------
+class RedisCache(CacheBackend):
+
+    def __init__(self, client, prefix: str = "mx:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str, max_age: float = None):
+        blob = self.client.get(self.prefix + key)
+        if blob is None:
+            return None
+        try:
+            return pickle.loads(blob)
+        except Exception:
+            return None
+
+    def set(self, key: str, value, ttl: float, endpoint: str = ""):
+        now = time.time()
+        blob = pickle.dumps(Entry(value, now, now + ttl), protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, blob, ex=max(1, int(ttl)))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+    def info(self) -> dict:
+        return {"backend": "redis", "prefix": self.prefix}
+
+
+# ---------------------------------------------------------------------------
+# Shared-tier guard: the shared store is an optimisation, never a dependency.
+# A backend error (Redis down, SQLite "database is locked") is logged, counted
+# and treated as a miss / skipped write, so fetches fall back to the memory
+# tier and upstream instead of failing the page.
+# ---------------------------------------------------------------------------
+SHARED_ERROR_LOG_EVERY = 30.0   # seconds between logged shared-tier errors
+
+
+class GuardedCache(CacheBackend):
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.errors = Counter()
+        self._logged_at = 0.0
+        self._lock = threading.Lock()
+
+    def _failed(self, op: str, key: str):
+        now = time.monotonic()
+        with self._lock:
+            self.errors[op] += 1
+            quiet = now - self._logged_at < SHARED_ERROR_LOG_EVERY
+            if not quiet:
+                self._logged_at = now
+        if not quiet:
+            log.warning("Shared cache %s of %s failed; using the memory tier", op, key, exc_info=True)
+
+    def get(self, key: str, max_age: float = None):
+        try:
+            return self.backend.get(key, max_age)
+        except Exception:
+            self._failed("get", key)
+            return None
+
+    def set(self, key: str, value, ttl: float, endpoint: str = ""):
+        try:
+            self.backend.set(key, value, ttl, endpoint)
+        except Exception:
+            self._failed("set", key)
+
+    def delete(self, key: str):
+        try:
+            self.backend.delete(key)
+        except Exception:
+            self._failed("delete", key)
+
+    def clear(self):
+        try:
+            self.backend.clear()
+        except Exception:
+            self._failed("clear", "*")
+
+    def info(self) -> dict:
+        try:
+            info = self.backend.info()
+        except Exception as e:
+            info = {"error": f"{type(e).__name__}: {e}"}
+        return {**info, "errors": dict(self.errors)}
+
+
+# ---------------------------------------------------------------------------
+# Memory tier in front of a shared tier
+# ---------------------------------------------------------------------------
+class TieredCache(CacheBackend):
+
+    def __init__(self, local: MemoryCache, shared: CacheBackend = None):
+        self.local = local
+        self.shared = GuardedCache(shared) if shared is not None else None
+
+    def get(self, key: str, max_age: float = None):
+        entry = self.local.get(key)
+        if self.shared is None:
+            return entry
+        # a stale local copy may already have been refreshed by another replica
+        if entry is None or (max_age is not None and time.time() - entry.stored_at > max_age):
+            shared = self.shared.get(key)
+            if shared is not None and (entry is None or shared.stored_at > entry.stored_at):
+                self.local.put_entry(key, shared)
+                entry = shared
+        return entry
+
+    def set(self, key: str, value, ttl: float, endpoint: str = ""):
+        self.local.set(key, value, ttl, endpoint)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl, endpoint)
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def info(self) -> dict:
+        return {"local": self.local.info(), "shared": self.shared.info() if self.shared else None}
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+#
+#   RESPONSE_CACHE=sqlite                 (default) file under the temp dir
+#   RESPONSE_CACHE=sqlite:/var/cache/mx.sqlite3
+#   RESPONSE_CACHE=redis://host:6379/0    needs the `redis` package
+#   RESPONSE_CACHE=memory                 process-local only
+# ---------------------------------------------------------------------------
+RESPONSE_CACHE = os.environ.get("RESPONSE_CACHE", "sqlite")
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESPONSE_CACHE_LOCAL_ENTRIES = int(os.environ.get("RESPONSE_CACHE_LOCAL_ENTRIES", "2048"))
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "market_explorer", "responses.sqlite3")
+
+
+def build_cache(spec: str = RESPONSE_CACHE) -> TieredCache:
+    local = MemoryCache(max_entries=RESPONSE_CACHE_LOCAL_ENTRIES)
+    if spec == "memory":
+        return TieredCache(local)
+    if spec.startswith("redis://") or spec.startswith("rediss://"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RESPONSE_CACHE=redis://… requires the `redis` package") from e
+        return TieredCache(local, RedisCache(redis.Redis.from_url(spec)))
+    if spec == "sqlite" or spec.startswith("sqlite:"):
+        path = spec.partition(":")[2] or DEFAULT_SQLITE_PATH
+        return TieredCache(local, SQLiteCache(path, max_bytes=RESPONSE_CACHE_MAX_BYTES))
+    raise ValueError(f"Unknown RESPONSE_CACHE backend: {spec!r}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> TieredCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_cache()
+    return _cache
+
+
+def set_cache(cache: CacheBackend):
+    global _cache
+    _cache = cache
+
+
+# ---------------------------------------------------------------------------
+# Per-endpoint TTL policy
+#
+# fresh      — served as-is.
+# max_stale  — past `fresh`, the cached payload is still served immediately
+#              while one background refresh runs; past fresh + max_stale the
+#              entry is gone and the caller blocks on the upstream call.
+# ---------------------------------------------------------------------------
+TtlPolicy = namedtuple("TtlPolicy", ["fresh", "max_stale"])
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+
+DEFAULT_TTL_POLICY = TtlPolicy(fresh=5 * MINUTE, max_stale=1 * HOUR)
+
+TTL_POLICIES = {
+    # moves intraday
+    "price_target":              TtlPolicy(fresh=1 * HOUR, max_stale=1 * DAY),
+    "upgrade_downgrade":         TtlPolicy(fresh=1 * HOUR, max_stale=1 * DAY),
+    "earnings_calendar":         TtlPolicy(fresh=1 * HOUR, max_stale=1 * DAY),
+    "company_basic_financials":  TtlPolicy(fresh=1 * HOUR, max_stale=1 * DAY),
+    # analyst aggregates, refreshed daily at most
+    "company_revenue_estimates": TtlPolicy(fresh=6 * HOUR, max_stale=3 * DAY),
+    "company_eps_estimates":     TtlPolicy(fresh=6 * HOUR, max_stale=3 * DAY),
+    "recommendation_trends":     TtlPolicy(fresh=6 * HOUR, max_stale=7 * DAY),
+    "company_earnings":          TtlPolicy(fresh=6 * HOUR, max_stale=7 * DAY),
+    # reference data
+    "stock_basic_dividends":     TtlPolicy(fresh=1 * DAY, max_stale=7 * DAY),
+    "etfs_profile":              TtlPolicy(fresh=1 * DAY, max_stale=7 * DAY),
+    "etfs_holdings":             TtlPolicy(fresh=1 * DAY, max_stale=7 * DAY),
+    "etfs_sector_exp":           TtlPolicy(fresh=1 * DAY, max_stale=7 * DAY),
+    "etfs_country_exp":          TtlPolicy(fresh=1 * DAY, max_stale=7 * DAY),
+    "indices_const":             TtlPolicy(fresh=1 * DAY, max_stale=7 * DAY),
+    "stock_splits":              TtlPolicy(fresh=7 * DAY, max_stale=30 * DAY),
+}
+
+
+def ttl_policy(endpoint: str) -> TtlPolicy:
+    return TTL_POLICIES.get(endpoint, DEFAULT_TTL_POLICY)
+
+
+# ---------------------------------------------------------------------------
+# @cached(endpoint) — decorator for the fetch_* helpers
+#
+# Upstream calls are single-flight per cache key: while one is running, every
+# other miss, refresh or revalidation of the same key in this process waits
+# on its future instead of spending quota on an identical call. "coalesced"
+# counts the calls saved that way.
+#
+# A miss whose upstream call fails is remembered for NEGATIVE_CACHE_TTL
+# seconds (under "neg:" + key, in both tiers): until then the same call
+# raises CachedFailure straight away ("negative_hits") instead of spending
+# quota and a timeout on every rerun. Every upstream call also goes through
+# its endpoint's circuit breaker (circuit_breaker.py). Empty payloads are
+# ordinary responses and are cached under the endpoint's policy; "empty"
+# counts them so endpoints that are not on the plan show up in metrics.
+# ---------------------------------------------------------------------------
+NEGATIVE_CACHE_TTL = float(os.environ.get("NEGATIVE_CACHE_TTL", "120"))
+
+STAT_KINDS = ("hits", "stale", "misses", "coalesced", "negative_hits", "failures", "empty",
+              "refreshes", "refresh_errors")
+
+Failure = namedtuple("Failure", ["error", "status_code"])
+
+
+class CachedFailure(Exception):
+    """A recent upstream failure for the same call, replayed from the cache."""
+
+    def __init__(self, failure: Failure):
+        super().__init__(failure.error)
+        self.status_code = failure.status_code
+
+
+def _is_container(value) -> bool:
+    return isinstance(value, (dict, list)) or hasattr(value, "empty")   # DataFrame
+
+
+def _is_empty(payload) -> bool:
+    if payload is None:
+        return True
+    if isinstance(payload, dict):
+        # {"data": [], "symbol": "X"} is empty; a flat record is not
+        containers = [v for v in payload.values() if _is_container(v)]
+        return all(map(_is_empty, containers)) if containers else not payload
+    if isinstance(payload, list):
+        return not payload
+    return bool(getattr(payload, "empty", False))
+
+
+stats = {kind: Counter() for kind in STAT_KINDS}
+_stats_lock = threading.Lock()
+
+_revalidate_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="revalidate")
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _count(kind: str, endpoint: str):
+    with _stats_lock:
+        stats[kind][endpoint] += 1
+
+
+def cache_stats() -> dict:
+    with _stats_lock:
+        endpoints = sorted(set().union(*stats.values()))
+        return {ep: {kind: stats[kind][ep] for kind in STAT_KINDS} for ep in endpoints}
+
+
+@register_collector
+def _cache_metrics():
+    for endpoint, counts in cache_stats().items():
+        for kind, value in counts.items():
+            yield "mx_cache_events_total", {"endpoint": endpoint, "event": kind}, value, "counter"
+    with _inflight_lock:
+        inflight = Counter(endpoint for endpoint, _ in _inflight.values())
+    for endpoint, value in inflight.items():
+        yield "mx_cache_inflight", {"endpoint": endpoint}, value, "gauge"
+    shared = getattr(_cache, "shared", None)
+    if shared is not None:
+        for op, value in dict(shared.errors).items():
+            yield "mx_cache_shared_errors_total", {"op": op}, value, "counter"
+
+
+def cache_key(endpoint: str, args: tuple) -> str:
+    return f"{CACHE_VERSION}:{endpoint}:{json.dumps(args, default=str, separators=(',', ':'))}"
+
+
+def _store(cache: CacheBackend, key: str, value, policy: TtlPolicy, endpoint: str):
+    cache.set(key, value, policy.fresh + policy.max_stale, endpoint)
+
+
+def _single_flight(key: str, endpoint: str, load):
+    """(load(), True) for the first caller of key; (the same result, False)
+    for callers arriving while that call is still running."""
+    with _inflight_lock:
+        running = _inflight.get(key)
+        if running is None:
+            future = Future()
+            _inflight[key] = (endpoint, future)
+    if running is not None:
+        _count("coalesced", endpoint)
+        return running[1].result(), False
+    try:
+        result = load()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result, True
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _revalidate(cache: CacheBackend, key: str, fn, args, kwargs, policy: TtlPolicy, endpoint: str):
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def load():
+        with request_priority(PRIORITY_BACKGROUND):
+            value = fn(*args, **kwargs)
+        _store(cache, key, value, policy, endpoint)
+        return value
+
+    def refresh():
+        try:
+            _, called = _single_flight(key, endpoint, load)
+            if called:
+                _count("refreshes", endpoint)
+        except Exception:
+            # keep serving the stale copy until its hard expiry
+            _count("refresh_errors", endpoint)
+            log.warning("Background refresh of %s failed", key, exc_info=True)
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(key)
+
+    _revalidate_pool.submit(refresh)
+
+
+def cached(endpoint: str, normalize=None):
+    """normalize(payload), if given, runs once per upstream call and its result
+    is what gets stored and returned (e.g. columnar.columnar(...))."""
+    policy = ttl_policy(endpoint)
+
+    def decorator(raw):
+        sig = inspect.signature(raw)
+
+        breaker = get_breaker(endpoint)
+
+        @functools.wraps(raw)
+        def fn(*args, **kwargs):
+            # a local quota-wait timeout says nothing about the endpoint
+            payload = breaker.call(raw, *args, ignore=(QuotaWaitTimeout,), **kwargs)
+            if _is_empty(payload):
+                _count("empty", endpoint)
+            return payload if normalize is None else normalize(payload)
+
+        def key_for(*args, **kwargs) -> str:
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return cache_key(endpoint, tuple(bound.arguments.values()))
+
+        def entry(*args, **kwargs) -> Entry:
+            key = key_for(*args, **kwargs)
+            cache = get_cache()
+            with span("fetch", endpoint) as s:
+                hit = cache.get(key, max_age=policy.fresh)
+                if hit is not None:
+                    if time.time() - hit.stored_at < policy.fresh:
+                        s.outcome = "hit"
+                        _count("hits", endpoint)
+                    else:
+                        s.outcome = "stale"
+                        _count("stale", endpoint)
+                        _revalidate(cache, key, fn, args, kwargs, policy, endpoint)
+                    return hit
+                failure = cache.get("neg:" + key)
+                if failure is not None:
+                    s.outcome = "negative"
+                    _count("negative_hits", endpoint)
+                    raise CachedFailure(failure.value)
+                s.outcome = "miss"
+                _count("misses", endpoint)
+
+                def load() -> Entry:
+                    try:
+                        value = fn(*args, **kwargs)
+                    except (QuotaWaitTimeout, CircuitOpenError):
+                        raise
+                    except Exception as e:
+                        _count("failures", endpoint)
+                        cache.set("neg:" + key, Failure(f"{type(e).__name__}: {e}",
+                                                        getattr(e, "status_code", None)),
+                                  NEGATIVE_CACHE_TTL, endpoint)
+                        raise
+                    _store(cache, key, value, policy, endpoint)
+                    now = time.time()
+                    return cache.get(key) or Entry(value, now, now + policy.fresh + policy.max_stale)
+
+                try:
+                    result, called = _single_flight(key, endpoint, load)
+                except BaseException:
+                    s.outcome = "miss_error"
+                    raise
+                if not called:
+                    s.outcome = "coalesced"
+                if isinstance(result, Entry):
+                    return result
+                # joined a refresh or revalidation, which hands back the bare value
+                now = time.time()
+                return cache.get(key) or Entry(result, now, now + policy.fresh + policy.max_stale)
+
+        def peek(*args, **kwargs):
+            """The cached Entry (fresh or stale) or None; never calls upstream."""
+            return get_cache().get(key_for(*args, **kwargs))
+
+        def refresh(*args, **kwargs) -> Entry:
+            """Call upstream now and store the result, whatever is cached."""
+            key = key_for(*args, **kwargs)
+            cache = get_cache()
+
+            def load():
+                value = fn(*args, **kwargs)
+                _store(cache, key, value, policy, endpoint)
+                return value
+
+            with span("fetch", endpoint, "refresh") as s:
+                result, called = _single_flight(key, endpoint, load)
+                if called:
+                    _count("refreshes", endpoint)
+                else:
+                    s.outcome = "coalesced"
+            value = result.value if isinstance(result, Entry) else result
+            now = time.time()
+            return Entry(value, now, now + policy.fresh + policy.max_stale)
+
+        @functools.wraps(raw)
+        def wrapper(*args, **kwargs):
+            return entry(*args, **kwargs).value
+
+        # fetch_x.entry(...) also returns stored_at, which callers use as a
+        # cheap version stamp for anything derived from the payload
+        wrapper.entry = entry
+        wrapper.peek = peek
+        wrapper.refresh = refresh
+        wrapper.endpoint = endpoint
+        wrapper.policy = policy
+        return wrapper
+    return decorator
@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from market_data import fetch_basic_financials
+from metrics import register_collector
+from rate_limit import PRIORITY_BACKGROUND, request_priority
+
+# ---------------------------------------------------------------------------
+# Index constituent screener.
+#
+# company_basic_financials for every constituent is loaded through the
+# response cache on a small pool of its own at background priority, so a
+# 500-name index neither starves the page prefetch pool nor jumps ahead of
+# other sessions' page loads in the quota queue. The screen is built from
+# whatever is cached (peek, never upstream) into one float64 frame —
+# symbols × SCREENER_METRICS — memoized by the payloads' stored_at stamps;
+# filtering and ranking are then vectorized ops over that frame.
+# ---------------------------------------------------------------------------
+SCREENER_WORKERS = int(os.environ.get("SCREENER_WORKERS", "8"))
+SCREENER_CACHE_ENTRIES = int(os.environ.get("SCREENER_CACHE_ENTRIES", "16"))
+
+# metric key -> column label
+SCREENER_METRICS = {
+    "peTTM": "P/E (TTM)",
+    "pbAnnual": "P/B",
+    "roeTTM": "ROE % (TTM)",
+    "beta": "Beta",
+    "currentDividendYieldTTM": "Div Yield %",
+    "marketCapitalization": "Mkt Cap ($M)",
+    "epsTTM": "EPS (TTM)",
+    "grossMarginTTM": "Gross Margin %",
+    "operatingMarginTTM": "Op Margin %",
+    "debtEquityTTM": "Debt/Equity",
+    "52WeekHigh": "52W High",
+    "52WeekLow": "52W Low",
+}
+
+_loader = ThreadPoolExecutor(max_workers=SCREENER_WORKERS, thread_name_prefix="screener")
+_queued = set()
+_queued_lock = threading.Lock()
+
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+@register_collector
+def _screener_metrics():
+    with _queued_lock:
+        queued = len(_queued)
+    yield "mx_screener_queued", {}, queued, "gauge"
+
+
+def _load(symbol: str):
+    try:
+        with request_priority(PRIORITY_BACKGROUND):
+            fetch_basic_financials(symbol)
+    except Exception:
+        pass   # left out of the screen; negative caching stops it retrying at once
+    finally:
+        with _queued_lock:
+            _queued.discard(symbol)
+
+
+def load_metrics(symbols: list) -> int:
+    """Queue every symbol whose basic financials are not cached yet; returns
+    how many are still loading (queued now or earlier)."""
+    missing = [s for s in symbols if fetch_basic_financials.peek(s) is None]
+    with _queued_lock:
+        new = [s for s in missing if s not in _queued]
+        _queued.update(new)
+    for symbol in new:
+        _loader.submit(_load, symbol)
+    return len(missing)
+
+
+def metrics_frame(symbols: list, names: pd.Series = None) -> tuple:
+    """(frame, loaded): one row per symbol with its SCREENER_METRICS as
+    float64 (NaN where missing), and how many symbols had data cached."""
+    entries = [fetch_basic_financials.peek(s) for s in symbols]
+    key = (tuple(symbols), tuple(e.stored_at if e else None for e in entries))
+    with _frames_lock:
+        result = _frames.get(key)
+        if result is not None:
+            _frames.move_to_end(key)
+    if result is None:
+        result = _build(symbols, entries)
+        with _frames_lock:
+            _frames[key] = result
+            while len(_frames) > SCREENER_CACHE_ENTRIES:
+                _frames.popitem(last=False)
+    frame, loaded = result
+    if names is not None:
+        # memoized frames are shared; name a shallow copy
+        frame = frame.copy(deep=False)
+        frame.insert(1, "name", frame["symbol"].map(names).fillna(""))
+    return frame, loaded
+
+
+def _build(symbols: list, entries: list) -> tuple:
+    keys = list(SCREENER_METRICS)
+    values = np.full((len(symbols), len(keys)), np.nan)
+    for i, e in enumerate(entries):
+        metric = (e.value or {}).get("metric") or {} if e else {}
+        for j, k in enumerate(keys):
+            v = metric.get(k)
+            if isinstance(v, (int, float)):
+                values[i, j] = v
+    frame = pd.DataFrame(values, columns=keys)
+    frame.insert(0, "symbol", pd.array(symbols, dtype="str"))
+    return frame, sum(e is not None for e in entries)
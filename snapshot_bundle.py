@@ -0,0 +1,255 @@
+"""Offline snapshot bundles: every Finnhub payload the app reads for a set of
+symbols, in one file an instance can serve from without API access.
+
+Capture from the real API (needs FINNHUB_API_KEY), or pack a directory of
+fixtures recorded by fake_finnhub.py:
+
+    python snapshot_bundle.py capture --out demo.mxb AAPL MSFT SPY QQQ ^GSPC [--universe US] [--constituents]
+    python snapshot_bundle.py pack bench/fixtures --out fixtures.mxb
+    python snapshot_bundle.py info demo.mxb
+
+Serve the app from it (demo / disaster-recovery instances):
+
+    FINNHUB_BUNDLE=demo.mxb streamlit run app.py
+
+or replay it as perf-test fixtures, with the fake client's latency and error
+injection on top:
+
+    FINNHUB_FAKE_LATENCY=0.1 FINNHUB_FAKE_FIXTURES=demo.mxb python bench/bench_app.py
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# ---------------------------------------------------------------------------
+# File layout (little-endian):
+#
+#   header   magic "MXBUNDLE", u16 format version, u64 index offset, u64 index length
+#   blobs    one zlib-compressed JSON object per subject (symbol, or exchange
+#            for stock_symbols): {endpoint: raw payload}
+#   index    zlib-compressed JSON: format, created, symbols, and
+#            subjects {subject: [offset, length, [endpoints]]}
+#
+# Opening a bundle maps the file and reads only the index, so startup does not
+# grow with the bundle. A subject's blob is decompressed the first time one of
+# its payloads is asked for; the last BUNDLE_CACHE_SUBJECTS stay parsed.
+# ---------------------------------------------------------------------------
+BUNDLE_CACHE_SUBJECTS = int(os.environ.get("BUNDLE_CACHE_SUBJECTS", "64"))
+
+MAGIC = b"MXBUNDLE"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHQQ")
+
+
+class BundleMiss(Exception):
+    """Payload not in the bundle. Carries a 404 so the scheduler does not
+    retry it and the response cache negative-caches it."""
+
+    def __init__(self, endpoint: str, subject: str):
+        super().__init__(f"{endpoint} for {subject!r} is not in the snapshot bundle")
+        self.status_code = 404
+
+
+class SnapshotBundle:
+
+    def __init__(self, path: str, cache_subjects: int = BUNDLE_CACHE_SUBJECTS):
+        self.path = path
+        self.cache_subjects = cache_subjects
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, offset, length = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot bundle")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} is bundle format {version}; this build reads up to {FORMAT_VERSION}")
+        index = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        self.version = version
+        self.created = index["created"]
+        self.symbols = index["symbols"]
+        self._subjects = index["subjects"]
+        self._parsed = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, subject: str) -> bool:
+        return subject in self._subjects
+
+    def __len__(self) -> int:
+        return len(self._subjects)
+
+    def subjects(self) -> list:
+        return list(self._subjects)
+
+    def endpoints(self, subject: str) -> list:
+        return self._subjects.get(subject, (0, 0, []))[2]
+
+    def _load(self, subject: str):
+        with self._lock:
+            payloads = self._parsed.get(subject)
+            if payloads is not None:
+                self._parsed.move_to_end(subject)
+                return payloads
+        offset, length, _ = self._subjects[subject]
+        payloads = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        with self._lock:
+            self._parsed[subject] = payloads
+            while len(self._parsed) > self.cache_subjects:
+                self._parsed.popitem(last=False)
+        return payloads
+
+    def payload(self, endpoint: str, subject: str):
+        """The captured payload, or None if the bundle has none for this call."""
+        if subject not in self._subjects:
+            return None
+        return self._load(subject).get(endpoint)
+
+    def close(self):
+        self._map.close()
+
+
+def write_bundle(path: str, subjects: dict, symbols: list = ()) -> int:
+    """Write {subject: {endpoint: payload}} to path; returns the file size."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    index = {"format": FORMAT_VERSION, "created": time.time(), "symbols": list(symbols), "subjects": {}}
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        for subject in sorted(subjects):
+            payloads = subjects[subject]
+            blob = zlib.compress(json.dumps(payloads, separators=(",", ":"), sort_keys=True).encode(), 9)
+            index["subjects"][subject] = [f.tell(), len(blob), sorted(payloads)]
+            f.write(blob)
+        offset = f.tell()
+        blob = zlib.compress(json.dumps(index, separators=(",", ":")).encode(), 9)
+        f.write(blob)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, offset, len(blob)))
+        size = offset + len(blob)
+    os.replace(tmp, path)
+    return size
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+class BundleClient:
+    """Stands in for finnhub.Client, answering every endpoint method from a
+    bundle; calls it has no payload for raise BundleMiss."""
+
+    def __init__(self, path: str):
+        self.bundle = SnapshotBundle(path)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        from fake_finnhub import call_subject
+
+        def replay(*args, **kwargs):
+            subject = call_subject(args, kwargs)
+            payload = self.bundle.payload(name, subject)
+            if payload is None:
+                raise BundleMiss(name, subject)
+            return payload
+        replay.__name__ = name
+        return replay
+
+
+# ---------------------------------------------------------------------------
+# Capture
+# ---------------------------------------------------------------------------
+def read_fixtures(root: str) -> dict:
+    """{subject: {endpoint: payload}} from a fake_finnhub fixture directory."""
+    subjects = {}
+    for endpoint in sorted(os.listdir(root)):
+        folder = os.path.join(root, endpoint)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".json"):
+                with open(os.path.join(folder, name), encoding="utf-8") as f:
+                    subjects.setdefault(name[:-len(".json")], {})[endpoint] = json.load(f)
+    return subjects
+
+
+def capture(symbols: list, universe: list = (), constituents: bool = False) -> dict:
+    """Load every page for symbols (plus the compare and look-through pages
+    over them) from the API, recording each response; returns what
+    read_fixtures gives for the recording."""
+    root = tempfile.mkdtemp(prefix="mx-capture-")
+    os.environ["FINNHUB_RECORD_FIXTURES"] = root
+    os.environ.pop("FINNHUB_FAKE_LATENCY", None)
+    os.environ.pop("FINNHUB_BUNDLE", None)
+    # a fresh process-local cache: every payload, and full history windows,
+    # come from upstream rather than an older shared entry
+    os.environ["RESPONSE_CACHE"] = "memory"
+    import market_data as md
+    from rate_limit import PRIORITY_BACKGROUND
+    from symbol_index import build_rows
+
+    types = {}
+    for symbol in symbols:
+        types[symbol] = md.detect_symbol_type(symbol)
+        if types[symbol] == "unknown":
+            print(f"{symbol}: could not determine its type (upstream unreachable); skipped")
+            continue
+        results = md.prefetch(md.page_fetch_plan(symbol, types[symbol]))
+        failed = [key[0] for key, value in results.items() if isinstance(value, Exception)]
+        if constituents and types[symbol] == "index":
+            members = (md.fetch_index_constituents(symbol) or {}).get("constituents") or []
+            md.prefetch([(md.fetch_basic_financials, (s,), {}, PRIORITY_BACKGROUND) for s in members])
+        print(f"{symbol} ({types[symbol]}): {len(results) - len(failed)} calls"
+              + (f", failed: {' '.join(failed)}" if failed else ""))
+    stocks = [s for s in symbols if types[s] in ("stock", "etf")]
+    etfs = [s for s in symbols if types[s] == "etf"]
+    if len(stocks) > 1:
+        md.prefetch(md.compare_fetch_plan(stocks[:md.COMPARE_MAX_SYMBOLS]))
+    if etfs:
+        md.prefetch(md.lookthrough_fetch_plan(etfs[:md.COMPARE_MAX_SYMBOLS]))
+    if universe:
+        build_rows(md.fc, universe)
+    return read_fixtures(root)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build and inspect offline snapshot bundles.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    cap = commands.add_parser("capture", help="record every payload the app uses for symbols")
+    cap.add_argument("symbols", nargs="+")
+    cap.add_argument("--out", required=True)
+    cap.add_argument("--universe", nargs="*", default=[], help="exchanges whose symbol list to include")
+    cap.add_argument("--constituents", action="store_true",
+                     help="also basic financials of index constituents (the screener)")
+    pack = commands.add_parser("pack", help="bundle a fake_finnhub fixture directory")
+    pack.add_argument("fixtures")
+    pack.add_argument("--out", required=True)
+    info = commands.add_parser("info", help="describe a bundle")
+    info.add_argument("bundle")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        bundle = SnapshotBundle(args.bundle)
+        payloads = sum(len(bundle.endpoints(s)) for s in bundle.subjects())
+        print(f"{args.bundle}: format {bundle.version}, created {time.ctime(bundle.created)}, "
+              f"{len(bundle)} subjects, {payloads} payloads, {os.path.getsize(args.bundle) / 1e3:.1f} KB")
+        print("symbols:", " ".join(bundle.symbols) or "-")
+        return 0
+    if args.command == "pack":
+        subjects, symbols = read_fixtures(args.fixtures), []
+    else:
+        symbols = [s.upper() for s in args.symbols]
+        subjects = capture(symbols, args.universe, args.constituents)
+    size = write_bundle(args.out, subjects, symbols)
+    payloads = sum(len(p) for p in subjects.values())
+    print(f"wrote {payloads} payloads for {len(subjects)} subjects to {args.out} ({size / 1e3:.1f} KB)")
+    return 0 if subjects else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+from functools import cached_property
+
+import pandas as pd
+
+from market_data import (
+    call_key, fetch_basic_financials, fetch_recommendation_trends, fetch_price_target,
+    fetch_company_earnings, fetch_stock_splits, fetch_basic_dividends,
+    fetch_upgrade_downgrade, fetch_revenue_estimates, fetch_eps_estimates,
+    fetch_etf_profile, fetch_etf_holdings, fetch_etf_sector_exposure,
+    fetch_etf_country_exposure, fetch_index_constituents,
+)
+
+# ---------------------------------------------------------------------------
+# Per-symbol data model.
+#
+# Each endpoint is fetched once with the widest arguments any view needs;
+# chart builders and middle-panel tables read slices of it. Tabular payloads
+# arrive from the response cache already as compact frames sorted newest/
+# largest first (see columnar.py), so attributes hand them out without
+# copying. Attributes are computed lazily, so a view that is never rendered
+# never fetches, and a failed fetch raises at the point of use just like the
+# raw fetch_* call.
+# ---------------------------------------------------------------------------
+
+
+def _frame(records) -> pd.DataFrame:
+    if isinstance(records, pd.DataFrame):
+        return records
+    return pd.DataFrame(records or [])
+
+
+class SymbolData:
+
+    # attribute -> (fetcher, extra args) it is derived from
+    SOURCES = {
+        "metrics": (fetch_basic_financials, ()),
+        "price_target": (fetch_price_target, ()),
+        "earnings": (fetch_company_earnings, ()),
+        "recommendations": (fetch_recommendation_trends, ()),
+        "revenue_estimates": (fetch_revenue_estimates, ("quarterly",)),
+        "eps_estimates": (fetch_eps_estimates, ("quarterly",)),
+        "upgrades": (fetch_upgrade_downgrade, ()),
+        "dividends": (fetch_basic_dividends, ()),
+        "splits": (fetch_stock_splits, ()),
+        "etf_profile": (fetch_etf_profile, ()),
+        "etf_holdings": (fetch_etf_holdings, ()),
+        "etf_sectors": (fetch_etf_sector_exposure, ()),
+        "etf_countries": (fetch_etf_country_exposure, ()),
+        "index_constituents": (fetch_index_constituents, ()),
+        "index_breakdown": (fetch_index_constituents, ()),
+    }
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def call_keys(self, *attrs) -> list:
+        """market_data.call_key of every fetch behind attrs (matches submit_plan's keys)."""
+        keys = []
+        for attr in attrs:
+            fetcher, extra = self.SOURCES[attr]
+            keys.append(call_key(fetcher, (self.symbol, *extra)))
+        return keys
+
+    def fingerprint(self, *attrs) -> tuple:
+        """Version stamp of the payloads behind attrs, without building any frame."""
+        stamps = []
+        for attr in attrs:
+            fetcher, extra = self.SOURCES[attr]
+            stamps.append(fetcher.entry(self.symbol, *extra).stored_at)
+        return tuple(stamps)
+
+    # -- stock ---------------------------------------------------------------
+    @cached_property
+    def metrics(self) -> dict:
+        res = fetch_basic_financials(self.symbol)
+        return res.get("metric", {}) if res else {}
+
+    @cached_property
+    def price_target(self) -> dict:
+        return fetch_price_target(self.symbol) or {}
+
+    @cached_property
+    def earnings(self) -> pd.DataFrame:
+        return _frame(fetch_company_earnings(self.symbol))
+
+    @cached_property
+    def recommendations(self) -> pd.DataFrame:
+        return _frame(fetch_recommendation_trends(self.symbol))
+
+    @cached_property
+    def revenue_estimates(self) -> pd.DataFrame:
+        res = fetch_revenue_estimates(self.symbol, freq="quarterly")
+        return _frame(res.get("data") if res else None)
+
+    @cached_property
+    def eps_estimates(self) -> pd.DataFrame:
+        res = fetch_eps_estimates(self.symbol, freq="quarterly")
+        return _frame(res.get("data") if res else None)
+
+    @cached_property
+    def upgrades(self) -> pd.DataFrame:
+        return _frame(fetch_upgrade_downgrade(self.symbol))
+
+    @cached_property
+    def dividends(self) -> pd.DataFrame:
+        res = fetch_basic_dividends(self.symbol)
+        return _frame(res.get("data") if res else None)
+
+    @cached_property
+    def splits(self) -> pd.DataFrame:
+        return _frame(fetch_stock_splits(self.symbol))
+
+    # -- etf -----------------------------------------------------------------
+    @cached_property
+    def etf_profile(self) -> dict:
+        res = fetch_etf_profile(self.symbol)
+        profile = res.get("profile", {}) if res else {}
+        if isinstance(profile, list):
+            profile = profile[0] if profile else {}
+        return profile or {}
+
+    @cached_property
+    def etf_holdings(self) -> pd.DataFrame:
+        res = fetch_etf_holdings(self.symbol)
+        return _frame(res.get("holdings") if res else None)
+
+    @cached_property
+    def etf_sectors(self) -> pd.DataFrame:
+        res = fetch_etf_sector_exposure(self.symbol)
+        return _frame(res.get("sectorExposure") if res else None)
+
+    @cached_property
+    def etf_countries(self) -> pd.DataFrame:
+        res = fetch_etf_country_exposure(self.symbol)
+        return _frame(res.get("countryExposure") if res else None)
+
+    # -- index ---------------------------------------------------------------
+    @cached_property
+    def index_constituents(self) -> list:
+        res = fetch_index_constituents(self.symbol)
+        return res.get("constituents", []) if res else []
+
+    @cached_property
+    def index_breakdown(self) -> pd.DataFrame:
+        res = fetch_index_constituents(self.symbol)
+        return _frame(res.get("constituentsBreakdown") if res else None)
+
+
+class CompareData:
+    """Several SymbolData side by side. Quacks like SymbolData for
+    call_keys/fingerprint, so cached_figure and progressive rendering apply
+    to compare views unchanged."""
+
+    def __init__(self, symbols: list):
+        self.symbols = list(symbols)
+        self.symbol = " ".join(self.symbols)
+        self.items = [SymbolData(s) for s in self.symbols]
+
+    def call_keys(self, *attrs) -> list:
+        return [key for item in self.items for key in item.call_keys(*attrs)]
+
+    def fingerprint(self, *attrs) -> tuple:
+        stamps = []
+        for item in self.items:
+            # one failing symbol drops out of the views instead of failing them
+            try:
+                stamps.append(item.fingerprint(*attrs))
+            except Exception:
+                stamps.append(None)
+        return tuple(stamps)
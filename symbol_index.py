@@ -0,0 +1,171 @@
+"""Local symbol → type index (stock / etf / index).
+
+Build it in bulk from Finnhub's symbol list:
+
+    python symbol_index.py --exchange US [--out path]
+
+The app looks symbols up here first and only probes the network for symbols
+the index does not know, writing successful probes back.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+# ---------------------------------------------------------------------------
+# On-disk format: one "SYMBOL<TAB>T<TAB>NAME" line per symbol, T being s/e/i.
+# Later lines win, so write-backs are plain appends. A read-only snapshot
+# (SYMBOL_SNAPSHOT, e.g. shipped with the image) is loaded first and the
+# writable overlay (SYMBOL_INDEX_PATH) on top of it.
+# ---------------------------------------------------------------------------
+SYMBOL_SNAPSHOT = os.environ.get("SYMBOL_SNAPSHOT", "")
+SYMBOL_INDEX_PATH = os.environ.get(
+    "SYMBOL_INDEX_PATH", os.path.join(tempfile.gettempdir(), "market_explorer", "symbols.tsv")
+)
+
+TYPE_CODES = {"stock": "s", "etf": "e", "index": "i"}
+CODE_TYPES = {v: k for k, v in TYPE_CODES.items()}
+
+# Finnhub stock_symbols "type" values that are exchange-traded funds/products
+ETF_SECURITY_TYPES = {"ETP", "ETF", "ETN", "ETC"}
+
+
+class SymbolIndex:
+
+    def __init__(self, path: str = SYMBOL_INDEX_PATH, snapshot: str = SYMBOL_SNAPSHOT):
+        self.path = path
+        self.snapshot = snapshot
+        self._types = {}
+        self._names = {}
+        self._mtime = None
+        self.version = 0    # bumped on every change, so derived indexes know to rebuild
+        self._lock = threading.Lock()
+        if snapshot and os.path.exists(snapshot):
+            self._load(snapshot)
+        self._reload_overlay()
+
+    def _load(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) < 2 or parts[1] not in CODE_TYPES:
+                    continue
+                self._types[parts[0]] = parts[1]
+                if len(parts) > 2 and parts[2]:
+                    self._names[parts[0]] = parts[2]
+        self.version += 1
+
+    def _reload_overlay(self):
+        # other replicas append to the same file; pick their rows up on a miss
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            with self._lock:
+                self._load(self.path)
+                self._mtime = mtime
+
+    def refresh(self):
+        """Pick up rows other processes appended to (or rewrote in) the overlay."""
+        self._reload_overlay()
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def items(self) -> list:
+        """[(symbol, type, name)] for every known symbol."""
+        with self._lock:
+            return [(s, CODE_TYPES[c], self._names.get(s, "")) for s, c in self._types.items()]
+
+    def lookup(self, symbol: str):
+        """Return "stock" / "etf" / "index" or None if the symbol is unknown."""
+        code = self._types.get(symbol)
+        if code is None:
+            self._reload_overlay()
+            code = self._types.get(symbol)
+        return CODE_TYPES.get(code)
+
+    def name(self, symbol: str) -> str:
+        return self._names.get(symbol, "")
+
+    def add(self, symbol: str, sym_type: str, name: str = ""):
+        code = TYPE_CODES[sym_type]
+        name = name.replace("\t", " ").replace("\n", " ")
+        with self._lock:
+            if self._types.get(symbol) == code:
+                return
+            self._types[symbol] = code
+            if name:
+                self._names[symbol] = name
+            self.version += 1
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"{symbol}\t{code}\t{name}\n")
+
+    def write(self, rows, path: str = None):
+        """Replace the overlay file with rows of (symbol, type, name)."""
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for symbol, sym_type, name in rows:
+                name = (name or "").replace("\t", " ").replace("\n", " ")
+                f.write(f"{symbol}\t{TYPE_CODES[sym_type]}\t{name}\n")
+        os.replace(tmp, path)
+        with self._lock:
+            self._types.clear()
+            self._names.clear()
+            self._mtime = None
+            if self.snapshot and os.path.exists(self.snapshot):
+                self._load(self.snapshot)
+        self._reload_overlay()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SymbolIndex()
+    return _index
+
+
+# ---------------------------------------------------------------------------
+# Bulk build from Finnhub's symbol list
+# ---------------------------------------------------------------------------
+def classify_security_type(security_type: str) -> str:
+    return "etf" if (security_type or "").upper() in ETF_SECURITY_TYPES else "stock"
+
+
+def build_rows(client, exchanges) -> list:
+    rows = {}
+    for exchange in exchanges:
+        for item in client.stock_symbols(exchange) or []:
+            symbol = item.get("symbol")
+            if symbol:
+                rows[symbol] = (symbol, classify_security_type(item.get("type")), item.get("description", ""))
+    return sorted(rows.values())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the local symbol-type index.")
+    parser.add_argument("--exchange", nargs="+", default=["US"], help="Finnhub exchange codes")
+    parser.add_argument("--out", default=SYMBOL_INDEX_PATH)
+    args = parser.parse_args()
+
+    from market_data import fc
+    rows = build_rows(fc, args.exchange)
+    SymbolIndex(path=args.out, snapshot="").write(rows)
+    etfs = sum(1 for _, t, _ in rows if t == "etf")
+    print(f"wrote {len(rows)} symbols ({etfs} ETFs) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
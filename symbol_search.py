@@ -0,0 +1,182 @@
+import bisect
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from metrics import register_collector
+from symbol_index import get_symbol_index
+
+# ---------------------------------------------------------------------------
+# In-memory search over the symbol universe held by the symbol index.
+#
+# Built once per process from the index's rows and rebuilt in the background
+# when the index changes (checked every SYMBOL_SEARCH_REFRESH seconds, which
+# also re-reads the on-disk overlay). Three structures, all plain lists and
+# dicts, so a query is a few bisects and dict lookups:
+#   - sorted tickers            → ticker prefix
+#   - sorted (name word, ticker) → company-name word prefix
+#   - ticker single-deletes     → tickers within one typo (SymSpell-style)
+#
+# Once the index holds a bulk-built universe (at least SYMBOL_VALIDATE_MIN
+# symbols), searches for tickers it does not know are answered with
+# suggestions instead of running the page, so a typo costs no Finnhub calls.
+# Below that the index is only what probes have written back, and unknown
+# symbols still go to the network as before.
+# ---------------------------------------------------------------------------
+SYMBOL_SEARCH_REFRESH = float(os.environ.get("SYMBOL_SEARCH_REFRESH", "300"))
+SYMBOL_VALIDATE_MIN = int(os.environ.get("SYMBOL_VALIDATE_MIN", "1000"))
+SYMBOL_SUGGESTIONS = int(os.environ.get("SYMBOL_SUGGESTIONS", "8"))
+
+_WORD = re.compile(r"[A-Z0-9]+")
+_NAME_SCAN = 2000   # name-word entries looked at per query, at most
+
+
+def _deletes(word: str) -> set:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class SymbolSearch:
+
+    def __init__(self, index=None, refresh: float = SYMBOL_SEARCH_REFRESH):
+        self.index = index or get_symbol_index()
+        self.refresh_interval = refresh
+        self.stats = Counter()
+        self._tickers = []
+        self._names = {}
+        self._words = []
+        self._fuzzy = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._building = False
+        self._lock = threading.Lock()
+        self._build()
+
+    def _build(self):
+        version = self.index.version
+        rows = self.index.items()
+        names, words, fuzzy = {}, [], {}
+        for symbol, _, name in rows:
+            name = name.upper()
+            names[symbol] = name
+            words.extend((w, symbol) for w in set(_WORD.findall(name)) if len(w) > 1)
+            for variant in _deletes(symbol) | {symbol}:
+                fuzzy.setdefault(variant, []).append(symbol)
+        words.sort()
+        # swap in whole; readers holding the old lists carry on undisturbed
+        self._tickers, self._names, self._words, self._fuzzy = sorted(names), names, words, fuzzy
+        self._version = version
+        self.stats["builds"] += 1
+
+    def _rebuild(self):
+        try:
+            self._build()
+        finally:
+            self._building = False
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            if self._building or now - self._checked_at < self.refresh_interval:
+                return
+            self._checked_at = now
+            self.index.refresh()
+            if self.index.version == self._version:
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild, name="symbol-search", daemon=True).start()
+
+    def __len__(self) -> int:
+        return len(self._tickers)
+
+    def validating(self) -> bool:
+        """True once the universe is complete enough to reject unknown tickers."""
+        return len(self._tickers) >= SYMBOL_VALIDATE_MIN
+
+    def known(self, symbol: str) -> bool:
+        self._maybe_refresh()
+        return symbol in self._names or self.index.lookup(symbol) is not None
+
+    def suggest(self, query: str, limit: int = SYMBOL_SUGGESTIONS) -> list:
+        """[(symbol, name)] best first: exact ticker, ticker prefix, company
+        name word prefix, then tickers one typo away."""
+        self._maybe_refresh()
+        self.stats["suggest"] += 1
+        q = query.strip().upper()
+        if not q:
+            return []
+        tickers, names, words = self._tickers, self._names, self._words
+        out = []
+
+        def take(symbol):
+            if symbol not in out:
+                out.append(symbol)
+            return len(out) >= limit
+
+        if q in names and take(q):
+            return self._pairs(out)
+        i = bisect.bisect_left(tickers, q)
+        while i < len(tickers) and tickers[i].startswith(q):
+            if take(tickers[i]):
+                return self._pairs(out)
+            i += 1
+
+        terms = _WORD.findall(q)
+        if terms:
+            head, rest = max(terms, key=len), terms
+            i = bisect.bisect_left(words, (head,))
+            stop = min(i + _NAME_SCAN, len(words))
+            while i < stop and words[i][0].startswith(head):
+                symbol = words[i][1]
+                if all(t in names[symbol] for t in rest) and take(symbol):
+                    return self._pairs(out)
+                i += 1
+
+        fuzzy = self._fuzzy
+        for variant in _deletes(q) | {q}:
+            for symbol in fuzzy.get(variant, ()):
+                if take(symbol):
+                    return self._pairs(out)
+        return self._pairs(out)
+
+    def _pairs(self, symbols: list) -> list:
+        return [(s, self.index.name(s)) for s in symbols]
+
+    def unknown(self, text: str) -> list:
+        """The tickers in a search ("AAPL", "AAPL MSFT", "SPY:60 QQQ:40") the
+        universe does not know; [] when not validating. Indices (^GSPC) are
+        not in the symbol list and always pass."""
+        if not self.validating():
+            return []
+        missing = []
+        for token in text.replace(",", " ").split():
+            symbol = token.partition(":")[0].upper()
+            if symbol and not symbol.startswith("^") and not self.known(symbol) and symbol not in missing:
+                missing.append(symbol)
+        self.stats["rejected" if missing else "validated"] += 1
+        return missing
+
+
+_search = None
+_search_lock = threading.Lock()
+
+
+def get_symbol_search() -> SymbolSearch:
+    global _search
+    if _search is None:
+        with _search_lock:
+            if _search is None:
+                _search = SymbolSearch()
+    return _search
+
+
+@register_collector
+def _search_metrics():
+    if _search is None:
+        return
+    yield "mx_symbol_search_symbols", {}, len(_search), "gauge"
+    for event in ("builds", "suggest", "validated", "rejected"):
+        yield "mx_symbol_search_events_total", {"event": event}, _search.stats[event], "counter"
@@ -0,0 +1,81 @@
+import math
+import os
+
+import pandas as pd
+import streamlit as st
+
+# ---------------------------------------------------------------------------
+# Server-side paged tables.
+#
+# Large tables (index constituents run to thousands of rows) are filtered,
+# sorted and sliced here with vectorized pandas ops, and only the visible
+# page goes to st.dataframe. Number formatting is left to column_config so
+# no per-row Python formatting runs on the server.
+# ---------------------------------------------------------------------------
+TABLE_PAGE_SIZE = int(os.environ.get("TABLE_PAGE_SIZE", "50"))
+
+
+def table_window(df: pd.DataFrame, query: str = "", search_cols=(), min_values: dict = None,
+                 sort_by: str = None, descending: bool = True, page: int = 1,
+                 page_size: int = TABLE_PAGE_SIZE, max_values: dict = None) -> tuple:
+    """Filter, sort and slice df; returns (page rows, matching row count, page count).
+
+    query matches case-insensitively as a substring of any search_cols;
+    min_values / max_values map a numeric column to its lower / upper bound
+    (rows where it is missing are dropped).
+    """
+    mask = pd.Series(True, index=df.index)
+    if query:
+        hit = pd.Series(False, index=df.index)
+        for col in search_cols:
+            if col in df.columns:
+                hit |= df[col].astype("string").str.contains(query, case=False, regex=False, na=False)
+        mask &= hit
+    for col, low in (min_values or {}).items():
+        if col in df.columns and low is not None:
+            mask &= df[col] >= low
+    for col, high in (max_values or {}).items():
+        if col in df.columns and high is not None:
+            mask &= df[col] <= high
+    view = df[mask] if not mask.all() else df
+    if sort_by and sort_by in view.columns:
+        view = view.sort_values(sort_by, ascending=not descending, na_position="last", kind="stable")
+    total = len(view)
+    pages = max(1, math.ceil(total / page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return view.iloc[start:start + page_size], total, pages
+
+
+def render_paged_table(df: pd.DataFrame, key: str, search_cols=(), sort_cols=(),
+                       min_value_col: str = None, column_config: dict = None,
+                       page_size: int = TABLE_PAGE_SIZE, min_values: dict = None,
+                       max_values: dict = None):
+    """Filter/sort/page controls over df; only the current page is sent to the browser.
+
+    min_values / max_values are bounds set by the caller's own controls.
+    """
+    c_query, c_min, c_sort, c_desc = st.columns([3, 2, 2, 1])
+    query = c_query.text_input("Filter", key=f"{key}_query", placeholder="symbol or name")
+    min_values = dict(min_values or {})
+    if min_value_col and min_value_col in df.columns:
+        min_values[min_value_col] = c_min.number_input(
+            f"Min {min_value_col}", key=f"{key}_min", value=None, step=0.01,
+        )
+    sort_options = [c for c in sort_cols if c in df.columns]
+    sort_by = c_sort.selectbox("Sort by", sort_options, key=f"{key}_sort") if sort_options else None
+    descending = c_desc.toggle("Desc", value=True, key=f"{key}_desc")
+
+    page_key = f"{key}_page"
+    window, total, pages = table_window(
+        df, query.strip(), search_cols, min_values, sort_by, descending,
+        st.session_state.get(page_key, 1), page_size, max_values,
+    )
+    # keep the page widget inside its range when a filter shrinks the result
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    st.dataframe(window, use_container_width=True, hide_index=True, column_config=column_config)
+    c_page, c_info = st.columns([1, 4])
+    c_page.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key,
+                        label_visibility="collapsed")
+    c_info.caption(f"Page {st.session_state.get(page_key, 1)} of {pages} · {total:,} rows")
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("RESPONSE_CACHE", "memory")
+# market_data's client is the in-process fake, and the symbol index a scratch file
+os.environ.setdefault("FINNHUB_FAKE_LATENCY", "0")
+os.environ.setdefault("SYMBOL_INDEX_PATH", os.path.join(tempfile.mkdtemp(), "symbols.tsv"))
+
+import response_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def restore_cache():
+    previous = response_cache._cache
+    yield
+    response_cache.set_cache(previous)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds or 0
+
+
+@pytest.fixture
+def clock(request, monkeypatch):
+    """A clock the test moves by hand, standing in for time.monotonic, or for
+    the time function named by an indirect parameter:
+
+        @pytest.mark.parametrize("clock", ["time"], indirect=True)
+    """
+    clock = Clock()
+    monkeypatch.setattr(time, getattr(request, "param", "monotonic"), clock)
+    return clock
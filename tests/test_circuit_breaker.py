@@ -0,0 +1,174 @@
+import finnhub
+import pytest
+import requests
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_upstream_fault
+
+
+class APIError(Exception):
+
+    def __init__(self, status_code=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def fail(status_code=500):
+    raise APIError(status_code)
+
+
+def raise_(exc):
+    raise exc
+
+
+def fail_with_timeout():
+    raise TimeoutError
+
+
+def ok():
+    return "ok"
+
+
+def trip(breaker: CircuitBreaker, status_code=500):
+    for _ in range(breaker.threshold):
+        with pytest.raises(APIError):
+            breaker.call(fail, status_code)
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_upstream_faults_open_the_circuit(clock, status_code):
+    breaker = CircuitBreaker("ep", failures=3, cooldown=10)
+    trip(breaker, status_code)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(ok)
+
+
+@pytest.mark.parametrize("status_code", [400, 403, 404])
+def test_per_symbol_client_errors_never_open_the_circuit(clock, status_code):
+    breaker = CircuitBreaker("ep", failures=3, cooldown=10)
+    for _ in range(10):
+        with pytest.raises(APIError):
+            breaker.call(fail, status_code)
+    assert breaker.state == CLOSED
+    assert breaker.info()["consecutive_failures"] == 0
+    assert breaker.call(ok) == "ok"
+
+
+TRANSPORT_ERRORS = [
+    ConnectionError("connection reset"),
+    TimeoutError("read timed out"),
+    requests.ConnectionError("connection refused"),
+    requests.ReadTimeout("read timed out"),
+    finnhub.FinnhubRequestException("Invalid Response: <html>"),
+]
+
+
+@pytest.mark.parametrize("error", TRANSPORT_ERRORS, ids=lambda e: type(e).__name__)
+def test_transport_errors_open_the_circuit(clock, error):
+    breaker = CircuitBreaker("ep", failures=3, cooldown=10)
+    for _ in range(3):
+        with pytest.raises(type(error)):
+            breaker.call(raise_, error)
+    assert breaker.state == OPEN
+
+
+def test_httpx_transport_errors_open_the_circuit(clock):
+    httpx = pytest.importorskip("httpx")   # optional FINNHUB_TRANSPORT=httpx
+    for error in (httpx.ConnectError("connection refused"), httpx.ReadTimeout("read timed out")):
+        breaker = CircuitBreaker("ep", failures=2, cooldown=10)
+        for _ in range(2):
+            with pytest.raises(type(error)):
+                breaker.call(raise_, error)
+        assert breaker.state == OPEN
+
+
+@pytest.mark.parametrize("error", [KeyError("gradeTime"), ValueError("bad date"), TypeError("None"),
+                                   APIError(None), FileNotFoundError("fixture")],
+                         ids=lambda e: type(e).__name__)
+def test_local_bugs_raise_without_tripping(clock, error):
+    assert not is_upstream_fault(error)
+    breaker = CircuitBreaker("ep", failures=3, cooldown=10)
+    for _ in range(10):
+        with pytest.raises(type(error)):
+            breaker.call(raise_, error)
+    assert breaker.state == CLOSED
+    assert breaker.info()["consecutive_failures"] == 0
+
+
+def test_client_errors_do_not_reset_a_run_of_faults(clock):
+    breaker = CircuitBreaker("ep", failures=3, cooldown=10)
+    for status_code in (500, 404, 500, 403, 500):
+        with pytest.raises(APIError):
+            breaker.call(fail, status_code)
+    assert breaker.state == OPEN
+
+
+def test_ignored_exceptions_do_not_count(clock):
+    breaker = CircuitBreaker("ep", failures=2, cooldown=10)
+    for _ in range(5):
+        with pytest.raises(TimeoutError):
+            breaker.call(fail_with_timeout, ignore=(TimeoutError,))
+    assert breaker.state == CLOSED
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("ep", failures=3, cooldown=10)
+    for _ in range(2):
+        with pytest.raises(APIError):
+            breaker.call(fail)
+    breaker.call(ok)
+    with pytest.raises(APIError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker("ep", failures=2, cooldown=10)
+    trip(breaker)
+    clock.now += 10
+    assert breaker.call(ok) == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.cooldown == 10
+
+
+def test_half_open_probe_failure_reopens_with_doubled_cooldown(clock):
+    breaker = CircuitBreaker("ep", failures=2, cooldown=10, max_cooldown=15)
+    trip(breaker)
+    clock.now += 10
+    with pytest.raises(APIError):
+        breaker.call(fail)
+    assert breaker.state == OPEN and breaker.cooldown == 15
+    clock.now += 14
+    with pytest.raises(CircuitOpenError):
+        breaker.call(ok)
+    clock.now += 1
+    assert breaker.call(ok) == "ok"
+
+
+def test_only_one_probe_while_half_open(clock):
+    breaker = CircuitBreaker("ep", failures=2, cooldown=10)
+    trip(breaker)
+    clock.now += 10
+    seen = []
+
+    def probe():
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(ok)
+        seen.append("rejected")
+        return "ok"
+
+    assert breaker.call(probe) == "ok"
+    assert seen == ["rejected"]
+    assert breaker.info()["probes"] == 1
+
+
+def test_client_error_on_probe_leaves_circuit_half_open(clock):
+    breaker = CircuitBreaker("ep", failures=2, cooldown=10)
+    trip(breaker)
+    clock.now += 10
+    with pytest.raises(APIError):
+        breaker.call(fail, 404)
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(ok) == "ok"
+    assert breaker.state == CLOSED
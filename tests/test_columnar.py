@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from columnar import compact_frame
+
+RECORDS = [{"symbol": "AAPL", "name": f"Holding {i}", "sector": "Tech" if i % 2 else "Energy",
+            "percent": float(i)} for i in range(10)]
+
+
+@pytest.mark.parametrize("infer_string", [True, False])
+def test_string_columns_are_compacted_without_string_inference(infer_string):
+    with pd.option_context("future.infer_string", infer_string):
+        df = compact_frame(RECORDS, sort="percent")
+    assert isinstance(df["symbol"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["sector"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["name"].dtype, pd.StringDtype)      # all distinct: stays string
+    assert df["percent"].tolist() == sorted(df["percent"], reverse=True)
+
+
+def test_mixed_object_columns_are_left_alone():
+    with pd.option_context("future.infer_string", False):
+        df = compact_frame([{"x": "a"}, {"x": 1}, {"x": "a"}])
+    assert df["x"].dtype == object
@@ -0,0 +1,45 @@
+import pytest
+
+import market_data
+from fake_finnhub import FakeAPIError
+from market_data import detect_symbol_type
+from response_cache import MemoryCache, TieredCache, set_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    set_cache(TieredCache(MemoryCache()))
+
+
+def failing_probe(monkeypatch, error):
+    def etfs_profile(**kwargs):
+        raise error
+    monkeypatch.setattr(market_data.fc.client, "etfs_profile", etfs_profile)
+
+
+def test_unreachable_probe_is_unknown_not_stock(monkeypatch):
+    failing_probe(monkeypatch, ConnectionError("connection reset"))
+    assert detect_symbol_type("QQQ") == "unknown"
+    # the negative-cached failure replays as unknown too
+    assert detect_symbol_type("QQQ") == "unknown"
+    assert market_data.get_symbol_index().lookup("QQQ") is None
+
+
+def test_retry_skips_the_cached_failure(monkeypatch):
+    failing_probe(monkeypatch, ConnectionError("connection reset"))
+    assert detect_symbol_type("IWM") == "unknown"
+    monkeypatch.undo()
+    assert detect_symbol_type("IWM") == "unknown"
+    assert detect_symbol_type("IWM", retry=True) == "etf"
+
+
+def test_client_error_means_stock(monkeypatch):
+    failing_probe(monkeypatch, FakeAPIError(403, "etfs_profile"))
+    assert detect_symbol_type("ORCL") == "stock"
+    assert market_data.get_symbol_index().lookup("ORCL") is None
+
+
+def test_failed_parse_is_unknown_not_stock(monkeypatch):
+    failing_probe(monkeypatch, KeyError("profile"))
+    assert detect_symbol_type("DIA") == "unknown"
+    assert market_data.get_symbol_index().lookup("DIA") is None
@@ -0,0 +1,127 @@
+from datetime import date, datetime
+
+import pytest
+
+import history_store
+from history_store import HISTORY_FULL_RESYNC_DAYS, sync
+from response_cache import MemoryCache, TieredCache, set_cache
+
+KEY_COLS = ("symbol", "year", "quarter")
+
+
+@pytest.fixture
+def today(monkeypatch):
+    """Call with a date to set the day sync() runs on."""
+    current = [date(2026, 1, 10)]
+
+    class Today(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.combine(current[0], datetime.min.time())
+    monkeypatch.setattr(history_store, "datetime", Today)
+    set_cache(TieredCache(MemoryCache()))
+    return lambda day: current.__setitem__(0, day)
+
+
+class Upstream:
+    """Serves fixed records, filtered to the window asked for, and logs the windows."""
+
+    def __init__(self, records):
+        self.records = records
+        self.windows = []
+
+    def __call__(self, _from, to):
+        self.windows.append((_from, to))
+        return [r for r in self.records if _from <= r["date"] <= to]
+
+
+def row(day, quarter, eps=1.0, year=2025):
+    return {"symbol": "AAPL", "date": day, "year": year, "quarter": quarter, "epsActual": eps}
+
+
+def run(upstream, start=date(2025, 1, 1), end=date(2026, 3, 31)):
+    return sync("earnings_calendar", "AAPL", upstream, start=start, end=end,
+                date_col="date", key_cols=KEY_COLS)
+
+
+def test_second_sync_fetches_only_the_overlap_since_the_last_sync(today):
+    upstream = Upstream([row("2025-04-30", 1), row("2025-07-31", 2), row("2025-10-30", 3)])
+    assert len(run(upstream)) == 3
+    assert upstream.windows == [("2025-01-01", "2026-03-31")]
+
+    today(date(2026, 1, 20))
+    upstream.records.append(row("2026-01-29", 4))
+    df = run(upstream)
+    # last synced 2026-01-10, less HISTORY_OVERLAP_DAYS
+    assert upstream.windows[-1] == ("2026-01-03", "2026-03-31")
+    assert list(df["quarter"]) == [1, 2, 3, 4]
+
+
+def test_record_restated_inside_the_overlap_replaces_the_stored_one(today):
+    upstream = Upstream([row("2025-10-30", 3), row("2026-01-08", 4, eps=1.0)])
+    run(upstream)
+
+    today(date(2026, 1, 12))
+    # Q4 moved two days and its figure was revised; Q3 is outside the overlap
+    upstream.records = [row("2026-01-10", 4, eps=1.5)]
+    df = run(upstream)
+    assert upstream.windows[-1] == ("2026-01-03", "2026-03-31")
+    assert df[["date", "quarter", "epsActual"]].values.tolist() == [
+        ["2025-10-30", 3, 1.0],
+        ["2026-01-10", 4, 1.5],
+    ]
+
+
+def test_record_moved_into_the_overlap_is_not_duplicated(today):
+    upstream = Upstream([row("2025-12-30", 4)])
+    run(upstream)
+
+    today(date(2026, 1, 12))
+    # stored before the overlap, so kept, and now reported again inside it
+    upstream.records = [row("2026-01-06", 4, eps=1.2)]
+    df = run(upstream)
+    assert df[["date", "quarter", "epsActual"]].values.tolist() == [["2026-01-06", 4, 1.2]]
+
+
+def test_record_withdrawn_inside_the_overlap_disappears(today):
+    upstream = Upstream([row("2025-10-30", 3), row("2026-01-08", 4)])
+    run(upstream)
+
+    today(date(2026, 1, 12))
+    upstream.records = [row("2025-10-30", 3)]
+    assert list(run(upstream)["quarter"]) == [3]
+
+
+def test_rows_before_the_rolling_start_are_trimmed(today):
+    upstream = Upstream([row("2025-01-30", 4, year=2024), row("2025-04-30", 1)])
+    run(upstream)
+
+    today(date(2026, 1, 12))
+    df = run(upstream, start=date(2025, 3, 1))
+    assert upstream.windows[-1] == ("2026-01-03", "2026-03-31")
+    assert list(df["date"]) == ["2025-04-30"]
+
+
+def test_wider_start_backfills_the_whole_window(today):
+    upstream = Upstream([row("2024-07-30", 3, year=2024), row("2025-04-30", 1)])
+    assert list(run(upstream)["date"]) == ["2025-04-30"]
+
+    today(date(2026, 1, 12))
+    df = run(upstream, start=date(2024, 1, 1))
+    assert upstream.windows[-1] == ("2024-01-01", "2026-03-31")
+    assert list(df["date"]) == ["2024-07-30", "2025-04-30"]
+
+
+def test_full_resync_after_the_resync_interval(today):
+    upstream = Upstream([row("2025-04-30", 1)])
+    run(upstream)
+    today(date(2026, 1, 11))
+    run(upstream)
+    assert upstream.windows[-1][0] == "2026-01-03"
+
+    today(date.fromordinal(date(2026, 1, 10).toordinal() + HISTORY_FULL_RESYNC_DAYS))
+    # a correction to an old record is only seen by the periodic full fetch
+    upstream.records = [row("2025-04-30", 1, eps=2.0)]
+    df = run(upstream)
+    assert upstream.windows[-1][0] == "2025-01-01"
+    assert list(df["epsActual"]) == [2.0]
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+
+import pandas as pd
+import pytest
+
+import lookthrough
+from lookthrough import coverage, net_exposure, normalized_weights, overlap, stock_exposure
+
+# percent of each ETF; the untickered cash line is kept under its name
+HOLDINGS = {
+    "SPY": [("AAPL", "Apple Inc", 7.0), ("MSFT", "Microsoft Corp", 6.0), ("XOM", "Exxon Mobil", 3.0)],
+    "QQQ": [("AAPL", "Apple Inc", 9.0), ("MSFT", "Microsoft Corp", 8.0), ("NVDA", "Nvidia Corp", 5.0),
+            ("", "USD CASH", 1.0)],
+}
+SECTORS = {
+    "SPY": [("Technology", 30.0), ("Energy", 10.0)],
+    "QQQ": [("Technology", 50.0), ("Communication", 20.0)],
+}
+
+
+class FixedData:
+    """SymbolData over HOLDINGS and SECTORS."""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def fingerprint(self, *attrs):
+        return (1.0,)
+
+    @property
+    def etf_holdings(self):
+        return pd.DataFrame(HOLDINGS[self.symbol], columns=["symbol", "name", "percent"])
+
+    @property
+    def etf_sectors(self):
+        return pd.DataFrame(SECTORS[self.symbol], columns=["industry", "exposure"])
+
+
+@pytest.fixture(autouse=True)
+def fixed_holdings(monkeypatch):
+    monkeypatch.setattr(lookthrough, "SymbolData", FixedData)
+    monkeypatch.setattr(lookthrough, "_cache", OrderedDict())
+
+
+def by(df: pd.DataFrame, key: str) -> dict:
+    return {k: round(v, 6) for k, v in zip(df[key], df["exposure"])}
+
+
+def test_weights_are_normalized_to_fractions():
+    assert normalized_weights({"SPY": 60, "QQQ": 40}).to_dict() == {"SPY": 0.6, "QQQ": 0.4}
+    assert normalized_weights({"SPY": 3, "QQQ": 2}).to_dict() == {"SPY": 0.6, "QQQ": 0.4}
+    assert normalized_weights({"SPY": 0, "QQQ": 0}).to_dict() == {"SPY": 0.0, "QQQ": 0.0}
+
+
+def test_net_stock_exposure_of_a_60_40_portfolio():
+    df = stock_exposure({"SPY": 60, "QQQ": 40})
+    # AAPL 0.6 × 7 + 0.4 × 9, MSFT 0.6 × 6 + 0.4 × 8, NVDA 0.4 × 5, XOM 0.6 × 3
+    assert by(df, "symbol") == {"AAPL": 7.8, "MSFT": 6.8, "NVDA": 2.0, "XOM": 1.8, "USD CASH": 0.4}
+    assert list(df["symbol"][:2]) == ["AAPL", "MSFT"]
+    aapl = df.set_index("symbol").loc["AAPL"]
+    assert (aapl["name"], round(aapl["SPY"], 6), round(aapl["QQQ"], 6)) == ("Apple Inc", 4.2, 3.6)
+    assert df.set_index("symbol").loc["USD CASH", "name"] == ""
+
+
+def test_weights_not_summing_to_100_give_the_same_exposure():
+    assert by(net_exposure({"SPY": 3, "QQQ": 2}, "holdings"), "symbol") == \
+        by(net_exposure({"SPY": 60, "QQQ": 40}, "holdings"), "symbol")
+
+
+def test_net_sector_exposure():
+    df = net_exposure({"SPY": 60, "QQQ": 40}, "sectors")
+    assert by(df, "industry") == {"Technology": 38.0, "Communication": 8.0, "Energy": 6.0}
+
+
+def test_pairwise_overlap_is_the_sum_of_smaller_weights():
+    df = overlap(["SPY", "QQQ"]).round(6)
+    # min(7, 9) + min(6, 8); the diagonal is each ETF's own reported total
+    assert df.loc["SPY", "QQQ"] == df.loc["QQQ", "SPY"] == 13.0
+    assert (df.loc["SPY", "SPY"], df.loc["QQQ", "QQQ"]) == (16.0, 23.0)
+
+
+def test_coverage_is_the_share_of_reported_holdings():
+    assert coverage(["SPY", "QQQ"]).round(6).to_dict() == {"SPY": 16.0, "QQQ": 23.0}
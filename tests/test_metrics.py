@@ -0,0 +1,20 @@
+import metrics
+from metrics import begin_request, end_request, prometheus_text, summary
+
+
+def test_page_and_first_content_are_separate_histograms():
+    metrics.reset()
+    begin_request(symbol="AAPL")
+    end_request(sym_type="stock", first_content_s=0.25)
+    rows = {(r["kind"], r["name"]): r for r in summary()}
+    assert rows[("page", "stock")]["count"] == 1
+    assert rows[("first_content", "stock")]["count"] == 1
+    assert rows[("first_content", "stock")]["p50_s"] == 0.25
+    assert 'mx_span_seconds_count{kind="first_content",name="stock",outcome="ok"} 1' in prometheus_text()
+
+
+def test_pages_without_content_record_no_first_content():
+    metrics.reset()
+    begin_request(symbol="QQQ")
+    end_request(sym_type="unknown")
+    assert [r["kind"] for r in summary()] == ["page"]
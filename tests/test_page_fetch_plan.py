@@ -0,0 +1,38 @@
+import pytest
+
+import panels
+from market_data import call_key, page_fetch_plan
+from rate_limit import PRIORITY_TOP_PANEL
+from symbol_data import SymbolData
+
+
+def top_panel_calls(plan: list) -> list:
+    # the first top-priority call is the above-the-fold section's
+    return [call_key(fn, args, kwargs) for fn, args, kwargs, priority in plan
+            if priority == PRIORITY_TOP_PANEL][1:]
+
+
+def chart_calls(builders: list) -> list:
+    keys = []
+    for attr in panels.top_panel_attrs(builders):
+        fetcher, extra = SymbolData.SOURCES[attr]
+        keys.append(call_key(fetcher, ("AAPL", *extra)))
+    return keys
+
+
+@pytest.mark.parametrize("sym_type", ["stock", "etf"])
+@pytest.mark.parametrize("charts", [None, 1, 3])
+def test_top_panel_fetches_follow_the_panel_builders(sym_type, charts):
+    plan = page_fetch_plan("AAPL", sym_type, charts=charts)
+    assert top_panel_calls(plan) == chart_calls(panels.TOP_PANEL_BUILDERS[sym_type][:charts])
+
+
+def test_reordered_builders_change_what_is_fetched_first(monkeypatch):
+    builders = list(reversed(panels.TOP_PANEL_BUILDERS["stock"]))
+    monkeypatch.setitem(panels.TOP_PANEL_BUILDERS, "stock", builders)
+    plan = page_fetch_plan("AAPL", "stock", charts=1)
+    assert top_panel_calls(plan) == chart_calls(builders[:1])
+
+
+def test_no_chart_fetches_with_graphs_hidden():
+    assert top_panel_calls(page_fetch_plan("AAPL", "stock", show_graphs=False)) == []
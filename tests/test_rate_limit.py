@@ -0,0 +1,195 @@
+import threading
+import time
+
+import pytest
+
+from rate_limit import (
+    PRIORITY_BACKGROUND, PRIORITY_TOP_PANEL, QuotaWaitTimeout, RequestScheduler, ScheduledClient,
+    SlidingWindow, request_priority,
+)
+
+
+class APIError(Exception):
+
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def sleeps(clock, monkeypatch):
+    """Backoff sleeps, which move the clock instead of blocking."""
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock.sleep(seconds)
+    monkeypatch.setattr(time, "sleep", sleep)
+    return sleeps
+
+
+def scheduler(clock, monkeypatch, **kwargs) -> RequestScheduler:
+    """A scheduler whose quota waits move the clock instead of blocking."""
+    scheduler = RequestScheduler(**kwargs)
+    monkeypatch.setattr(scheduler._cond, "wait", lambda timeout=None: clock.sleep(timeout))
+    return scheduler
+
+
+def call_times(scheduler: RequestScheduler, clock, n: int) -> list:
+    """When each of n back-to-back scheduled calls went out, relative to the first."""
+    start = clock.now
+    return [scheduler.call(lambda: clock.now - start) for _ in range(n)]
+
+
+# ---------------------------------------------------------------------------
+# Quota
+# ---------------------------------------------------------------------------
+def test_per_minute_quota_holds_in_the_first_minute(clock, monkeypatch):
+    times = call_times(scheduler(clock, monkeypatch, calls_per_minute=60, burst=30,
+                                 max_wait=120), clock, 61)
+    # 30 in the first second, 30 in the next, then nothing until the minute turns
+    assert times[29] < 1 <= times[30]
+    assert times[59] < 2
+    assert times[60] >= 60
+
+
+def test_burst_caps_a_single_second(clock, monkeypatch):
+    times = call_times(scheduler(clock, monkeypatch, calls_per_minute=1000, burst=30), clock, 31)
+    assert times[29] == 0
+    assert times[30] >= 1
+
+
+def test_quota_wait_past_max_wait_times_out(clock, monkeypatch):
+    s = scheduler(clock, monkeypatch, calls_per_minute=1, max_wait=5)
+    s.call(lambda: None)
+    with pytest.raises(QuotaWaitTimeout):
+        s.call(lambda: None)
+    assert clock.now >= 1005
+    assert s.stats()["timeouts"] == 1
+    assert s.stats()["queue_depth"] == 0
+
+
+def test_top_panel_ticket_goes_before_queued_background_ones(clock):
+    s = RequestScheduler(calls_per_minute=1, max_wait=1000)
+    order = []
+    s.call(order.append, "first")
+
+    def queue(priority, name):
+        with request_priority(priority):
+            s.call(order.append, name)
+
+    def wait_for(condition):
+        deadline = time.monotonic_ns() + 5e9
+        while not condition() and time.monotonic_ns() < deadline:
+            threading.Event().wait(0.001)
+        assert condition()
+
+    def next_minute():
+        clock.now += 60
+        with s._cond:
+            s._cond.notify_all()
+
+    threads = [threading.Thread(target=queue, args=(PRIORITY_BACKGROUND, f"background{i}"))
+               for i in range(2)]
+    threads.append(threading.Thread(target=queue, args=(PRIORITY_TOP_PANEL, "top")))
+    for depth, thread in enumerate(threads, 1):
+        thread.start()
+        wait_for(lambda depth=depth: s.stats()["queue_depth"] == depth)
+
+    next_minute()
+    wait_for(lambda: len(order) == 2)
+    assert order == ["first", "top"]
+    for n in (3, 4):
+        next_minute()
+        wait_for(lambda n=n: len(order) == n)
+    for thread in threads:
+        thread.join(5)
+    assert order == ["first", "top", "background0", "background1"]
+
+
+# ---------------------------------------------------------------------------
+# Retries
+# ---------------------------------------------------------------------------
+def test_429_drains_the_burst_window_and_is_retried(clock, monkeypatch, sleeps):
+    s = scheduler(clock, monkeypatch, calls_per_minute=1000, burst=30)
+    calls = []
+
+    def fetch():
+        calls.append(clock.now)
+        if len(calls) == 1:
+            raise APIError(429)
+        return "ok"
+
+    assert s.call(fetch) == "ok"
+    assert len(calls) == 2 and len(sleeps) == 1
+    # the retry waited out the drained second, not just the backoff
+    assert calls[1] - calls[0] >= 1 > sleeps[0]
+    assert s.stats()["status_429"] == 1
+
+
+def test_5xx_is_retried_with_growing_backoff(clock, monkeypatch, sleeps):
+    s = scheduler(clock, monkeypatch, max_retries=3, backoff=0.5)
+    calls = []
+
+    def fetch():
+        calls.append(clock.now)
+        raise APIError(503)
+
+    with pytest.raises(APIError):
+        s.call(fetch)
+    assert len(calls) == 4
+    assert len(sleeps) == 3
+    for attempt, slept in enumerate(sleeps):
+        # jittered between half and all of backoff * 2^attempt
+        assert 0.25 * 2 ** attempt <= slept <= 0.5 * 2 ** attempt
+    assert s.stats()["retries"] == 3
+
+
+@pytest.mark.parametrize("status_code", [400, 403, 404])
+def test_client_errors_are_not_retried(clock, monkeypatch, sleeps, status_code):
+    s = scheduler(clock, monkeypatch)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise APIError(status_code)
+
+    with pytest.raises(APIError):
+        s.call(fetch)
+    assert calls == [1] and sleeps == []
+
+
+def test_scheduled_client_routes_endpoint_methods_through_the_scheduler(clock, monkeypatch):
+    class Client:
+        api_key = "k"
+
+        def quote(self, symbol):
+            return {"symbol": symbol}
+
+    s = scheduler(clock, monkeypatch)
+    client = ScheduledClient(Client(), s)
+    assert client.quote("AAPL") == {"symbol": "AAPL"}
+    assert client.quote.__name__ == "quote"
+    assert client.api_key == "k"
+    assert s.stats()["calls"] == 1
+
+
+# ---------------------------------------------------------------------------
+# SlidingWindow
+# ---------------------------------------------------------------------------
+def test_window_reports_wait_until_oldest_slot_frees(clock):
+    window = SlidingWindow(2, period=60)
+    assert window.try_take() == 0
+    clock.now += 10
+    assert window.try_take() == 0
+    assert window.try_take() == pytest.approx(50)
+    clock.now += 50
+    assert window.try_take() == 0
+
+
+def test_drain_blocks_until_the_window_turns_over(clock):
+    window = SlidingWindow(30, period=1)
+    window.drain()
+    assert window.try_take() == pytest.approx(1)
+    clock.now += 1
+    assert window.try_take() == 0
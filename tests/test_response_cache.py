@@ -0,0 +1,259 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import response_cache
+from rate_limit import QuotaWaitTimeout
+from response_cache import (
+    NEGATIVE_CACHE_TTL, CacheBackend, CachedFailure, MemoryCache, SQLiteCache, TieredCache,
+    cache_stats, cached, set_cache,
+)
+
+_names = itertools.count()
+
+
+def endpoint_name() -> str:
+    # breakers and stats are per endpoint and process-wide; keep tests apart
+    return f"test_endpoint_{next(_names)}"
+
+
+class BrokenBackend(CacheBackend):
+    """A shared tier whose server is down."""
+
+    def get(self, key, max_age=None):
+        raise ConnectionError("connection refused")
+
+    def set(self, key, value, ttl, endpoint=""):
+        raise ConnectionError("connection refused")
+
+    def delete(self, key):
+        raise ConnectionError("connection refused")
+
+    def clear(self):
+        raise ConnectionError("connection refused")
+
+
+# ---------------------------------------------------------------------------
+# Shared tier outages
+# ---------------------------------------------------------------------------
+def test_shared_tier_errors_fall_back_to_upstream_and_memory():
+    cache = TieredCache(MemoryCache(), BrokenBackend())
+    set_cache(cache)
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        return {"symbol": symbol}
+
+    assert fetch("AAPL") == {"symbol": "AAPL"}
+    assert fetch("AAPL") == {"symbol": "AAPL"}     # served by the memory tier
+    assert calls == ["AAPL"]
+    assert cache.shared.errors["get"] >= 1
+    assert cache.shared.errors["set"] == 1
+    assert "errors" in cache.info()["shared"]
+
+
+def test_sqlite_reads_batch_access_time_writes(tmp_path):
+    db = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    db.set("k", "v", ttl=60)
+    (before,) = db._conn().execute("SELECT accessed_at FROM entries WHERE key = 'k'").fetchone()
+
+    for _ in range(10):
+        assert db.get("k").value == "v"
+    (unchanged,) = db._conn().execute("SELECT accessed_at FROM entries WHERE key = 'k'").fetchone()
+    assert unchanged == before
+
+    db.flush_touches()
+    (after,) = db._conn().execute("SELECT accessed_at FROM entries WHERE key = 'k'").fetchone()
+    assert after > before
+
+
+# ---------------------------------------------------------------------------
+# Stale-while-revalidate
+# ---------------------------------------------------------------------------
+def wait_until(condition, timeout: float = 5):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        threading.Event().wait(0.001)
+    assert condition()
+
+
+@pytest.mark.parametrize("clock", ["time"], indirect=True)
+def test_stale_entry_is_served_while_one_background_refresh_runs(clock):
+    set_cache(TieredCache(MemoryCache()))
+    release = threading.Event()
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        if len(calls) > 1:
+            release.wait(5)
+        return {"symbol": symbol, "version": len(calls)}
+
+    assert fetch("AAPL")["version"] == 1
+    clock.now += fetch.policy.fresh + 1
+
+    # the refresh is held upstream; every read meanwhile gets the stale copy
+    for _ in range(5):
+        assert fetch("AAPL")["version"] == 1
+    wait_until(lambda: len(calls) == 2)
+    assert fetch("AAPL")["version"] == 1
+    release.set()
+    wait_until(lambda: cache_stats()[fetch.endpoint]["refreshes"] == 1)
+    wait_until(lambda: not response_cache._revalidating)
+
+    assert fetch("AAPL")["version"] == 2
+    assert calls == ["AAPL", "AAPL"]
+    assert cache_stats()[fetch.endpoint]["stale"] == 6
+
+
+@pytest.mark.parametrize("clock", ["time"], indirect=True)
+def test_entry_past_max_stale_blocks_on_a_fresh_fetch(clock):
+    set_cache(TieredCache(MemoryCache()))
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        return {"symbol": symbol, "version": len(calls)}
+
+    assert fetch("AAPL")["version"] == 1
+    clock.now += fetch.policy.fresh + fetch.policy.max_stale + 1
+
+    assert fetch("AAPL")["version"] == 2
+    assert calls == ["AAPL", "AAPL"]
+    assert cache_stats()[fetch.endpoint]["misses"] == 2
+    assert cache_stats()[fetch.endpoint]["stale"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Negative cache
+# ---------------------------------------------------------------------------
+class APIError(Exception):
+
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def test_failed_call_is_replayed_until_negative_ttl(monkeypatch):
+    set_cache(TieredCache(MemoryCache()))
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        if len(calls) == 1:
+            raise APIError(403)
+        return {"symbol": symbol}
+
+    with pytest.raises(APIError):
+        fetch("XYZ")
+    with pytest.raises(CachedFailure) as replayed:
+        fetch("XYZ")
+    assert replayed.value.status_code == 403
+    assert calls == ["XYZ"]
+    assert cache_stats()[fetch.endpoint]["negative_hits"] == 1
+
+    now[0] += NEGATIVE_CACHE_TTL + 1
+    assert fetch("XYZ") == {"symbol": "XYZ"}
+    assert calls == ["XYZ", "XYZ"]
+
+
+def test_quota_timeouts_are_not_negative_cached():
+    set_cache(TieredCache(MemoryCache()))
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        if len(calls) == 1:
+            raise QuotaWaitTimeout("no slot")
+        return {"symbol": symbol}
+
+    with pytest.raises(QuotaWaitTimeout):
+        fetch("AAPL")
+    assert fetch("AAPL") == {"symbol": "AAPL"}
+
+
+def test_client_errors_for_many_symbols_leave_the_endpoint_open():
+    set_cache(TieredCache(MemoryCache()))
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        if symbol != "AAPL":
+            raise APIError(404)
+        return {"symbol": symbol}
+
+    for i in range(20):
+        with pytest.raises(APIError):
+            fetch(f"MISSING{i}")
+    assert fetch("AAPL") == {"symbol": "AAPL"}
+
+
+# ---------------------------------------------------------------------------
+# Single-flight
+# ---------------------------------------------------------------------------
+def test_concurrent_misses_share_one_upstream_call():
+    set_cache(TieredCache(MemoryCache()))
+    release = threading.Event()
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        release.wait(5)
+        return {"symbol": symbol}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(fetch, "AAPL") for _ in range(8)]
+        while cache_stats().get(fetch.endpoint, {}).get("coalesced", 0) < 7:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+    assert calls == ["AAPL"]
+    assert all(r == {"symbol": "AAPL"} for r in results)
+
+
+def test_waiters_get_the_leaders_exception():
+    set_cache(TieredCache(MemoryCache()))
+    release = threading.Event()
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        release.wait(5)
+        raise APIError(500)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(fetch, "AAPL") for _ in range(4)]
+        while cache_stats().get(fetch.endpoint, {}).get("coalesced", 0) < 3:
+            time.sleep(0.001)
+        release.set()
+        for f in futures:
+            with pytest.raises(APIError):
+                f.result(timeout=5)
+    assert calls == ["AAPL"]
+    assert not response_cache._inflight
+
+
+def test_different_keys_do_not_coalesce():
+    set_cache(TieredCache(MemoryCache()))
+    calls = []
+
+    @cached(endpoint_name())
+    def fetch(symbol):
+        calls.append(symbol)
+        return {"symbol": symbol}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(fetch, ["AAPL", "MSFT", "NVDA", "TSLA"]))
+    assert sorted(calls) == ["AAPL", "MSFT", "NVDA", "TSLA"]
@@ -0,0 +1,68 @@
+import struct
+
+import pytest
+
+from response_cache import MemoryCache, TieredCache, cached, set_cache
+from snapshot_bundle import MAGIC, BundleClient, BundleMiss, SnapshotBundle, write_bundle
+
+SUBJECTS = {
+    "AAPL": {"company_basic_financials": {"metric": {"peTTM": 30.1}, "symbol": "AAPL"},
+             "recommendation_trends": [{"period": "2026-09-01", "buy": 20}]},
+    "SPY": {"etfs_profile": {"profile": {"name": "SPDR S&P 500"}}},
+}
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    path = str(tmp_path / "demo.mxb")
+    write_bundle(path, SUBJECTS, ["AAPL", "SPY"])
+    return path
+
+
+def test_round_trip(bundle_path):
+    bundle = SnapshotBundle(bundle_path)
+    assert bundle.symbols == ["AAPL", "SPY"]
+    assert sorted(bundle.subjects()) == ["AAPL", "SPY"]
+    assert bundle.endpoints("AAPL") == ["company_basic_financials", "recommendation_trends"]
+    assert bundle.payload("company_basic_financials", "AAPL") == SUBJECTS["AAPL"]["company_basic_financials"]
+    assert bundle.payload("etfs_profile", "AAPL") is None
+    assert bundle.payload("etfs_profile", "QQQ") is None
+
+
+def test_subjects_load_lazily(bundle_path):
+    bundle = SnapshotBundle(bundle_path, cache_subjects=1)
+    assert not bundle._parsed
+    bundle.payload("etfs_profile", "SPY")
+    assert list(bundle._parsed) == ["SPY"]
+    bundle.payload("recommendation_trends", "AAPL")
+    assert list(bundle._parsed) == ["AAPL"]
+
+
+def test_newer_format_is_refused(bundle_path):
+    with open(bundle_path, "r+b") as f:
+        f.seek(len(MAGIC))
+        f.write(struct.pack("<H", 99))
+    with pytest.raises(ValueError, match="format 99"):
+        SnapshotBundle(bundle_path)
+
+
+def test_client_replays_and_misses(bundle_path):
+    client = BundleClient(bundle_path)
+    assert client.etfs_profile(symbol="SPY") == SUBJECTS["SPY"]["etfs_profile"]
+    with pytest.raises(BundleMiss) as miss:
+        client.company_basic_financials("MSFT", "all")
+    assert miss.value.status_code == 404
+
+
+def test_misses_do_not_stop_serving_what_the_bundle_has(bundle_path):
+    set_cache(TieredCache(MemoryCache()))
+    client = BundleClient(bundle_path)
+
+    @cached("bundle_basic_financials")
+    def fetch(symbol):
+        return client.company_basic_financials(symbol, "all")
+
+    for symbol in ("MSFT", "NVDA", "TSLA", "AMZN", "META", "GOOGL"):
+        with pytest.raises(BundleMiss):
+            fetch(symbol)
+    assert fetch("AAPL")["metric"]["peTTM"] == 30.1
@@ -0,0 +1,97 @@
+import pytest
+
+import symbol_search
+from symbol_index import SymbolIndex
+from symbol_search import SymbolSearch
+
+ROWS = [
+    ("AAP", "stock", "Advance Auto Parts Inc"),
+    ("AAPL", "stock", "Apple Inc"),
+    ("MSFT", "stock", "Microsoft Corp"),
+    ("MSTR", "stock", "MicroStrategy Inc"),
+    ("NVDA", "stock", "NVIDIA Corp"),
+    ("QQQ", "etf", "Invesco QQQ Trust"),
+    ("SPY", "etf", "SPDR S&P 500 ETF Trust"),
+    ("T", "stock", "AT&T Inc"),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SymbolIndex(path=str(tmp_path / "symbols.tsv"), snapshot="")
+    index.write(ROWS)
+    return index
+
+
+@pytest.fixture
+def search(index, monkeypatch):
+    # the tiny universe counts as complete
+    monkeypatch.setattr(symbol_search, "SYMBOL_VALIDATE_MIN", len(ROWS))
+    return SymbolSearch(index, refresh=3600)
+
+
+def symbols(pairs: list) -> list:
+    return [symbol for symbol, _ in pairs]
+
+
+# ---------------------------------------------------------------------------
+# suggest
+# ---------------------------------------------------------------------------
+def test_exact_ticker_then_ticker_prefix(search):
+    assert search.suggest("aap") == [("AAP", "Advance Auto Parts Inc"), ("AAPL", "Apple Inc")]
+    assert symbols(search.suggest("MS")) == ["MSFT", "MSTR"]
+
+
+def test_company_name_word_prefix(search):
+    assert symbols(search.suggest("micro")) == ["MSFT", "MSTR"]
+    # every word has to match, the longest one picks the candidates
+    assert symbols(search.suggest("invesco trust")) == ["QQQ"]
+    assert symbols(search.suggest("trust")) == ["QQQ", "SPY"]
+
+
+@pytest.mark.parametrize("typo, expected", [("NVDS", ["NVDA"]), ("MSFY", ["MSFT"]), ("SPX", ["SPY"])])
+def test_tickers_one_typo_away(search, typo, expected):
+    assert symbols(search.suggest(typo)) == expected
+
+
+def test_prefix_matches_rank_before_typos(search):
+    # AAPL is both a prefix match and one delete from AAP; it is listed once
+    assert symbols(search.suggest("AAP")) == ["AAP", "AAPL"]
+    assert symbols(search.suggest("AAP", limit=1)) == ["AAP"]
+
+
+def test_no_query_or_no_match_suggests_nothing(search):
+    assert search.suggest("  ") == []
+    assert search.suggest("ZZZZZZ") == []
+
+
+# ---------------------------------------------------------------------------
+# unknown
+# ---------------------------------------------------------------------------
+def test_unknown_tickers_are_reported_once_each(search):
+    assert search.unknown("AAPL") == []
+    assert search.unknown("aapl, msft") == []
+    assert search.unknown("AAPL ZZZZ zzzz") == ["ZZZZ"]
+    assert search.stats["rejected"] == 1 and search.stats["validated"] == 2
+
+
+def test_index_tokens_always_pass(search):
+    assert search.unknown("^GSPC") == []
+    assert search.unknown("^GSPC ZZZZ") == ["ZZZZ"]
+
+
+def test_weighted_tokens_are_checked_by_symbol(search):
+    assert search.unknown("SPY:60 QQQ:40") == []
+    assert search.unknown("SPY:60 XYZ:40 QQQ") == ["XYZ"]
+
+
+def test_symbols_written_back_by_probes_are_known(search, index):
+    index.add("NEWCO", "stock", "Newco Inc")
+    assert search.unknown("NEWCO") == []
+
+
+def test_nothing_is_rejected_below_the_validation_minimum(index, monkeypatch):
+    monkeypatch.setattr(symbol_search, "SYMBOL_VALIDATE_MIN", len(ROWS) + 1)
+    search = SymbolSearch(index, refresh=3600)
+    assert not search.validating()
+    assert search.unknown("ZZZZ") == []
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from table_view import table_window
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "symbol": ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA"],
+        "name": ["Apple Inc", "Microsoft Corp", "NVIDIA Corp", "Amazon.com Inc", "Alphabet Inc",
+                 "Meta Platforms Inc", "Tesla Inc"],
+        "weight": [7.0, 6.5, 6.0, 3.5, 2.0, 2.5, None],
+    })
+
+
+def symbols(window) -> list:
+    return list(window["symbol"])
+
+
+def test_query_matches_any_search_column_case_insensitively(df):
+    window, total, pages = table_window(df, "inc", search_cols=("symbol", "name"))
+    assert symbols(window) == ["AAPL", "AMZN", "GOOGL", "META", "TSLA"]
+    assert (total, pages) == (5, 1)
+    assert symbols(table_window(df, "msf", search_cols=("symbol",))[0]) == ["MSFT"]
+    # a query over columns the frame lacks matches nothing
+    assert table_window(df, "apple", search_cols=("isin",))[1] == 0
+
+
+def test_query_on_categorical_columns(df):
+    df = df.astype({"symbol": "category", "name": "category"})
+    window, total, _ = table_window(df, "corp", search_cols=("symbol", "name"))
+    assert symbols(window) == ["MSFT", "NVDA"] and total == 2
+
+
+def test_query_is_literal_not_a_regex(df):
+    assert table_window(df, "amazon.com", search_cols=("name",))[1] == 1
+    assert table_window(df, "a.c", search_cols=("name",))[1] == 0
+
+
+def test_bounds_drop_rows_outside_and_rows_missing_the_value(df):
+    window, total, _ = table_window(df, min_values={"weight": 3.0})
+    assert symbols(window) == ["AAPL", "MSFT", "NVDA", "AMZN"] and total == 4
+    window, _, _ = table_window(df, min_values={"weight": 2.5}, max_values={"weight": 6.0})
+    assert symbols(window) == ["NVDA", "AMZN", "META"]
+    # an unset control leaves every row, including the one without a weight
+    assert table_window(df, min_values={"weight": None})[1] == 7
+
+
+def test_sort_puts_missing_values_last_either_way(df):
+    window, _, _ = table_window(df, sort_by="weight")
+    assert symbols(window) == ["AAPL", "MSFT", "NVDA", "AMZN", "META", "GOOGL", "TSLA"]
+    window, _, _ = table_window(df, sort_by="weight", descending=False)
+    assert symbols(window) == ["GOOGL", "META", "AMZN", "NVDA", "MSFT", "AAPL", "TSLA"]
+    # unknown sort column keeps the frame's order
+    assert symbols(table_window(df, sort_by="isin")[0]) == list(df["symbol"])
+
+
+def test_pages_slice_the_sorted_rows_with_a_partial_last_page(df):
+    pages_seen = [table_window(df, sort_by="symbol", descending=False, page=p, page_size=3)
+                  for p in (1, 2, 3)]
+    assert [symbols(w) for w, _, _ in pages_seen] == [
+        ["AAPL", "AMZN", "GOOGL"], ["META", "MSFT", "NVDA"], ["TSLA"],
+    ]
+    assert {(total, pages) for _, total, pages in pages_seen} == {(7, 3)}
+
+
+def test_out_of_range_page_is_clamped(df):
+    window, _, pages = table_window(df, sort_by="symbol", descending=False, page=9, page_size=3)
+    assert pages == 3 and symbols(window) == ["TSLA"]
+    assert symbols(table_window(df, page=0, page_size=3)[0]) == ["AAPL", "MSFT", "NVDA"]
+
+
+def test_no_match_is_one_empty_page(df):
+    window, total, pages = table_window(df, "zzz", search_cols=("symbol",), page=2)
+    assert window.empty and (total, pages) == (0, 1)